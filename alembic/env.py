@@ -19,6 +19,10 @@ from app.models import User, Course, Note
 # this is the Alembic Config object
 config = context.config
 
+# Give up on a statement that can't get its lock in time instead of letting every
+# query queue up behind it (0 = wait forever). A failed deploy can just be retried.
+MIGRATION_LOCK_TIMEOUT_MS = int(os.getenv("MIGRATION_LOCK_TIMEOUT_MS", 0))
+
 # Set database URL from environment variable
 config.set_main_option("sqlalchemy.url", os.getenv("DATABASE_URL"))
 
@@ -53,6 +57,11 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
+        if MIGRATION_LOCK_TIMEOUT_MS and connection.dialect.name == "postgresql":
+            # session level, so it also covers the autocommit blocks CONCURRENTLY runs in
+            connection.exec_driver_sql(f"SET lock_timeout = {MIGRATION_LOCK_TIMEOUT_MS}")
+            connection.commit()
+
         context.configure(
             connection=connection, target_metadata=target_metadata
         )
@@ -0,0 +1,56 @@
+"""Add notes archive and course is_active
+
+Revision ID: 034befd48997
+Revises: ff14a0967aa8
+Create Date: 2026-10-19 15:48:12.370415
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '034befd48997'
+down_revision: Union[str, Sequence[str], None] = 'ff14a0967aa8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Every existing course stays hot until an admin marks it inactive
+    op.add_column('courses', sa.Column('is_active', sa.Boolean(), server_default=sa.true(), nullable=False))
+
+    op.create_table('notes_archive',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.Column('file_url', sa.String(), nullable=False),
+    sa.Column('file_type', sa.String(), nullable=False),
+    sa.Column('course_id', sa.UUID(), nullable=False),
+    sa.Column('uploaded_by', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.Column('activity', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['uploaded_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_notes_archive_course_id_created_at', 'notes_archive', ['course_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # put everything back before the archive goes away
+    op.execute("""
+    INSERT INTO notes (id, title, description, file_url, file_type, course_id, uploaded_by, created_at, updated_at)
+    SELECT id, title, description, file_url, file_type, course_id, uploaded_by, created_at, updated_at
+    FROM notes_archive
+    """)
+    op.drop_index('ix_notes_archive_course_id_created_at', table_name='notes_archive')
+    op.drop_table('notes_archive')
+    op.drop_column('courses', 'is_active')
\ No newline at end of file
@@ -0,0 +1,35 @@
+"""Add indexes for note and course lookups
+
+Revision ID: 0d7c88a4c725
+Revises: a4273588c7d7
+Create Date: 2026-10-19 10:03:27.554912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0d7c88a4c725'
+down_revision: Union[str, Sequence[str], None] = 'a4273588c7d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # course_id leads so it also covers the FK cascade from courses
+    op.create_index('ix_notes_course_id_created_at', 'notes', ['course_id', 'created_at'], unique=False)
+    op.create_index(op.f('ix_notes_uploaded_by'), 'notes', ['uploaded_by'], unique=False)
+    op.create_index(op.f('ix_notes_created_at'), 'notes', ['created_at'], unique=False)
+    op.create_index(op.f('ix_courses_department'), 'courses', ['department'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_courses_department'), table_name='courses')
+    op.drop_index(op.f('ix_notes_created_at'), table_name='notes')
+    op.drop_index(op.f('ix_notes_uploaded_by'), table_name='notes')
+    op.drop_index('ix_notes_course_id_created_at', table_name='notes')
@@ -0,0 +1,48 @@
+"""Add note_locations (note id -> course_id)
+
+Revision ID: 1a6e93d0c5f2
+Revises: 8c41f0b6d2e7
+Create Date: 2026-10-19 22:31:40.118027
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1a6e93d0c5f2'
+down_revision: Union[str, Sequence[str], None] = '8c41f0b6d2e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('note_locations',
+    sa.Column('note_id', sa.UUID(), nullable=False),
+    sa.Column('course_id', sa.UUID(), nullable=False),
+    sa.ForeignKeyConstraint(['note_id', 'course_id'], ['notes.id', 'notes.course_id'], onupdate='CASCADE', ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('note_id')
+    )
+
+    op.execute("""
+    CREATE OR REPLACE FUNCTION record_note_location() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO note_locations (note_id, course_id) VALUES (NEW.id, NEW.course_id);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """)
+    op.execute("CREATE TRIGGER notes_location AFTER INSERT ON notes FOR EACH ROW EXECUTE FUNCTION record_note_location()")
+
+    # the trigger already covers anything inserted from here on
+    op.execute("INSERT INTO note_locations (note_id, course_id) SELECT id, course_id FROM notes ON CONFLICT DO NOTHING")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER notes_location ON notes")
+    op.execute("DROP FUNCTION record_note_location()")
+    op.drop_table('note_locations')
\ No newline at end of file
@@ -0,0 +1,117 @@
+"""Add change_seq and sync tombstones
+
+Revision ID: 2231471ea052
+Revises: c73cebf16766
+Create Date: 2026-10-19 17:44:09.205361
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.migrations import create_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2231471ea052'
+down_revision: Union[str, Sequence[str], None] = 'c73cebf16766'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# 64-bit id of the writing transaction: monotonic, and bounded by the snapshot xmin at read time
+CURRENT_CHANGE_SEQ = "pg_current_xact_id()::text::bigint"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A constant default is only catalog metadata (no table rewrite or backfill). Existing rows at 0
+    # are still sent by a since=0 sync, and every later write gets stamped by the trigger below.
+    for table in ('notes', 'courses'):
+        op.add_column(table, sa.Column('change_seq', sa.BigInteger(), server_default='0', nullable=False))
+
+    op.execute(f"""
+    CREATE FUNCTION stamp_change_seq() RETURNS trigger AS $$
+    BEGIN
+        NEW.change_seq := {CURRENT_CHANGE_SEQ};
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+    CREATE TRIGGER notes_change_seq BEFORE INSERT OR UPDATE ON notes
+    FOR EACH ROW EXECUTE FUNCTION stamp_change_seq()
+    """)
+    # note_count is bumped by the facet trigger on every upload, that isn't a change clients care about
+    op.execute("""
+    CREATE TRIGGER courses_change_seq
+    BEFORE INSERT OR UPDATE OF course_code, course_name, department, is_active, deleted_at ON courses
+    FOR EACH ROW EXECUTE FUNCTION stamp_change_seq()
+    """)
+
+    create_index_concurrently('ix_notes_change_seq', 'notes', ['change_seq'])
+    create_index_concurrently('ix_notes_course_id_change_seq', 'notes', ['course_id', 'change_seq'])
+    create_index_concurrently('ix_courses_change_seq', 'courses', ['change_seq'])
+
+    op.create_table('sync_tombstones',
+    sa.Column('id', sa.BigInteger(), sa.Identity(), nullable=False),
+    sa.Column('entity', sa.String(), nullable=False),
+    sa.Column('entity_id', sa.UUID(), nullable=False),
+    sa.Column('course_id', sa.UUID(), nullable=False),
+    sa.Column('change_seq', sa.BigInteger(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_sync_tombstones_change_seq'), 'sync_tombstones', ['change_seq'], unique=False)
+    op.create_index('ix_sync_tombstones_course_id_change_seq', 'sync_tombstones', ['course_id', 'change_seq'], unique=False)
+    op.create_index(op.f('ix_sync_tombstones_deleted_at'), 'sync_tombstones', ['deleted_at'], unique=False)
+
+    # Statement level so a chunked purge or an archive batch writes its tombstones in one insert
+    op.execute(f"""
+    CREATE FUNCTION tombstone_trigger() RETURNS trigger AS $$
+    BEGIN
+        IF TG_TABLE_NAME = 'notes' THEN
+            INSERT INTO sync_tombstones (entity, entity_id, course_id, change_seq, deleted_at)
+            SELECT 'note', id, course_id, {CURRENT_CHANGE_SEQ}, now() FROM old_rows;
+        ELSE
+            INSERT INTO sync_tombstones (entity, entity_id, course_id, change_seq, deleted_at)
+            SELECT 'course', id, id, {CURRENT_CHANGE_SEQ}, now() FROM old_rows;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """)
+    for table in ('notes', 'courses'):
+        op.execute(f"""
+        CREATE TRIGGER {table}_tombstones AFTER DELETE ON {table}
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION tombstone_trigger()
+        """)
+
+    # Tombstones pruned up to here are gone, older sync tokens must start over
+    op.create_table('sync_state',
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('sync_state')
+    op.execute("DROP TRIGGER courses_tombstones ON courses")
+    op.execute("DROP TRIGGER notes_tombstones ON notes")
+    op.execute("DROP FUNCTION tombstone_trigger()")
+    op.drop_index(op.f('ix_sync_tombstones_deleted_at'), table_name='sync_tombstones')
+    op.drop_index('ix_sync_tombstones_course_id_change_seq', table_name='sync_tombstones')
+    op.drop_index(op.f('ix_sync_tombstones_change_seq'), table_name='sync_tombstones')
+    op.drop_table('sync_tombstones')
+
+    op.execute("DROP TRIGGER courses_change_seq ON courses")
+    op.execute("DROP TRIGGER notes_change_seq ON notes")
+    op.execute("DROP FUNCTION stamp_change_seq()")
+    op.drop_index(op.f('ix_courses_change_seq'), table_name='courses')
+    op.drop_index('ix_notes_course_id_change_seq', table_name='notes')
+    op.drop_index('ix_notes_change_seq', table_name='notes')
+    op.drop_column('courses', 'change_seq')
+    op.drop_column('notes', 'change_seq')
\ No newline at end of file
@@ -1,32 +0,0 @@
-"""Fix note model with course_id
-
-Revision ID: 2e2fdce8baed
-Revises: 9b43453905ef
-Create Date: 2025-12-05 23:46:07.890784
-
-"""
-from typing import Sequence, Union
-
-from alembic import op
-import sqlalchemy as sa
-
-
-# revision identifiers, used by Alembic.
-revision: str = '2e2fdce8baed'
-down_revision: Union[str, Sequence[str], None] = '9b43453905ef'
-branch_labels: Union[str, Sequence[str], None] = None
-depends_on: Union[str, Sequence[str], None] = None
-
-
-def upgrade() -> None:
-    """Upgrade schema."""
-    # ### commands auto generated by Alembic - please adjust! ###
-    pass
-    # ### end Alembic commands ###
-
-
-def downgrade() -> None:
-    """Downgrade schema."""
-    # ### commands auto generated by Alembic - please adjust! ###
-    pass
-    # ### end Alembic commands ###
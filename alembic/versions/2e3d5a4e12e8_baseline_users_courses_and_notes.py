@@ -1,8 +1,14 @@
-"""Create users, courses, and notes tables
+"""Baseline: users, courses and notes
 
-Revision ID: f908531100da
+Squashes the original nine migrations (f908531100da through 2e3d5a4e12e8)
+into the schema they ended with. It keeps the id of the last one, so
+databases that are already at or past it carry on unchanged. A database
+still at one of the squashed revisions has to be upgraded to 2e3d5a4e12e8
+from an older checkout first.
+
+Revision ID: 2e3d5a4e12e8
 Revises: 
-Create Date: 2025-12-02 13:52:14.159378
+Create Date: 2026-10-19 18:40:12.905114
 
 """
 from typing import Sequence, Union
@@ -12,7 +18,7 @@ import sqlalchemy as sa
 
 
 # revision identifiers, used by Alembic.
-revision: str = 'f908531100da'
+revision: str = '2e3d5a4e12e8'
 down_revision: Union[str, Sequence[str], None] = None
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
@@ -20,7 +26,6 @@ depends_on: Union[str, Sequence[str], None] = None
 
 def upgrade() -> None:
     """Upgrade schema."""
-    # ### commands auto generated by Alembic - please adjust! ###
     op.create_table('users',
     sa.Column('id', sa.UUID(), nullable=False),
     sa.Column('email', sa.String(), nullable=False),
@@ -30,6 +35,7 @@ def upgrade() -> None:
     sa.Column('university', sa.String(), nullable=True),
     sa.Column('created_at', sa.DateTime(), nullable=False),
     sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('is_admin', sa.Boolean(), nullable=False),
     sa.PrimaryKeyConstraint('id')
     )
     op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
@@ -51,24 +57,21 @@ def upgrade() -> None:
     sa.Column('description', sa.String(), nullable=True),
     sa.Column('file_url', sa.String(), nullable=False),
     sa.Column('file_type', sa.String(), nullable=False),
-    sa.Column('upvote_counter', sa.Integer(), nullable=True),
-    sa.Column('created_by', sa.UUID(), nullable=False),
     sa.Column('uploaded_by', sa.UUID(), nullable=False),
     sa.Column('created_at', sa.DateTime(), nullable=False),
     sa.Column('updated_at', sa.DateTime(), nullable=True),
-    sa.ForeignKeyConstraint(['created_by'], ['courses.id'], ),
+    sa.Column('course_id', sa.UUID(), nullable=False),
+    # later migrations refer to this constraint by name
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], name='notes_course_id_fkey'),
     sa.ForeignKeyConstraint(['uploaded_by'], ['users.id'], ),
     sa.PrimaryKeyConstraint('id')
     )
-    # ### end Alembic commands ###
 
 
 def downgrade() -> None:
     """Downgrade schema."""
-    # ### commands auto generated by Alembic - please adjust! ###
     op.drop_table('notes')
     op.drop_index(op.f('ix_courses_course_code'), table_name='courses')
     op.drop_table('courses')
     op.drop_index(op.f('ix_users_email'), table_name='users')
-    op.drop_table('users')
-    # ### end Alembic commands ###
+    op.drop_table('users')
\ No newline at end of file
@@ -1,32 +0,0 @@
-"""Remove upvotes feature
-
-Revision ID: 2e3d5a4e12e8
-Revises: e293a383b06c
-Create Date: 2025-12-16 13:37:07.199634
-
-"""
-from typing import Sequence, Union
-
-from alembic import op
-import sqlalchemy as sa
-
-
-# revision identifiers, used by Alembic.
-revision: str = '2e3d5a4e12e8'
-down_revision: Union[str, Sequence[str], None] = 'e293a383b06c'
-branch_labels: Union[str, Sequence[str], None] = None
-depends_on: Union[str, Sequence[str], None] = None
-
-
-def upgrade() -> None:
-    """Upgrade schema."""
-    # ### commands auto generated by Alembic - please adjust! ###
-    op.drop_column('notes', 'upvote_count')
-    # ### end Alembic commands ###
-
-
-def downgrade() -> None:
-    """Downgrade schema."""
-    # ### commands auto generated by Alembic - please adjust! ###
-    op.add_column('notes', sa.Column('upvote_count', sa.INTEGER(), server_default=sa.text('0'), autoincrement=False, nullable=False))
-    # ### end Alembic commands ###
@@ -0,0 +1,37 @@
+"""Add note fingerprints table
+
+Revision ID: 3a00fc862a0f
+Revises: 629daba1301e
+Create Date: 2026-10-19 14:22:40.611873
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a00fc862a0f'
+down_revision: Union[str, Sequence[str], None] = '629daba1301e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing notes get fingerprinted by `python -m app.utils.fingerprint`
+    op.create_table('note_fingerprints',
+    sa.Column('note_id', sa.UUID(), nullable=False),
+    sa.Column('value', sa.String(), nullable=False),
+    sa.Column('course_id', sa.UUID(), nullable=False),
+    sa.ForeignKeyConstraint(['note_id'], ['notes.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('note_id', 'value')
+    )
+    op.create_index('ix_note_fingerprints_course_id_value', 'note_fingerprints', ['course_id', 'value'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_note_fingerprints_course_id_value', table_name='note_fingerprints')
+    op.drop_table('note_fingerprints')
@@ -0,0 +1,54 @@
+"""Add note activity and trending tables
+
+Revision ID: 57a080c542d5
+Revises: ebe4df50aa9f
+Create Date: 2026-10-19 12:41:53.902117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '57a080c542d5'
+down_revision: Union[str, Sequence[str], None] = 'ebe4df50aa9f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('note_activity_daily',
+    sa.Column('note_id', sa.UUID(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('views', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('downloads', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('votes', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['note_id'], ['notes.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('note_id', 'day')
+    )
+    op.create_index(op.f('ix_note_activity_daily_updated_at'), 'note_activity_daily', ['updated_at'], unique=False)
+
+    # Filled by the first trending pass after deploy
+    op.create_table('note_trending',
+    sa.Column('note_id', sa.UUID(), nullable=False),
+    sa.Column('course_id', sa.UUID(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('scored_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['note_id'], ['notes.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('note_id')
+    )
+    op.create_index('ix_note_trending_course_id_score', 'note_trending', ['course_id', 'score', 'note_id'], unique=False)
+    op.create_index('ix_note_trending_score', 'note_trending', ['score', 'note_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_note_trending_score', table_name='note_trending')
+    op.drop_index('ix_note_trending_course_id_score', table_name='note_trending')
+    op.drop_table('note_trending')
+    op.drop_index(op.f('ix_note_activity_daily_updated_at'), table_name='note_activity_daily')
+    op.drop_table('note_activity_daily')
@@ -0,0 +1,36 @@
+"""Add note events table
+
+Revision ID: 629daba1301e
+Revises: 57a080c542d5
+Create Date: 2026-10-19 13:34:18.027651
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '629daba1301e'
+down_revision: Union[str, Sequence[str], None] = '57a080c542d5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('note_events',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('note_id', sa.UUID(), nullable=False),
+    sa.Column('kind', sa.SmallInteger(), nullable=False),
+    sa.Column('occurred_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_note_events_occurred_at', 'note_events', ['occurred_at'], unique=False, postgresql_using='brin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_note_events_occurred_at', table_name='note_events', postgresql_using='brin')
+    op.drop_table('note_events')
@@ -1,32 +0,0 @@
-"""Fix upvotes_count default value
-
-Revision ID: 7d0470271458
-Revises: b2df7cd6cf1d
-Create Date: 2025-12-05 23:56:29.037246
-
-"""
-from typing import Sequence, Union
-
-from alembic import op
-import sqlalchemy as sa
-
-
-# revision identifiers, used by Alembic.
-revision: str = '7d0470271458'
-down_revision: Union[str, Sequence[str], None] = 'b2df7cd6cf1d'
-branch_labels: Union[str, Sequence[str], None] = None
-depends_on: Union[str, Sequence[str], None] = None
-
-
-def upgrade() -> None:
-    """Upgrade schema."""
-    # ### commands auto generated by Alembic - please adjust! ###
-    pass
-    # ### end Alembic commands ###
-
-
-def downgrade() -> None:
-    """Downgrade schema."""
-    # ### commands auto generated by Alembic - please adjust! ###
-    pass
-    # ### end Alembic commands ###
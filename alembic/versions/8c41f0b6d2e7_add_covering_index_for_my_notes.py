@@ -0,0 +1,34 @@
+"""Add covering index for the my notes dashboard
+
+Revision ID: 8c41f0b6d2e7
+Revises: 5b0e7d2c91a4
+Create Date: 2026-10-19 21:14:05.602318
+
+"""
+from typing import Sequence, Union
+
+from app.utils.migrations import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c41f0b6d2e7'
+down_revision: Union[str, Sequence[str], None] = '5b0e7d2c91a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # everything /api/auth/me/notes reads is in the index, so it never touches the heap
+    create_index_concurrently(
+        'ix_notes_uploaded_by_created_at', 'notes', ['uploaded_by', 'created_at', 'id'],
+        include=['course_id', 'title', 'file_type']
+    )
+    # the new index leads with uploaded_by, so this one only costs writes now
+    drop_index_concurrently('ix_notes_uploaded_by')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    create_index_concurrently('ix_notes_uploaded_by', 'notes', ['uploaded_by'])
+    drop_index_concurrently('ix_notes_uploaded_by_created_at')
\ No newline at end of file
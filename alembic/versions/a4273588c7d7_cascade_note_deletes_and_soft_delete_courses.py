@@ -0,0 +1,35 @@
+"""Cascade note deletes and soft delete courses
+
+Revision ID: a4273588c7d7
+Revises: 2e3d5a4e12e8
+Create Date: 2026-10-19 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4273588c7d7'
+down_revision: Union[str, Sequence[str], None] = '2e3d5a4e12e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Let postgres delete a course's notes instead of SQLAlchemy doing it row by row
+    op.drop_constraint('notes_course_id_fkey', 'notes', type_='foreignkey')
+    op.create_foreign_key('notes_course_id_fkey', 'notes', 'courses', ['course_id'], ['id'], ondelete='CASCADE')
+
+    op.add_column('courses', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('courses', 'deleted_at')
+
+    op.drop_constraint('notes_course_id_fkey', 'notes', type_='foreignkey')
+    op.create_foreign_key('notes_course_id_fkey', 'notes', 'courses', ['course_id'], ['id'])
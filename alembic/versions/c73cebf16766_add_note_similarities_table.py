@@ -0,0 +1,44 @@
+"""Add note similarities table
+
+Revision ID: c73cebf16766
+Revises: de272a5f7395
+Create Date: 2026-10-19 17:05:31.642087
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c73cebf16766'
+down_revision: Union[str, Sequence[str], None] = 'de272a5f7395'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Filled by `python -m app.utils.similarity`
+    op.create_table('note_similarities',
+    sa.Column('note_id', sa.UUID(), nullable=False),
+    sa.Column('rank', sa.SmallInteger(), nullable=False),
+    sa.Column('course_id', sa.UUID(), nullable=False),
+    sa.Column('similar_note_id', sa.UUID(), nullable=False),
+    sa.Column('similar_course_id', sa.UUID(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['note_id', 'course_id'], ['notes.id', 'notes.course_id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['similar_note_id', 'similar_course_id'], ['notes.id', 'notes.course_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('note_id', 'rank')
+    )
+    op.create_index('ix_note_similarities_similar_note_id', 'note_similarities', ['similar_note_id', 'similar_course_id'], unique=False)
+    op.create_index(op.f('ix_note_similarities_computed_at'), 'note_similarities', ['computed_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_note_similarities_computed_at'), table_name='note_similarities')
+    op.drop_index('ix_note_similarities_similar_note_id', table_name='note_similarities')
+    op.drop_table('note_similarities')
\ No newline at end of file
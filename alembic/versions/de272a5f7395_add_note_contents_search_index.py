@@ -0,0 +1,47 @@
+"""Add note contents search index
+
+Revision ID: de272a5f7395
+Revises: 034befd48997
+Create Date: 2026-10-19 16:27:45.118904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'de272a5f7395'
+down_revision: Union[str, Sequence[str], None] = '034befd48997'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Filled by `python -m app.utils.indexer`
+    op.create_table('note_contents',
+    sa.Column('note_id', sa.UUID(), nullable=False),
+    sa.Column('course_id', sa.UUID(), nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('content', sa.Text(), server_default='', nullable=False),
+    sa.Column('search', postgresql.TSVECTOR(), sa.Computed(
+        "setweight(to_tsvector('english', title), 'A') || setweight(to_tsvector('english', content), 'B')",
+        persisted=True
+    ), nullable=True),
+    sa.Column('source_updated_at', sa.DateTime(), nullable=False),
+    sa.Column('indexed_at', sa.DateTime(), nullable=False),
+    sa.Column('pages', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['note_id', 'course_id'], ['notes.id', 'notes.course_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('note_id')
+    )
+    op.create_index('ix_note_contents_search', 'note_contents', ['search'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_note_contents_search', table_name='note_contents', postgresql_using='gin')
+    op.drop_table('note_contents')
\ No newline at end of file
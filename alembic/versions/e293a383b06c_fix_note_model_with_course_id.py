@@ -1,32 +0,0 @@
-"""Fix note model with course_id
-
-Revision ID: e293a383b06c
-Revises: 89bda991b3cc
-Create Date: 2025-12-05 23:59:24.887446
-
-"""
-from typing import Sequence, Union
-
-from alembic import op
-import sqlalchemy as sa
-
-
-# revision identifiers, used by Alembic.
-revision: str = 'e293a383b06c'
-down_revision: Union[str, Sequence[str], None] = '89bda991b3cc'
-branch_labels: Union[str, Sequence[str], None] = None
-depends_on: Union[str, Sequence[str], None] = None
-
-
-def upgrade() -> None:
-    """Upgrade schema."""
-    # ### commands auto generated by Alembic - please adjust! ###
-    pass
-    # ### end Alembic commands ###
-
-
-def downgrade() -> None:
-    """Downgrade schema."""
-    # ### commands auto generated by Alembic - please adjust! ###
-    pass
-    # ### end Alembic commands ###
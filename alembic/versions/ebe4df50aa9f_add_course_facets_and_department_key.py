@@ -0,0 +1,168 @@
+"""Add course facets and department key
+
+Revision ID: ebe4df50aa9f
+Revises: 0d7c88a4c725
+Create Date: 2026-10-19 11:20:05.148362
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ebe4df50aa9f'
+down_revision: Union[str, Sequence[str], None] = '0d7c88a4c725'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Normalized department - same rules as app.utils.facets.normalize_department
+    op.add_column('courses', sa.Column('department_key', sa.String(), nullable=True))
+    op.execute("UPDATE courses SET department_key = lower(regexp_replace(btrim(department), '\\s+', ' ', 'g'))")
+    op.alter_column('courses', 'department_key', nullable=False)
+    op.create_index(op.f('ix_courses_department_key'), 'courses', ['department_key'], unique=False)
+    # the substring ILIKE filter never used this one
+    op.drop_index(op.f('ix_courses_department'), table_name='courses')
+
+    op.add_column('courses', sa.Column('note_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute("UPDATE courses c SET note_count = (SELECT count(*) FROM notes n WHERE n.course_id = c.id)")
+
+    op.create_table('course_facets',
+    sa.Column('facet', sa.String(), nullable=False),
+    sa.Column('value', sa.String(), nullable=False),
+    sa.Column('label', sa.String(), nullable=False),
+    sa.Column('course_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('note_count', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('facet', 'value')
+    )
+
+    # Adds a course's contribution to its department and university buckets
+    op.execute("""
+    CREATE FUNCTION bump_course_facets(p_department_key text, p_department text, p_created_by uuid,
+                                       p_courses integer, p_notes integer) RETURNS void AS $$
+    DECLARE
+        v_university text;
+    BEGIN
+        INSERT INTO course_facets (facet, value, label, course_count, note_count)
+        VALUES ('department', p_department_key, p_department, p_courses, p_notes)
+        ON CONFLICT (facet, value) DO UPDATE
+        SET course_count = course_facets.course_count + EXCLUDED.course_count,
+            note_count = course_facets.note_count + EXCLUDED.note_count;
+
+        SELECT btrim(university) INTO v_university FROM users WHERE id = p_created_by;
+        IF v_university IS NOT NULL AND v_university <> '' THEN
+            INSERT INTO course_facets (facet, value, label, course_count, note_count)
+            VALUES ('university', lower(v_university), v_university, p_courses, p_notes)
+            ON CONFLICT (facet, value) DO UPDATE
+            SET course_count = course_facets.course_count + EXCLUDED.course_count,
+                note_count = course_facets.note_count + EXCLUDED.note_count;
+        END IF;
+    END;
+    $$ LANGUAGE plpgsql
+    """)
+
+    # Soft-deleted courses drop out of the facets straight away
+    op.execute("""
+    CREATE FUNCTION courses_facets_trigger() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            IF OLD.deleted_at IS NULL THEN
+                PERFORM bump_course_facets(OLD.department_key, OLD.department, OLD.created_by, -1, -OLD.note_count);
+            END IF;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            IF NEW.deleted_at IS NULL THEN
+                PERFORM bump_course_facets(NEW.department_key, NEW.department, NEW.created_by, 1, NEW.note_count);
+            END IF;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+    CREATE TRIGGER courses_facets
+    AFTER INSERT OR DELETE OR UPDATE OF department_key, created_by, deleted_at ON courses
+    FOR EACH ROW EXECUTE FUNCTION courses_facets_trigger()
+    """)
+
+    # Statement level so a chunked purge or bulk insert updates each course once
+    op.execute("""
+    CREATE FUNCTION notes_facets_trigger() RETURNS trigger AS $$
+    DECLARE
+        r record;
+    BEGIN
+        -- courses already gone (course cascade) simply match nothing here
+        IF TG_OP = 'INSERT' THEN
+            FOR r IN
+                UPDATE courses c SET note_count = c.note_count + ch.delta
+                FROM (SELECT course_id, count(*)::integer AS delta FROM new_rows GROUP BY course_id) ch
+                WHERE c.id = ch.course_id
+                RETURNING c.department_key, c.department, c.created_by, c.deleted_at, ch.delta
+            LOOP
+                IF r.deleted_at IS NULL THEN
+                    PERFORM bump_course_facets(r.department_key, r.department, r.created_by, 0, r.delta);
+                END IF;
+            END LOOP;
+        ELSE
+            FOR r IN
+                UPDATE courses c SET note_count = c.note_count - ch.delta
+                FROM (SELECT course_id, count(*)::integer AS delta FROM old_rows GROUP BY course_id) ch
+                WHERE c.id = ch.course_id
+                RETURNING c.department_key, c.department, c.created_by, c.deleted_at, ch.delta
+            LOOP
+                IF r.deleted_at IS NULL THEN
+                    PERFORM bump_course_facets(r.department_key, r.department, r.created_by, 0, -r.delta);
+                END IF;
+            END LOOP;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+    CREATE TRIGGER notes_facets_insert AFTER INSERT ON notes
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notes_facets_trigger()
+    """)
+    op.execute("""
+    CREATE TRIGGER notes_facets_delete AFTER DELETE ON notes
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notes_facets_trigger()
+    """)
+
+    # Initial counts
+    op.execute("""
+    INSERT INTO course_facets (facet, value, label, course_count, note_count)
+    SELECT 'department', department_key, min(department), count(*), sum(note_count)
+    FROM courses
+    WHERE deleted_at IS NULL
+    GROUP BY department_key
+    """)
+    op.execute("""
+    INSERT INTO course_facets (facet, value, label, course_count, note_count)
+    SELECT 'university', lower(btrim(u.university)), min(btrim(u.university)), count(*), sum(c.note_count)
+    FROM courses c JOIN users u ON u.id = c.created_by
+    WHERE c.deleted_at IS NULL AND u.university IS NOT NULL AND btrim(u.university) <> ''
+    GROUP BY lower(btrim(u.university))
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER notes_facets_delete ON notes")
+    op.execute("DROP TRIGGER notes_facets_insert ON notes")
+    op.execute("DROP TRIGGER courses_facets ON courses")
+    op.execute("DROP FUNCTION notes_facets_trigger()")
+    op.execute("DROP FUNCTION courses_facets_trigger()")
+    op.execute("DROP FUNCTION bump_course_facets(text, text, uuid, integer, integer)")
+    op.drop_table('course_facets')
+
+    op.drop_column('courses', 'note_count')
+
+    op.create_index(op.f('ix_courses_department'), 'courses', ['department'], unique=False)
+    op.drop_index(op.f('ix_courses_department_key'), table_name='courses')
+    op.drop_column('courses', 'department_key')
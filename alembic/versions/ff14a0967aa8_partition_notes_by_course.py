@@ -0,0 +1,110 @@
+"""Partition notes by course
+
+Revision ID: ff14a0967aa8
+Revises: 3a00fc862a0f
+Create Date: 2026-10-19 15:02:37.514208
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ff14a0967aa8'
+down_revision: Union[str, Sequence[str], None] = '3a00fc862a0f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match app.models.note.NOTES_PARTITIONS
+NOTES_PARTITIONS = 8
+
+# Tables with a foreign key to notes
+DEPENDENTS = ['note_activity_daily', 'note_trending', 'note_fingerprints']
+
+NOTE_COLUMNS = "id, title, description, file_url, file_type, course_id, uploaded_by, created_at, updated_at"
+
+
+def _finish_notes_table(primary_key) -> None:
+    """Constraints, indexes and triggers of a freshly copied notes table."""
+    op.create_primary_key('notes_pkey', 'notes', primary_key)
+    op.create_foreign_key('notes_course_id_fkey', 'notes', 'courses', ['course_id'], ['id'], ondelete='CASCADE')
+    op.create_foreign_key('notes_uploaded_by_fkey', 'notes', 'users', ['uploaded_by'], ['id'])
+    op.create_index('ix_notes_course_id_created_at', 'notes', ['course_id', 'created_at'], unique=False)
+    op.create_index(op.f('ix_notes_uploaded_by'), 'notes', ['uploaded_by'], unique=False)
+    op.create_index(op.f('ix_notes_created_at'), 'notes', ['created_at'], unique=False)
+
+    # the trigger function itself survived the old table
+    op.execute("""
+    CREATE TRIGGER notes_facets_insert AFTER INSERT ON notes
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notes_facets_trigger()
+    """)
+    op.execute("""
+    CREATE TRIGGER notes_facets_delete AFTER DELETE ON notes
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notes_facets_trigger()
+    """)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Rewrites the whole table: writes to notes block until this commits
+    op.execute("LOCK TABLE notes IN ACCESS EXCLUSIVE MODE")
+    for table in DEPENDENTS:
+        op.drop_constraint(f'{table}_note_id_fkey', table, type_='foreignkey')
+
+    # Postgres only enforces uniqueness per partition, so the key has to include course_id
+    op.execute("""
+    CREATE TABLE notes_partitioned (
+        id uuid NOT NULL,
+        title varchar NOT NULL,
+        description varchar,
+        file_url varchar NOT NULL,
+        file_type varchar NOT NULL,
+        course_id uuid NOT NULL,
+        uploaded_by uuid NOT NULL,
+        created_at timestamp NOT NULL,
+        updated_at timestamp
+    ) PARTITION BY HASH (course_id)
+    """)
+    for remainder in range(NOTES_PARTITIONS):
+        op.execute(
+            f"CREATE TABLE notes_p{remainder} PARTITION OF notes_partitioned "
+            f"FOR VALUES WITH (MODULUS {NOTES_PARTITIONS}, REMAINDER {remainder})"
+        )
+    op.execute(f"INSERT INTO notes_partitioned ({NOTE_COLUMNS}) SELECT {NOTE_COLUMNS} FROM notes")
+
+    op.drop_table('notes')
+    op.rename_table('notes_partitioned', 'notes')
+    _finish_notes_table(['id', 'course_id'])
+
+    # Referencing tables point at (id, course_id); activity rows didn't carry the course yet
+    op.add_column('note_activity_daily', sa.Column('course_id', sa.UUID(), nullable=True))
+    op.execute("UPDATE note_activity_daily a SET course_id = n.course_id FROM notes n WHERE n.id = a.note_id")
+    op.alter_column('note_activity_daily', 'course_id', nullable=False)
+    for table in DEPENDENTS:
+        op.execute(f"UPDATE {table} d SET course_id = n.course_id FROM notes n WHERE n.id = d.note_id AND d.course_id <> n.course_id")
+        op.create_foreign_key(f'{table}_note_id_course_id_fkey', table, 'notes',
+                              ['note_id', 'course_id'], ['id', 'course_id'], ondelete='CASCADE')
+
+    op.execute("ANALYZE notes")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("LOCK TABLE notes IN ACCESS EXCLUSIVE MODE")
+    for table in DEPENDENTS:
+        op.drop_constraint(f'{table}_note_id_course_id_fkey', table, type_='foreignkey')
+    op.drop_column('note_activity_daily', 'course_id')
+
+    op.execute("CREATE TABLE notes_plain (LIKE notes INCLUDING DEFAULTS)")
+    op.execute(f"INSERT INTO notes_plain ({NOTE_COLUMNS}) SELECT {NOTE_COLUMNS} FROM notes")
+    # takes the partitions with it
+    op.drop_table('notes')
+    op.rename_table('notes_plain', 'notes')
+    _finish_notes_table(['id'])
+
+    for table in DEPENDENTS:
+        op.create_foreign_key(f'{table}_note_id_fkey', table, 'notes', ['note_id'], ['id'], ondelete='CASCADE')
\ No newline at end of file
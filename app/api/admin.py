@@ -0,0 +1,102 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+from typing import Optional, List
+from datetime import date, timedelta
+import anyio
+import asyncio
+from uuid import UUID
+
+from app.database import get_db
+from app.models.activity import NoteActivityDaily
+from app.models.user import User
+from app.schemas.analytics import NoteActivityResponse, IngestionStats
+from app.utils.auth import get_current_admin
+from app.utils.cache import cache_stats
+from app.utils.analytics import event_buffer
+from app.utils.admission import admission_stats
+from app.utils.profiler import SamplingProfiler, request_profiles, PROFILE_INTERVAL_MS, PROFILE_MAX_SECONDS
+
+router = APIRouter(tags=["Admin"])
+
+
+@router.get("/cache")
+def get_cache_stats(current_admin: User = Depends(get_current_admin)):
+    """Per-namespace cache hit ratios for this worker (Admin only)."""
+    return cache_stats()
+
+
+@router.get("/analytics", response_model=List[NoteActivityResponse])
+def get_note_analytics(
+    db: Session = Depends(get_db),
+    current_admin: User = Depends(get_current_admin),
+    note_id: Optional[UUID] = Query(None, description="Only this note"),
+    course_id: Optional[UUID] = Query(None, description="Only notes in this course"),
+    start: Optional[date] = Query(None, description="First day (default: 30 days ago)"),
+    end: Optional[date] = Query(None, description="Last day (default: today)"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=5000)
+):
+    """Daily view/download/vote counts per note (Admin only)."""
+    
+    end = end or date.today()
+    start = start or end - timedelta(days=30)
+    
+    query = db.query(NoteActivityDaily).filter(
+        NoteActivityDaily.day >= start,
+        NoteActivityDaily.day <= end
+    )
+    
+    if note_id:
+        query = query.filter(NoteActivityDaily.note_id == note_id)
+    
+    if course_id:
+        query = query.filter(NoteActivityDaily.course_id == course_id)
+    
+    return query.order_by(NoteActivityDaily.day.desc(), NoteActivityDaily.note_id).offset(skip).limit(limit).all()
+
+
+@router.get("/analytics/ingestion", response_model=IngestionStats)
+def get_ingestion_stats(current_admin: User = Depends(get_current_admin)):
+    """How much event recording costs on the request path in this worker (Admin only)."""
+    return event_buffer.stats()
+
+
+@router.get("/admission")
+def get_admission_stats(current_admin: User = Depends(get_current_admin)):
+    """Queue depth, rejections and thread pool usage per route class for this worker (Admin only)."""
+    return admission_stats()
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile_worker(
+    current_admin: User = Depends(get_current_admin),
+    seconds: float = Query(10, gt=0, le=PROFILE_MAX_SECONDS, description="How long to sample for"),
+    interval_ms: float = Query(PROFILE_INTERVAL_MS, ge=1, le=1000, description="Time between samples")
+):
+    """Sample live traffic in this worker and return collapsed stacks for a flamegraph (Admin only)."""
+    profiler = SamplingProfiler(interval_ms)
+    if not profiler.start():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A profile is already running in this worker"
+        )
+
+    # async so the wait doesn't hold a thread pool slot
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        await anyio.to_thread.run_sync(profiler.stop)
+    return profiler.collapsed()
+
+
+@router.get("/profile/requests/{profile_id}", response_class=PlainTextResponse)
+def get_request_profile(profile_id: str, current_admin: User = Depends(get_current_admin)):
+    """Collapsed stacks for a request sent with the X-Profile header (Admin only)."""
+    hit, stacks = request_profiles.get(profile_id)
+    if not hit:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found (it may have expired or was taken on another worker)"
+        )
+    return stacks
\ No newline at end of file
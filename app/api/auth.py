@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import func, select, tuple_
 from sqlalchemy.orm import Session
+from typing import Optional
+from uuid import UUID
 from app.database import get_db
+from app.models.course import Course
+from app.models.note import Note
 from app.models.user import User
+from app.schemas.note import MyNotesResponse
 from app.schemas.user import UserCreate, UserLogin, UserResponse, Token
 from app.utils.auth import hash_password, verify_password, create_access_token, get_current_user
-from datetime import timedelta
+from datetime import datetime, timedelta
 import os
 
 router = APIRouter(tags=["Authentication"])
@@ -100,4 +106,72 @@ def login(
 @router.get("/me", response_model=UserResponse)
 def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current authenticated user's information."""
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+def parse_cursor(cursor: str):
+    """"<created_at>_<note id>" of the last note on the previous page -> (created_at, id)."""
+    try:
+        created_at, _, note_id = cursor.partition("_")
+        return datetime.fromisoformat(created_at), UUID(note_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+@router.get("/me/notes", response_model=MyNotesResponse)
+def get_my_notes(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=200, description="Max notes per page")
+):
+    """Current user's uploads, newest first, grouped by course with per-course counts."""
+    
+    # One statement. Notes are read index-only from ix_notes_uploaded_by_created_at (course_id is an
+    # included column). Deleted courses are filtered inside the LIMIT by an anti-join on their few ids,
+    # so pages are never short. Courses are joined only to the page, and counts only cover its courses.
+    deleted_courses = select(Course.id).where(Course.deleted_at.isnot(None))
+    page = select(Note.id, Note.title, Note.file_type, Note.course_id, Note.created_at).where(
+        Note.uploaded_by == current_user.id,
+        Note.course_id.not_in(deleted_courses)
+    )
+    if cursor:
+        created_at, note_id = parse_cursor(cursor)
+        page = page.where(tuple_(Note.created_at, Note.id) < tuple_(created_at, note_id))
+    page = page.order_by(Note.created_at.desc(), Note.id.desc()).limit(limit + 1).subquery()
+    
+    counts = select(Note.course_id, func.count().label("note_count")).where(
+        Note.uploaded_by == current_user.id,
+        Note.course_id.in_(select(page.c.course_id))
+    ).group_by(Note.course_id).subquery()
+    
+    rows = db.execute(
+        select(page, Course.course_code, Course.course_name, counts.c.note_count)
+        .join(Course, Course.id == page.c.course_id)
+        .join(counts, counts.c.course_id == page.c.course_id)
+        .order_by(page.c.created_at.desc(), page.c.id.desc())
+    ).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = f"{rows[-1].created_at.isoformat()}_{rows[-1].id}"
+    
+    # a page can hold several courses, each keeps its place by its newest note
+    courses = {}
+    for row in rows:
+        group = courses.get(row.course_id)
+        if group is None:
+            group = courses[row.course_id] = {
+                "course_id": row.course_id,
+                "course_code": row.course_code,
+                "course_name": row.course_name,
+                "note_count": row.note_count,
+                "notes": [],
+            }
+        group["notes"].append({"id": row.id, "title": row.title, "file_type": row.file_type, "created_at": row.created_at})
+    
+    return {"courses": list(courses.values()), "next_cursor": next_cursor}
\ No newline at end of file
@@ -1,13 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query
+from sqlalchemy import Boolean, literal, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from datetime import datetime, timezone
 from typing import Optional, List
 from uuid import UUID
 
-from app.database import get_db
+from app.database import engine, get_db, upsert
 from app.models.course import Course
 from app.models.user import User
-from app.schemas.course import CourseCreate, CourseUpdate, CourseResponse
+from app.schemas.course import CourseCreate, CourseUpdate, CourseResponse, CourseFacets
 from app.utils.auth import get_current_user, get_current_admin
+from app.utils.cache import cached, invalidate
+from app.utils.facets import normalize_department, clean_department, get_facets
+from app.utils.fields import COURSE_FIELDS, parse_fields, field_columns, sparse_response
 
 router = APIRouter(tags=["Course"])
 
@@ -20,42 +26,52 @@ def create_course(
 ):
     """Create a new course (Admin only)."""
     
-    # Check if course code already exists
-    existing_course = db.query(Course).filter(Course.course_code == course_data.course_code).first()
-    if existing_course:
+    # One round trip: the unique index on course_code does the duplicate check
+    stmt = upsert(Course).values(
+        course_code=course_data.course_code,
+        course_name=course_data.course_name,
+        department=clean_department(course_data.department),
+        department_key=normalize_department(course_data.department),
+        created_by=current_admin.id
+    ).on_conflict_do_nothing(index_elements=["course_code"]).returning(Course)
+    new_course = db.scalars(stmt).first()
+    
+    if new_course is None:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Course with code '{course_data.course_code}' already exists"
         )
     
-    # Create new course
-    new_course = Course(
-        course_code=course_data.course_code,
-        course_name=course_data.course_name,
-        department=course_data.department,
-        created_by=current_admin.id
-    )
-    db.add(new_course)
     db.commit()
-    db.refresh(new_course)
+    invalidate("course")
     
     return new_course
 
 @router.get("/", response_model=List[CourseResponse])
+@cached("course")
 def get_all_courses(
     db: Session = Depends(get_db),
-    department: Optional[str] = Query(None, description="Filter by department"),
+    department: Optional[str] = Query(None, description="Filter by department (exact, case-insensitive)"),
     search: Optional[str] = Query(None, description="Search course name or code"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,course_code,course_name"),
     skip: int = Query(0, ge=0, description="Number of courses to skip"),
     limit: int = Query(100, ge=1, le=100, description="Max courses to return")
 ):
     """Get all courses with optional filters (Public access)."""
     
-    query = db.query(Course)
+    selected = parse_fields(fields, COURSE_FIELDS)
+    
+    if selected is None:
+        query = db.query(Course)
+    else:
+        query = db.query(*field_columns(Course, selected))
+    
+    query = query.filter(Course.deleted_at.is_(None))
     
     # Apply filters
     if department:
-        query = query.filter(Course.department.ilike(f"%{department}%"))
+        query = query.filter(Course.department_key == normalize_department(department))
     
     
     if search:
@@ -67,16 +83,42 @@ def get_all_courses(
     # Pagination
     courses = query.offset(skip).limit(limit).all()
     
-    return courses
+    if selected is not None:
+        return sparse_response(courses)
+    
+    # Cache plain schema objects, not ORM rows tied to this session
+    return [CourseResponse.model_validate(course) for course in courses]
+
+@router.get("/facets", response_model=CourseFacets)
+def get_course_facets(
+    db: Session = Depends(get_db),
+    include_universities: bool = Query(False, description="Also return university counts")
+):
+    """Departments (and optionally universities) with course and note counts (Public access)."""
+    
+    # Precomputed by db triggers, so this never scans courses or notes
+    return {
+        "departments": get_facets(db, "department"),
+        "universities": get_facets(db, "university") if include_universities else None
+    }
 
 @router.get("/{course_id}", response_model=CourseResponse)
+@cached("course")
 def get_course_by_id(
     course_id: UUID,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. course_code,course_name")
 ):
     """Get a single course by ID (Public access)."""
     
-    course = db.query(Course).filter(Course.id == course_id).first()
+    selected = parse_fields(fields, COURSE_FIELDS)
+    
+    if selected is None:
+        query = db.query(Course)
+    else:
+        query = db.query(*field_columns(Course, selected))
+    
+    course = query.filter(Course.id == course_id, Course.deleted_at.is_(None)).first()
     
     if not course:
         raise HTTPException(
@@ -84,46 +126,71 @@ def get_course_by_id(
             detail="Course not found"
         )
     
-    return course
+    if selected is not None:
+        return sparse_response(course)
+    
+    return CourseResponse.model_validate(course)
 
 
 @router.put("/{course_id}", response_model=CourseResponse)
 def update_course(
     course_id: UUID,
     course_data: CourseUpdate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_admin: User = Depends(get_current_admin)  # Only admins!
 ):
     """Update a course (Admin only)."""
     
-    course = db.query(Course).filter(Course.id == course_id).first()
+    # Update only provided fields
+    update_data = course_data.model_dump(exclude_unset=True)
+    
+    if "department" in update_data:
+        update_data["department_key"] = normalize_department(update_data["department"])
+        update_data["department"] = clean_department(update_data["department"])
+    
+    stmt = update(Course).where(
+        Course.id == course_id,
+        Course.deleted_at.is_(None)
+    ).values(**update_data, updated_at=datetime.now(timezone.utc))
+    
+    if engine.dialect.name == "postgresql":
+        # still one round trip: the CTE locks the row and reads is_active before the UPDATE changes it
+        previous = select(Course.id, Course.is_active.label("was_active")).where(
+            Course.id == course_id
+        ).with_for_update().cte("previous")
+        stmt = stmt.where(Course.id == previous.c.id).returning(Course, previous.c.was_active)
+    else:
+        # SQLite's RETURNING sees the updated row, so read the old value first
+        was_active = db.query(Course.is_active).filter(Course.id == course_id).scalar()
+        stmt = stmt.returning(Course, literal(was_active, Boolean()))
+    
+    try:
+        row = db.execute(stmt).first()
+    except IntegrityError:
+        # the only unique column a course update can touch
+        db.rollback()
+        if "course_code" not in update_data:
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Course with code '{update_data['course_code']}' already exists"
+        )
     
-    if not course:
+    if row is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found"
         )
     
-    # Update only provided fields
-    update_data = course_data.model_dump(exclude_unset=True)
-    
-    # Check if updating course_code and it conflicts with existing
-    if "course_code" in update_data:
-        existing = db.query(Course).filter(
-            Course.course_code == update_data["course_code"],
-            Course.id != course_id
-        ).first()
-        if existing:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Course with code '{update_data['course_code']}' already exists"
-            )
-    
-    for key, value in update_data.items():
-        setattr(course, key, value)
-    
+    course, was_active = row
     db.commit()
-    db.refresh(course)
+    invalidate("course")
+    
+    # bring the course's archived notes back in the background
+    if update_data.get("is_active") is True and not was_active:
+        from app.utils.archive import restore_course
+        background_tasks.add_task(restore_course, course_id)
     
     return course
 
@@ -131,20 +198,38 @@ def update_course(
 @router.delete("/{course_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_course(
     course_id: UUID,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin)  # Only admins!
+    current_admin: User = Depends(get_current_admin),  # Only admins!
+    mode: str = Query("cascade", regex="^(cascade|background)$", description="Delete notes in the db cascade or purge them in the background")
 ):
     """Delete a course (Admin only). This will also delete all notes in this course."""
     
-    course = db.query(Course).filter(Course.id == course_id).first()
+    if mode == "background":
+        # Hide the course now, remove its notes in small chunks after responding
+        # (imported here since this path is rarely used and not worth paying for at startup)
+        from app.utils.purge import soft_delete_course, purge_course
+
+        if not soft_delete_course(db, course_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Course not found"
+            )
+        
+        invalidate("course", "note")
+        background_tasks.add_task(purge_course, course_id)
+        return None
     
-    if not course:
+    # Single DELETE - notes go with it through ON DELETE CASCADE
+    deleted = db.query(Course).filter(Course.id == course_id).delete(synchronize_session=False)
+    
+    if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found"
         )
     
-    db.delete(course)
     db.commit()
+    invalidate("course", "note")
     
     return None
\ No newline at end of file
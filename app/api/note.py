@@ -1,19 +1,47 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, RedirectResponse
+from sqlalchemy import and_, case, delete, func, insert, literal, or_, select, update
 from sqlalchemy.orm import Session
+from datetime import datetime, timezone
 from typing import Optional, List
+import html
+import re
+import uuid
 from uuid import UUID
 
-from app.database import get_db
+from app.database import engine, get_db
 from app.models.note import Note
 from app.models.course import Course
 from app.models.user import User
-from app.schemas.note import NoteCreate, NoteUpdate, NoteResponse, NoteWithUploader
+from app.models.trending import NoteTrending
+from app.models.archive import NoteArchive
+from app.models.content import NoteContent
+from app.models.similarity import NoteSimilarity
+from app.models.location import NoteLocation
+from app.schemas.note import NoteCreate, NoteUpdate, NoteResponse, NoteWithUploader, NoteUploadResponse, DuplicateNote, NoteSearchResult, SimilarNote
 from app.utils.auth import get_current_user
+from app.utils.cache import cached, invalidate
+from app.utils.analytics import record_event
+from app.utils.fingerprint import note_fingerprints, find_duplicates, save_fingerprints
+from app.utils.archive import notes_with_archive, restore_note
+from app.utils.fields import NOTE_FIELDS, parse_fields, needs_uploader, field_columns, sparse_response
 
 router = APIRouter(tags=["Note"])
 
 
-@router.post("/", response_model=NoteResponse, status_code=status.HTTP_201_CREATED)
+def note_by_id(note_id: UUID):
+    """WHERE for one note by id, pinned to its partition through note_locations."""
+    located = select(NoteLocation.course_id).where(NoteLocation.note_id == note_id).scalar_subquery()
+    return (Note.id == note_id) & (Note.course_id == located)
+
+
+def in_live_course(notes):
+    """Notes of a course deleted with mode=background stay in the table until the purge gets to them."""
+    return select(Course.id).where(Course.id == notes.course_id, Course.deleted_at.is_(None)).exists()
+
+
+@router.post("/", response_model=NoteUploadResponse, status_code=status.HTTP_201_CREATED)
 def upload_note(
     note_data: NoteCreate,
     db: Session = Depends(get_db),
@@ -21,60 +49,101 @@ def upload_note(
 ):
     """Upload a new note to a course (Any authenticated user)."""
     
-    # Verify course exists
-    course = db.query(Course).filter(Course.id == note_data.course_id).first()
-    if not course:
+    # Look for the same file / near-identical title already in this course
+    fingerprints = note_fingerprints(note_data.title, note_data.file_url)
+    duplicates = find_duplicates(db, note_data.course_id, note_data.title, fingerprints)
+    
+    # INSERT ... SELECT FROM courses, so a missing or deleted course inserts nothing
+    now = datetime.now(timezone.utc)
+    stmt = insert(Note).from_select(
+        ["id", "title", "description", "file_url", "file_type", "course_id", "uploaded_by", "created_at", "updated_at"],
+        select(
+            literal(uuid.uuid4(), Note.id.type),
+            literal(note_data.title, Note.title.type),
+            literal(note_data.description, Note.description.type),
+            literal(note_data.file_url, Note.file_url.type),
+            literal(note_data.file_type, Note.file_type.type),
+            Course.id,
+            literal(current_user.id, Note.uploaded_by.type),
+            literal(now, Note.created_at.type),
+            literal(now, Note.updated_at.type)
+        ).where(Course.id == note_data.course_id, Course.deleted_at.is_(None))
+    ).returning(Note)
+    new_note = db.scalars(stmt).first()
+    
+    if new_note is None:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found"
         )
     
-    # Create new note
-    new_note = Note(
-        title=note_data.title,
-        description=note_data.description,
-        file_url=note_data.file_url,
-        file_type=note_data.file_type,
-        course_id=note_data.course_id,
-        uploaded_by=current_user.id
-    )
-    
-    db.add(new_note)
+    save_fingerprints(db, new_note.id, new_note.course_id, fingerprints)
     db.commit()
-    db.refresh(new_note)
+    invalidate("note")
     
-    return new_note
+    # Still uploaded - the uploader decides whether to delete it
+    response = NoteUploadResponse.model_validate(new_note)
+    response.possible_duplicates = [DuplicateNote(**duplicate) for duplicate in duplicates]
+    return response
 
 
 @router.get("/", response_model=List[NoteWithUploader])
+@cached("note")
 def get_all_notes(
     db: Session = Depends(get_db),
     course_id: Optional[UUID] = Query(None, description="Filter by course"),
     search: Optional[str] = Query(None, description="Search note titles"),
-    sort_by: str = Query("recent", regex="^(recent|popular)$", description="Sort by recent or popular"),
+    sort_by: str = Query("recent", regex="^(recent|popular|trending)$", description="Sort by recent, popular or trending"),
+    include_archived: bool = Query(False, description="Also list notes moved to the archive"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,title,created_at"),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100)
 ):
     """Get all notes with optional filters (Public access)."""
     
-    query = db.query(Note, User).join(User, Note.uploaded_by == User.id)
+    selected = parse_fields(fields, NOTE_FIELDS)
+    
+    # the archive is only read when asked for
+    notes = notes_with_archive() if include_archived else Note
+    
+    if selected is None:
+        query = db.query(notes, User)
+    else:
+        query = db.query(*field_columns(notes, selected)).select_from(notes)
+    
+    # only join users when an uploader field is actually returned
+    if needs_uploader(selected):
+        query = query.join(User, notes.uploaded_by == User.id)
     
     # Apply filters
+    query = query.filter(in_live_course(notes))
+    
     if course_id:
-        query = query.filter(Note.course_id == course_id)
+        query = query.filter(notes.course_id == course_id)
     
     if search:
-        query = query.filter(Note.title.ilike(f"%{search}%"))
+        query = query.filter(notes.title.ilike(f"%{search}%"))
     
     # Sorting
     if sort_by == "popular":
-        query = query.order_by(Note.upvotes_count.desc())
+        query = query.order_by(notes.upvotes_count.desc())
+    elif sort_by == "trending":
+        # ranking is precomputed, notes only show up here once the refresher has scored them
+        query = query.join(NoteTrending, (NoteTrending.note_id == notes.id) & (NoteTrending.course_id == notes.course_id))
+        if course_id:
+            query = query.filter(NoteTrending.course_id == course_id)
+        # both columns descending, so a backward scan of either index returns the top rows already in order
+        query = query.order_by(NoteTrending.score.desc(), NoteTrending.note_id.desc())
     else:  # recent
-        query = query.order_by(Note.created_at.desc())
+        query = query.order_by(notes.created_at.desc())
     
     # Pagination
     results = query.offset(skip).limit(limit).all()
     
+    if selected is not None:
+        return sparse_response(results)
+    
     # Format response with uploader info
     notes_with_uploader = []
     for note, user in results:
@@ -97,14 +166,117 @@ def get_all_notes(
     return notes_with_uploader
 
 
-@router.get("/{note_id}", response_model=NoteWithUploader)
-def get_note_by_id(
-    note_id: UUID,
-    db: Session = Depends(get_db)
+# The indexer strips control characters from file text, so these are safe match markers
+HEADLINE_OPTIONS = "StartSel=\x02, StopSel=\x03, MaxFragments=2, MaxWords=30, MinWords=10"
+# Characters of file text around the first match when searching without full-text search
+SNIPPET_CHARS = 200
+
+
+def search_without_fts(db: Session, q: str, course_id: Optional[UUID], skip: int, limit: int):
+    """Every word as a LIKE match on title or file text, for databases without tsvector (SQLite).
+    No stemming or ranking beyond title matches first, enough for tests and local runs."""
+    words = q.split()[:10]
+    
+    def like(column, word):
+        escaped = word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return column.ilike(f"%{escaped}%", escape="\\")
+    
+    rank = case((and_(*(like(Note.title, word) for word in words)), 1.0), else_=0.5)
+    query = db.query(
+        Note.id, Note.title, Note.course_id, Note.file_url, Note.file_type, Note.created_at,
+        rank.label("rank"), NoteContent.content
+    ).outerjoin(
+        NoteContent, NoteContent.note_id == Note.id
+    ).filter(
+        *(or_(like(Note.title, word), like(NoteContent.content, word)) for word in words),
+        in_live_course(Note)
+    )
+    if course_id:
+        query = query.filter(Note.course_id == course_id)
+    rows = query.order_by(rank.desc(), Note.created_at.desc(), Note.id).offset(skip).limit(limit).all()
+    
+    # same \x02/\x03 markers ts_headline is asked for, so both paths share the escaping below
+    pattern = re.compile("|".join(re.escape(word) for word in words), re.IGNORECASE)
+    results = []
+    for row in rows:
+        text = row.content or ""
+        match = pattern.search(text)
+        if match is None:
+            text, start = row.title, 0
+        else:
+            start = max(0, match.start() - SNIPPET_CHARS // 4)
+        window = text[start:start + SNIPPET_CHARS]
+        results.append({
+            **{key: value for key, value in row._mapping.items() if key != "content"},
+            "snippet": pattern.sub(lambda m: f"\x02{m.group()}\x03", window)
+        })
+    return results
+
+
+@router.get("/search", response_model=List[NoteSearchResult])
+@cached("note")
+def search_notes(
+    db: Session = Depends(get_db),
+    q: str = Query(..., min_length=2, max_length=200, description="Words to look for in titles and file contents"),
+    course_id: Optional[UUID] = Query(None, description="Only notes in this course"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=50)
 ):
-    """Get a single note by ID (Public access)."""
+    """Full-text search over note titles and extracted file text (Public access)."""
+    
+    if engine.dialect.name != "postgresql":
+        results = search_without_fts(db, q, course_id, skip, limit)
+    else:
+        results = [dict(row._mapping) for row in full_text_search(db, q, course_id, skip, limit)]
+    
+    # file text is untrusted, escape it before adding our own markup
+    return [{
+        **row,
+        "snippet": html.escape(row["snippet"]).replace("\x02", "<mark>").replace("\x03", "</mark>")
+    } for row in results]
+
+
+def full_text_search(db: Session, q: str, course_id: Optional[UUID], skip: int, limit: int):
+    query_ts = func.websearch_to_tsquery("english", q)
+    
+    hits = db.query(
+        NoteContent.note_id,
+        NoteContent.course_id,
+        func.ts_rank(NoteContent.search, query_ts).label("rank")
+    ).filter(NoteContent.search.op("@@")(query_ts))
+    
+    if course_id:
+        hits = hits.filter(NoteContent.course_id == course_id)
+    
+    hits = hits.order_by(func.ts_rank(NoteContent.search, query_ts).desc(), NoteContent.note_id).offset(skip).limit(limit).subquery()
+    
+    # ts_headline re-parses the whole text, so only run it for the page being returned
+    return db.query(
+        Note.id, Note.title, Note.course_id, Note.file_url, Note.file_type, Note.created_at, hits.c.rank,
+        func.ts_headline("english", NoteContent.content, query_ts, HEADLINE_OPTIONS).label("snippet")
+    ).join(
+        hits, (Note.id == hits.c.note_id) & (Note.course_id == hits.c.course_id)
+    ).join(
+        NoteContent, NoteContent.note_id == hits.c.note_id
+    ).filter(in_live_course(Note)).order_by(hits.c.rank.desc(), Note.id).all()
+
+
+@cached("note")
+def load_note_with_uploader(note_id: UUID, db: Session, fields: Optional[tuple] = None):
+    """Fetch a note plus its uploader's name/email (or just `fields` of it), or 404."""
+    
+    def lookup(notes):
+        if fields is None:
+            query = db.query(notes, User)
+        else:
+            query = db.query(*field_columns(notes, fields)).select_from(notes)
+        if needs_uploader(fields):
+            query = query.join(User, notes.uploaded_by == User.id)
+        key = note_by_id(note_id) if notes is Note else notes.id == note_id
+        return query.filter(key, in_live_course(notes)).first()
     
-    result = db.query(Note, User).join(User, Note.uploaded_by == User.id).filter(Note.id == note_id).first()
+    # old links to archived notes keep working
+    result = lookup(Note) or lookup(NoteArchive)
     
     if not result:
         raise HTTPException(
@@ -112,6 +284,9 @@ def get_note_by_id(
             detail="Note not found"
         )
     
+    if fields is not None:
+        return dict(result._mapping)
+    
     note, user = result
     
     return {
@@ -130,38 +305,123 @@ def get_note_by_id(
     }
 
 
-@router.put("/{note_id}", response_model=NoteResponse)
-def update_note(
+@router.get("/{note_id}", response_model=NoteWithUploader)
+def get_note_by_id(
+    note_id: UUID,
+    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,title,file_url")
+):
+    """Get a single note by ID (Public access)."""
+    
+    selected = parse_fields(fields, NOTE_FIELDS)
+    note = load_note_with_uploader(note_id=note_id, db=db, fields=selected)
+    
+    # buffered in memory, written in batches - counted even on cache hits
+    record_event(note_id, "view")
+    
+    if selected is not None:
+        return JSONResponse(jsonable_encoder(note))
+    
+    return note
+
+
+@router.get("/{note_id}/download")
+def download_note(
+    note_id: UUID,
+    db: Session = Depends(get_db)
+):
+    """Count a download and redirect to the file (Public access)."""
+    
+    note = load_note_with_uploader(note_id=note_id, db=db)
+    record_event(note_id, "download")
+    
+    return RedirectResponse(note["file_url"], status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+
+
+@router.get("/{note_id}/similar", response_model=List[SimilarNote])
+@cached("note")
+def get_similar_notes(
+    note_id: UUID,
+    db: Session = Depends(get_db)
+):
+    """Related notes from other courses (Public access)."""
+    
+    # precomputed top-k list, read straight off the primary key
+    results = db.query(
+        Note.id, Note.title, Note.file_type, Note.course_id,
+        Course.course_code, Course.course_name, NoteSimilarity.score
+    ).select_from(NoteSimilarity).join(
+        Note, (Note.id == NoteSimilarity.similar_note_id) & (Note.course_id == NoteSimilarity.similar_course_id)
+    ).join(
+        Course, Course.id == Note.course_id
+    ).filter(
+        NoteSimilarity.note_id == note_id,
+        Course.deleted_at.is_(None)
+    ).order_by(NoteSimilarity.rank).all()
+    
+    return [dict(row._mapping) for row in results]
+
+
+@router.post("/{note_id}/restore", response_model=NoteResponse)
+def restore_archived_note(
     note_id: UUID,
-    note_data: NoteUpdate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Update a note (Only note owner can update)."""
+    """Move an archived note back into the live notes (Owner or Admin)."""
     
-    note = db.query(Note).filter(Note.id == note_id).first()
+    archived = db.query(NoteArchive.uploaded_by).filter(NoteArchive.id == note_id).first()
     
-    if not note:
+    if not archived:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Note not found"
+            detail="Archived note not found"
         )
     
-    # Check if current user is the owner
-    if note.uploaded_by != current_user.id:
+    if archived.uploaded_by != current_user.id and not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="You can only edit your own notes"
+            detail="You can only restore your own notes"
         )
     
+    restore_note(db, note_id)
+    db.commit()
+    invalidate("note")
+    
+    return db.query(Note).filter(note_by_id(note_id)).first()
+
+
+@router.put("/{note_id}", response_model=NoteResponse)
+def update_note(
+    note_id: UUID,
+    note_data: NoteUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Update a note (Only note owner can update)."""
+    
     # Update only provided fields
     update_data = note_data.model_dump(exclude_unset=True)
     
-    for key, value in update_data.items():
-        setattr(note, key, value)
+    # ownership is part of the WHERE, so the happy path is a single statement
+    note = db.scalars(
+        update(Note).where(note_by_id(note_id), Note.uploaded_by == current_user.id)
+        .values(**update_data, updated_at=datetime.now(timezone.utc))
+        .returning(Note)
+    ).first()
+    
+    if note is None:
+        not_owner = db.query(Note.id).filter(note_by_id(note_id)).first() is not None
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN if not_owner else status.HTTP_404_NOT_FOUND,
+            detail="You can only edit your own notes" if not_owner else "Note not found"
+        )
+    
+    if "title" in update_data or "file_url" in update_data:
+        save_fingerprints(db, note.id, note.course_id, note_fingerprints(note.title, note.file_url), replace=True)
     
     db.commit()
-    db.refresh(note)
+    invalidate("note")
     
     return note
 
@@ -174,22 +434,20 @@ def delete_note(
 ):
     """Delete a note (Owner or Admin can delete)."""
     
-    note = db.query(Note).filter(Note.id == note_id).first()
+    query = delete(Note).where(note_by_id(note_id))
+    if not current_user.is_admin:
+        query = query.where(Note.uploaded_by == current_user.id)
     
-    if not note:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Note not found"
-        )
+    deleted = db.execute(query.returning(Note.id)).first()
     
-    # Check if current user is owner OR admin
-    if note.uploaded_by != current_user.id and not current_user.is_admin:
+    if deleted is None:
+        not_owner = db.query(Note.id).filter(note_by_id(note_id)).first() is not None
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You can only delete your own notes"
+            status_code=status.HTTP_403_FORBIDDEN if not_owner else status.HTTP_404_NOT_FOUND,
+            detail="You can only delete your own notes" if not_owner else "Note not found"
         )
     
-    db.delete(note)
     db.commit()
+    invalidate("note")
     
     return None
\ No newline at end of file
@@ -0,0 +1,115 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+from typing import Optional
+from uuid import UUID
+
+from app.database import get_db
+from app.models.course import Course
+from app.models.note import Note
+from app.models.sync import SyncTombstone
+from app.schemas.course import CourseResponse
+from app.schemas.note import NoteResponse
+from app.schemas.sync import SyncResponse
+from app.utils.sync import sync_upper_bound, tombstone_horizon
+
+router = APIRouter(tags=["Sync"])
+
+# Changes are ordered by (change_seq, stream, id) so a page can end inside a big transaction
+COURSES, NOTES, TOMBSTONES = 0, 1, 2
+
+
+def parse_token(token: str):
+    """"<seq>" or "<seq>-<stream>-<id>" (a page cut inside one transaction) -> (seq, stream, id)."""
+    try:
+        seq, _, rest = token.partition("-")
+        if not rest:
+            return int(seq), None, None
+        stream, _, row_id = rest.partition("-")
+        stream = int(stream)
+        return int(seq), stream, int(row_id) if stream == TOMBSTONES else UUID(row_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid sync token"
+        )
+
+
+def after_cursor(stream: int, seq_column, id_column, since, cursor_stream, cursor_id):
+    """Rows of `stream` that come after the token."""
+    if cursor_stream is None or stream > cursor_stream:
+        return seq_column >= since
+    if stream < cursor_stream:
+        return seq_column > since
+    return tuple_(seq_column, id_column) > tuple_(since, cursor_id)
+
+
+@router.get("", response_model=SyncResponse)
+def sync_changes(
+    db: Session = Depends(get_db),
+    since: str = Query("0", description="Token from the previous sync, 0 downloads everything"),
+    course_id: Optional[UUID] = Query(None, description="Only this course and its notes"),
+    limit: int = Query(500, ge=1, le=5000, description="Max changes per page")
+):
+    """Notes and courses created, updated or deleted since a sync token (Public access)."""
+    
+    since, cursor_stream, cursor_id = parse_token(since)
+    
+    # tombstones older than the horizon were pruned, this client could miss deletes
+    if since and since <= tombstone_horizon(db):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Sync token expired, sync again from since=0"
+        )
+    
+    upper = sync_upper_bound(db)
+    
+    courses = db.query(Course).filter(
+        after_cursor(COURSES, Course.change_seq, Course.id, since, cursor_stream, cursor_id),
+        Course.change_seq < upper
+    )
+    notes = db.query(Note).filter(
+        after_cursor(NOTES, Note.change_seq, Note.id, since, cursor_stream, cursor_id),
+        Note.change_seq < upper
+    )
+    tombstones = db.query(SyncTombstone).filter(
+        after_cursor(TOMBSTONES, SyncTombstone.change_seq, SyncTombstone.id, since, cursor_stream, cursor_id),
+        SyncTombstone.change_seq < upper
+    )
+    
+    if course_id:
+        courses = courses.filter(Course.id == course_id)
+        notes = notes.filter(Note.course_id == course_id)
+        tombstones = tombstones.filter(SyncTombstone.course_id == course_id)
+    
+    # limit + 1 of each is enough to fill the page and know whether there is more
+    changes = []
+    for stream, query, model in ((COURSES, courses, Course), (NOTES, notes, Note), (TOMBSTONES, tombstones, SyncTombstone)):
+        rows = query.order_by(model.change_seq, model.id).limit(limit + 1).all()
+        changes.extend((row.change_seq, stream, row.id, row) for row in rows)
+    
+    changes.sort(key=lambda change: change[:3])
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    
+    if has_more:
+        seq, stream, row_id, _ = changes[-1]
+        token = f"{seq}-{stream}-{row_id}"
+    else:
+        # everything below upper has been sent
+        token = str(upper)
+    
+    response = {"token": token, "has_more": has_more, "changes": []}
+    for seq, stream, _, row in changes:
+        if stream == TOMBSTONES:
+            change = {"op": "delete", "type": row.entity, "id": row.entity_id, "course_id": row.course_id}
+        elif stream == NOTES:
+            change = {"op": "upsert", "type": "note", "id": row.id, "course_id": row.course_id, "note": NoteResponse.model_validate(row)}
+        elif row.deleted_at is not None:
+            # soft-deleted courses are gone as far as clients are concerned
+            change = {"op": "delete", "type": "course", "id": row.id, "course_id": row.id}
+        else:
+            change = {"op": "upsert", "type": "course", "id": row.id, "course_id": row.id, "course": CourseResponse.model_validate(row)}
+        response["changes"].append({"seq": seq, **change})
+    
+    return response
\ No newline at end of file
@@ -1,31 +1,70 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 import os
 from dotenv import load_dotenv
 
+from app.utils.tracing import span, instrument_engine
+
 #loading env variables form .env
 load_dotenv()
 
-#Db url from .env
+#Db url from .env (postgres in production, sqlite:// works for tests and local benchmarks)
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-# Render uses postgres:// but SQLAlchemy needs postgresql://
-if DATABASE_URL and DATABASE_URL.startswith("postgres://"):
-    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # off by default on SQLite, and the ON DELETE CASCADEs depend on it
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def create_db_engine(url: str):
+    """Engine for postgres, or for a SQLite file / in-memory database."""
+    # Render uses postgres:// but SQLAlchemy needs postgresql://
+    if url and url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+
+    if url and url.startswith("sqlite"):
+        options = {"connect_args": {"check_same_thread": False}}
+        # an in-memory database only lives as long as its connection, so everyone shares one
+        if url in ("sqlite://", "sqlite:///:memory:"):
+            options["poolclass"] = StaticPool
+        sqlite_engine = create_engine(url, **options)
+        event.listen(sqlite_engine, "connect", _sqlite_pragmas)
+        return sqlite_engine
+
+    return create_engine(url)
+
 
 #creating db engine
-engine = create_engine(DATABASE_URL)
+engine = create_db_engine(DATABASE_URL)
+# SQL spans and the slow query log
+instrument_engine(engine)
 
 #creating session
-SessionLocal = sessionmaker(autocommit = False, autoflush= False, bind= engine)
+# expire_on_commit=False: rows returned by a write stay usable after commit without another SELECT
+SessionLocal = sessionmaker(autocommit = False, autoflush= False, expire_on_commit=False, bind= engine)
 
 #base class for model
 Base = declarative_base()
 
+
+def upsert(table):
+    """INSERT with on_conflict_do_update()/on_conflict_do_nothing() for whichever database we're on."""
+    if engine.dialect.name == "sqlite":
+        return sqlite_insert(table)
+    return pg_insert(table)
+
+
 #func to get db session for fastapi
 def get_db():
-    db = SessionLocal()
+    with span("get_db"):
+        db = SessionLocal()
     try:
         yield db
     finally:
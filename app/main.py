@@ -1,16 +1,118 @@
+import time
+
+# Taken before the heavy imports so the startup report includes them
+IMPORT_STARTED = time.perf_counter()
+
+from contextlib import asynccontextmanager
+import logging
 from fastapi import FastAPI, Request
-from app.api import auth, course, note
+from app.api import admin, auth, course, note, sync
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse
+from app.database import engine
+from app.utils.warmup import warm_db_pool, warm_templates, warm_auth, run_phases
+from app.utils.cache import start_broadcaster, stop_broadcaster
+from app.utils.trending import TrendingRefresher, TRENDING_REFRESH_SECONDS
+from app.utils.analytics import AnalyticsFlusher, event_buffer
+from app.utils.pages import prerender_pages, static_page, course_page, page_response
+from app.utils.admission import AdmissionControlMiddleware, configure_threadpool, THREADPOOL_SIZE
+from app.utils.similarity import SimilarityRefresher, SIMILARITY_REFRESH_SECONDS
+from app.utils.idempotency import IdempotencyMiddleware, IdempotencyPruner, IDEMPOTENCY_PRUNE_SECONDS
+from app.utils.profiler import ProfileRequestMiddleware, PROFILE_TOKEN
+from app.utils.capture import TrafficCaptureMiddleware, CaptureWriter, CAPTURE_FILE
+from app.utils.tracing import TracingMiddleware, TraceExporter, instrument_fastapi, TRACE_EXPORT
+
+# uvicorn already has a handler on this logger so the report shows up in Render logs
+logger = logging.getLogger("uvicorn.error")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm everything the first request would otherwise pay for."""
+    import_ms = (time.perf_counter() - IMPORT_STARTED) * 1000
+
+    timings = run_phases([
+        ("db_pool", warm_db_pool),
+        ("templates", lambda: warm_templates(templates)),
+        ("pages", lambda: prerender_pages(templates)),
+        ("auth", warm_auth),
+    ], logger)
+
+    total_ms = (time.perf_counter() - IMPORT_STARTED) * 1000
+    breakdown = ", ".join(f"{name}={ms:.1f}ms" for name, ms in timings.items())
+    logger.info("Startup timing: imports=%.1fms, %s, total=%.1fms", import_ms, breakdown, total_ms)
+
+    # every sync route and dependency runs on this pool
+    configure_threadpool(THREADPOOL_SIZE)
+
+    # keep this worker's cache in sync with writes made by the other workers
+    start_broadcaster()
+
+    # the refreshers are written in postgres SQL, a SQLite run (tests, benchmarks) goes without
+    postgres = engine.dialect.name == "postgresql"
+
+    trending_refresher = TrendingRefresher()
+    if TRENDING_REFRESH_SECONDS > 0 and postgres:
+        trending_refresher.start()
+
+    analytics_flusher = AnalyticsFlusher(event_buffer)
+    analytics_flusher.start()
+
+    similarity_refresher = SimilarityRefresher()
+    if SIMILARITY_REFRESH_SECONDS > 0 and postgres:
+        similarity_refresher.start()
+
+    idempotency_pruner = IdempotencyPruner()
+    if IDEMPOTENCY_PRUNE_SECONDS > 0:
+        idempotency_pruner.start()
+
+    trace_exporter = TraceExporter()
+    if TRACE_EXPORT:
+        trace_exporter.start()
+
+    capture_writer = CaptureWriter()
+    if CAPTURE_FILE:
+        capture_writer.start()
+
+    yield
+
+    if CAPTURE_FILE:
+        capture_writer.stop()
+    trace_exporter.stop()
+    idempotency_pruner.stop()
+    similarity_refresher.stop()
+    analytics_flusher.stop()
+    trending_refresher.stop()
+    stop_broadcaster()
+
 
 app = FastAPI(
     title="Study Snipps API",
     description="API for sharing university course notes",
     version="1.0.0",
+    lifespan=lifespan,
     #docs_url=None #use /docs to get apidocs
 )
 
+# Opt-in per-request profiling, left out entirely unless PROFILE_TOKEN is set
+if PROFILE_TOKEN:
+    app.add_middleware(ProfileRequestMiddleware)
+
+# Retried writes with an Idempotency-Key get the first response back instead of running twice
+app.add_middleware(IdempotencyMiddleware)
+
+# Shed load with a 503 before requests pile up in the thread pool
+app.add_middleware(AdmissionControlMiddleware)
+
+# Sampled request log for scripts/replay_traffic.py, left out unless CAPTURE_FILE is set
+if CAPTURE_FILE:
+    app.add_middleware(TrafficCaptureMiddleware)
+
+# Trace id, spans and the slow log for every request (outermost, so time spent queueing counts too)
+instrument_fastapi()
+app.add_middleware(TracingMiddleware)
+
 # Mount static files (CSS, JS)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -21,6 +123,8 @@ templates = Jinja2Templates(directory="templates")
 app.include_router(auth.router, prefix="/api/auth")
 app.include_router(course.router, prefix="/api/course")
 app.include_router(note.router, prefix="/api/note")
+app.include_router(admin.router, prefix="/api/admin")
+app.include_router(sync.router, prefix="/api/sync")
 
 @app.get("/api")
 def api_root():
@@ -31,24 +135,24 @@ def api_root():
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     """Home page"""
-    return templates.TemplateResponse("index.html", {"request": request})
+    return page_response(request, static_page(templates, "index.html"))
 
 @app.get("/course", response_class=HTMLResponse)
 async def courses_page(request: Request):
     """All courses page"""
-    return templates.TemplateResponse("courses.html", {"request": request})
+    return page_response(request, static_page(templates, "courses.html"))
 
 @app.get("/course/{course_id}", response_class=HTMLResponse)
 async def course_detail(request: Request, course_id: str):
     """Single course detail page"""
-    return templates.TemplateResponse("course_detail.html", {"request": request, "course_id": course_id})
+    return page_response(request, course_page(templates, course_id))
 
 @app.get("/upload", response_class=HTMLResponse)
 async def upload_page(request: Request):
     """Upload note page"""
-    return templates.TemplateResponse("upload.html", {"request": request})
+    return page_response(request, static_page(templates, "upload.html"))
 
 @app.get("/auth", response_class=HTMLResponse)
 async def auth_page(request: Request):
     """Login/Signup page"""
-    return templates.TemplateResponse("auth.html", {"request": request})
\ No newline at end of file
+    return page_response(request, static_page(templates, "auth.html"))
\ No newline at end of file
@@ -1,3 +1,15 @@
 from app.models.user import User
 from app.models.course import Course
-from app.models.note import Note
\ No newline at end of file
+from app.models.note import Note
+from app.models.facet import CourseFacet
+from app.models.activity import NoteActivityDaily
+from app.models.trending import NoteTrending
+from app.models.event import NoteEvent
+from app.models.fingerprint import NoteFingerprint
+from app.models.archive import NoteArchive
+from app.models.content import NoteContent
+from app.models.similarity import NoteSimilarity
+from app.models.sync import SyncTombstone
+from app.models.sync_state import SyncState
+from app.models.idempotency import IdempotencyKey
+from app.models.location import NoteLocation
\ No newline at end of file
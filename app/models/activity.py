@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Date, DateTime, ForeignKeyConstraint, Integer
+from app.models.types import GUID
+from datetime import datetime, timezone
+from app.database import Base
+
+class NoteActivityDaily(Base):
+    __tablename__ = "note_activity_daily"
+    __table_args__ = (
+        # notes is partitioned, so its key is (id, course_id)
+        ForeignKeyConstraint(["note_id", "course_id"], ["notes.id", "notes.course_id"], ondelete="CASCADE"),
+    )
+
+    # One row per note per day
+    note_id = Column(GUID(), primary_key=True)
+    day = Column(Date, primary_key=True)
+    course_id = Column(GUID(), nullable=False)
+
+    #activity counters
+    views = Column(Integer, default=0, server_default='0', nullable=False)
+    downloads = Column(Integer, default=0, server_default='0', nullable=False)
+    votes = Column(Integer, default=0, server_default='0', nullable=False)
+
+    #lets the trending pass find rows that changed since it last ran
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc), nullable=False, index=True)
\ No newline at end of file
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
+from app.models.types import GUID, JSONDocument
+from datetime import datetime, timezone
+from app.database import Base
+
+class NoteArchive(Base):
+    __tablename__ = "notes_archive"
+    __table_args__ = (
+        # include_archived course listing and restoring a course's notes
+        Index("ix_notes_archive_course_id_created_at", "course_id", "created_at"),
+    )
+
+    # Same columns as notes - rows move between the two tables unchanged
+    id = Column(GUID(), primary_key=True)
+    title = Column(String, nullable=False)
+    description = Column(String, nullable=True)
+    file_url = Column(String, nullable=False)
+    file_type = Column(String, nullable=False)
+    course_id = Column(GUID(), ForeignKey("courses.id", ondelete="CASCADE"), nullable=False)
+    uploaded_by = Column(GUID(), ForeignKey("users.id"), nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=True)
+
+    archived_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    #the note's note_activity_daily rows, put back on restore
+    activity = Column(JSONDocument, nullable=True)
\ No newline at end of file
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, String, DateTime, Integer, Text, Computed, ForeignKeyConstraint, Index
+from app.models.types import GUID, TSVector
+from datetime import datetime, timezone
+from app.database import Base
+
+class NoteContent(Base):
+    __tablename__ = "note_contents"
+    __table_args__ = (
+        # notes is partitioned, so its key is (id, course_id)
+        ForeignKeyConstraint(["note_id", "course_id"], ["notes.id", "notes.course_id"], ondelete="CASCADE"),
+        Index("ix_note_contents_search", "search", postgresql_using="gin"),
+    )
+
+    note_id = Column(GUID(), primary_key=True)
+    course_id = Column(GUID(), nullable=False)
+
+    #copied from the note so a title match ranks above a match in the body
+    title = Column(String, nullable=False)
+    #extracted text, capped at INDEXER_MAX_CHARS
+    content = Column(Text, nullable=False, default="", server_default="")
+
+    #maintained by postgres, never written by us
+    search = Column(TSVector, Computed(
+        "setweight(to_tsvector('english', title), 'A') || setweight(to_tsvector('english', content), 'B')",
+        persisted=True
+    ))
+
+    #the note's updated_at when it was indexed - newer means reindex
+    source_updated_at = Column(DateTime, nullable=False)
+    indexed_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    pages = Column(Integer, default=0, server_default='0', nullable=False)
+    #why extraction failed, the title is still searchable
+    error = Column(String, nullable=True)
\ No newline at end of file
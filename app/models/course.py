@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, BigInteger, Boolean, FetchedValue
+from app.models.types import GUID
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 import uuid
@@ -9,20 +9,36 @@ class Course(Base):
     __tablename__ = "courses"
 
     # Primary key
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
 
     #course fields
     course_code = Column(String, unique=True, nullable=False, index=True)
     course_name = Column(String, nullable=False)
     department = Column(String, nullable=False)
+    # lowercased/whitespace-collapsed department so filtering is an indexed equality match
+    department_key = Column(String, nullable=False, index=True)
     
     #Foreign key
-    created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    created_by = Column(GUID(), ForeignKey("users.id"), nullable=False)
 
     #Timestamps for creation/updation
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable= False)
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
+    #Maintained by a db trigger on notes, feeds the facet counts
+    note_count = Column(Integer, default=0, server_default='0', nullable=False)
+
+    #Inactive courses get their old notes moved to notes_archive
+    is_active = Column(Boolean, default=True, server_default='true', nullable=False)
+
+    #Id of the last transaction that changed a synced field, stamped by a db trigger (see /api/sync)
+    #the 0 default only sticks where that trigger doesn't exist (SQLite test runs)
+    change_seq = Column(BigInteger, server_default="0", server_onupdate=FetchedValue(), nullable=False, index=True)
+
+    #Soft delete - set while the background purge removes the notes
+    deleted_at = Column(DateTime, nullable=True)
+
     #Relationships
     creator = relationship("User", backref="courses")
-    notes = relationship("Note", back_populates="course", cascade="all, delete-orphan")
\ No newline at end of file
+    # passive_deletes lets the db cascade handle notes instead of loading them all
+    notes = relationship("Note", back_populates="course", cascade="all, delete-orphan", passive_deletes=True)
\ No newline at end of file
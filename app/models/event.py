@@ -0,0 +1,17 @@
+from sqlalchemy import Column, SmallInteger, DateTime, Index
+from app.models.types import GUID, BigIntId
+from app.database import Base
+
+class NoteEvent(Base):
+    __tablename__ = "note_events"
+    __table_args__ = (
+        # append-only and written in time order, so a tiny BRIN index is enough
+        Index("ix_note_events_occurred_at", "occurred_at", postgresql_using="brin"),
+    )
+
+    id = Column(BigIntId, primary_key=True, autoincrement=True)
+
+    # no FK on purpose - events outlive deleted notes and inserts stay cheap
+    note_id = Column(GUID(), nullable=False)
+    kind = Column(SmallInteger, nullable=False)  # see app.utils.analytics.EVENT_KINDS
+    occurred_at = Column(DateTime, nullable=False)
\ No newline at end of file
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, Integer
+from app.database import Base
+
+class CourseFacet(Base):
+    __tablename__ = "course_facets"
+
+    # facet is "department" or "university", value is the normalized key
+    facet = Column(String, primary_key=True)
+    value = Column(String, primary_key=True)
+
+    #label shown to users (first spelling we saw)
+    label = Column(String, nullable=False)
+
+    #counts, kept up to date by db triggers on courses and notes
+    course_count = Column(Integer, default=0, server_default='0', nullable=False)
+    note_count = Column(Integer, default=0, server_default='0', nullable=False)
\ No newline at end of file
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, ForeignKeyConstraint, Index
+from app.models.types import GUID
+from app.database import Base
+
+class NoteFingerprint(Base):
+    __tablename__ = "note_fingerprints"
+    __table_args__ = (
+        # notes is partitioned, so its key is (id, course_id)
+        ForeignKeyConstraint(["note_id", "course_id"], ["notes.id", "notes.course_id"], ondelete="CASCADE"),
+        # duplicate check on upload: WHERE course_id = ? AND value IN (...)
+        Index("ix_note_fingerprints_course_id_value", "course_id", "value"),
+    )
+
+    note_id = Column(GUID(), primary_key=True)
+    # "url:<hash>" for the canonical link, "t<band>:<hash>" for each MinHash band of the title
+    value = Column(String, primary_key=True)
+
+    #copied from the note so the lookup never touches the notes table
+    course_id = Column(GUID(), nullable=False)
\ No newline at end of file
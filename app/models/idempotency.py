@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, SmallInteger, LargeBinary, DateTime
+from app.database import Base
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    # sha256 of (user, method, path, Idempotency-Key) - 32 bytes whatever the client sends
+    key = Column(LargeBinary(32), primary_key=True)
+    # sha256 of the query string and body, a reused key with a different request is rejected
+    request_hash = Column(LargeBinary(32), nullable=False)
+
+    # all null while the first request is still running
+    status_code = Column(SmallInteger)
+    content_type = Column(String)
+    body = Column(LargeBinary)  # zlib compressed
+
+    created_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
\ No newline at end of file
@@ -0,0 +1,43 @@
+from sqlalchemy import Column, ForeignKeyConstraint, DDL, event
+from app.models.types import GUID
+from app.database import Base
+
+class NoteLocation(Base):
+    """Which course (and so which partition) a note id lives in.
+
+    notes is partitioned on course_id, so its key is (id, course_id): a lookup by id alone
+    probes every partition and the database can't keep ids unique. This table fixes both,
+    its primary key makes note ids globally unique and single-note routes read course_id
+    from it so only one partition is touched. Rows are added by a trigger on notes and go
+    away with them through the cascade.
+    """
+    __tablename__ = "note_locations"
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["note_id", "course_id"], ["notes.id", "notes.course_id"],
+            ondelete="CASCADE", onupdate="CASCADE"
+        ),
+    )
+
+    note_id = Column(GUID(), primary_key=True)
+    course_id = Column(GUID(), nullable=False)
+
+
+# create_all() needs the trigger too (the migration makes the same one)
+event.listen(NoteLocation.__table__, "after_create", DDL("""
+    CREATE OR REPLACE FUNCTION record_note_location() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO note_locations (note_id, course_id) VALUES (NEW.id, NEW.course_id);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+""").execute_if(dialect="postgresql"))
+event.listen(NoteLocation.__table__, "after_create", DDL(
+    "CREATE TRIGGER notes_location AFTER INSERT ON notes FOR EACH ROW EXECUTE FUNCTION record_note_location()"
+).execute_if(dialect="postgresql"))
+event.listen(NoteLocation.__table__, "after_create", DDL("""
+    CREATE TRIGGER notes_location AFTER INSERT ON notes
+    BEGIN
+        INSERT INTO note_locations (note_id, course_id) VALUES (NEW.id, NEW.course_id);
+    END
+""").execute_if(dialect="sqlite"))
\ No newline at end of file
@@ -1,15 +1,32 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Integer
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, BigInteger, Index, DDL, FetchedValue, event
+from app.models.types import GUID
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 import uuid
 from app.database import Base
 
+# Hash partitions of notes on course_id (must match the partitioning migration)
+NOTES_PARTITIONS = 8
+
 class Note(Base):
     __tablename__ = "notes"
+    __table_args__ = (
+        # course page listing: WHERE course_id = ? ORDER BY created_at DESC
+        Index("ix_notes_course_id_created_at", "course_id", "created_at"),
+        # delta sync, globally and per course
+        Index("ix_notes_change_seq", "change_seq"),
+        Index("ix_notes_course_id_change_seq", "course_id", "change_seq"),
+        # "my notes" dashboard: WHERE uploaded_by = ? ORDER BY created_at DESC, id DESC, index-only
+        Index(
+            "ix_notes_uploaded_by_created_at", "uploaded_by", "created_at", "id",
+            postgresql_include=["course_id", "title", "file_type"]
+        ),
+        # course-scoped queries only touch one partition
+        {"postgresql_partition_by": "HASH (course_id)"},
+    )
 
     # Primary key
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
 
     #note fields
     title = Column(String, nullable=False)
@@ -21,13 +38,28 @@ class Note(Base):
     #upvotes_count = Column(Integer, default=0, server_default='0', nullable=False)
 
     #Foreign key
-    course_id = Column(UUID(as_uuid=True), ForeignKey("courses.id"), nullable=False)
-    uploaded_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    # part of the primary key because postgres needs the partition key in every unique constraint.
+    # That makes a lookup by id alone probe every partition and leaves id unique only per course,
+    # note_locations (see app/models/location.py) gives back both
+    course_id = Column(GUID(), ForeignKey("courses.id", ondelete="CASCADE"), primary_key=True)
+    uploaded_by = Column(GUID(), ForeignKey("users.id"), nullable=False)
 
     #Timestamps for creation/updation
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable= False)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable= False, index=True)
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
+    #Id of the last transaction that wrote the row, stamped by a db trigger (see /api/sync)
+    #the 0 default only sticks where that trigger doesn't exist (SQLite test runs)
+    change_seq = Column(BigInteger, server_default="0", server_onupdate=FetchedValue(), nullable=False)
+
     #Relationships
     uploader = relationship("User", backref="uploaded_notes")
-    course = relationship("Course", back_populates="notes")
\ No newline at end of file
+    course = relationship("Course", back_populates="notes")
+
+
+# create_all() makes the partitioned parent, the partitions have to be added by hand
+for remainder in range(NOTES_PARTITIONS):
+    event.listen(Note.__table__, "after_create", DDL(
+        f"CREATE TABLE notes_p{remainder} PARTITION OF notes "
+        f"FOR VALUES WITH (MODULUS {NOTES_PARTITIONS}, REMAINDER {remainder})"
+    ).execute_if(dialect="postgresql"))
\ No newline at end of file
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, DateTime, Float, SmallInteger, ForeignKeyConstraint, Index
+from app.models.types import GUID
+from app.database import Base
+
+class NoteSimilarity(Base):
+    __tablename__ = "note_similarities"
+    __table_args__ = (
+        # notes is partitioned, so its key is (id, course_id)
+        ForeignKeyConstraint(["note_id", "course_id"], ["notes.id", "notes.course_id"], ondelete="CASCADE"),
+        ForeignKeyConstraint(["similar_note_id", "similar_course_id"], ["notes.id", "notes.course_id"], ondelete="CASCADE"),
+        # deleting a note cascades through here, and the incremental pass looks up who points at what
+        Index("ix_note_similarities_similar_note_id", "similar_note_id", "similar_course_id"),
+    )
+
+    # Top-k neighbours per note: the endpoint is a primary key range read
+    note_id = Column(GUID(), primary_key=True)
+    rank = Column(SmallInteger, primary_key=True)
+    course_id = Column(GUID(), nullable=False)
+
+    similar_note_id = Column(GUID(), nullable=False)
+    similar_course_id = Column(GUID(), nullable=False)
+
+    #cosine similarity of the TF-IDF vectors
+    score = Column(Float, nullable=False)
+    computed_at = Column(DateTime, nullable=False, index=True)
\ No newline at end of file
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, DateTime, BigInteger, Identity, Index
+from app.models.types import GUID, BigIntId
+from app.database import Base
+
+class SyncTombstone(Base):
+    __tablename__ = "sync_tombstones"
+    __table_args__ = (
+        Index("ix_sync_tombstones_course_id_change_seq", "course_id", "change_seq"),
+    )
+
+    # Written by a db trigger whenever a note or course row is deleted
+    id = Column(BigIntId, Identity(), primary_key=True)
+    entity = Column(String, nullable=False)  # "note" or "course"
+    entity_id = Column(GUID(), nullable=False)
+    course_id = Column(GUID(), nullable=False)
+
+    change_seq = Column(BigInteger, nullable=False, index=True)
+    #pruned after SYNC_TOMBSTONE_RETENTION_DAYS
+    deleted_at = Column(DateTime, nullable=False, index=True)
@@ -0,0 +1,9 @@
+from sqlalchemy import Column, String, BigInteger
+from app.database import Base
+
+class SyncState(Base):
+    __tablename__ = "sync_state"
+
+    # Small key/value store for sync bookkeeping, e.g. how far tombstones were pruned
+    key = Column(String, primary_key=True)
+    value = Column(BigInteger, nullable=False)
\ No newline at end of file
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, DateTime, Float, ForeignKeyConstraint, Index
+from app.models.types import GUID
+from app.database import Base
+
+class NoteTrending(Base):
+    __tablename__ = "note_trending"
+    __table_args__ = (
+        # notes is partitioned, so its key is (id, course_id)
+        ForeignKeyConstraint(["note_id", "course_id"], ["notes.id", "notes.course_id"], ondelete="CASCADE"),
+        # both include note_id so the ranking itself is read with an index-only scan
+        Index("ix_note_trending_course_id_score", "course_id", "score", "note_id"),
+        Index("ix_note_trending_score", "score", "note_id"),
+    )
+
+    note_id = Column(GUID(), primary_key=True)
+    course_id = Column(GUID(), nullable=False)
+
+    # log of the time-decayed activity, scaled to a fixed epoch so old rows never need rescoring
+    score = Column(Float, nullable=False)
+    scored_at = Column(DateTime, nullable=False)
\ No newline at end of file
@@ -0,0 +1,46 @@
+from sqlalchemy import BigInteger, CHAR, Computed, Integer, JSON, Text
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.types import TypeDecorator
+import uuid
+
+# Column types that are native on postgres and still work on SQLite (tests, local benchmarks)
+
+
+class GUID(TypeDecorator):
+    """uuid.UUID in Python: native UUID on postgres, 32 hex chars on SQLite."""
+
+    impl = CHAR
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(UUID(as_uuid=True))
+        return dialect.type_descriptor(CHAR(32))
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if not isinstance(value, uuid.UUID):
+            value = uuid.UUID(str(value))
+        return value if dialect.name == "postgresql" else value.hex
+
+    def process_result_value(self, value, dialect):
+        if value is None or isinstance(value, uuid.UUID):
+            return value
+        return uuid.UUID(value)
+
+
+JSONDocument = JSON().with_variant(JSONB(), "postgresql")
+
+# only INTEGER PRIMARY KEY auto-increments on SQLite
+BigIntId = BigInteger().with_variant(Integer(), "sqlite")
+
+TSVector = TSVECTOR().with_variant(Text(), "sqlite")
+
+
+@compiles(Computed, "sqlite")
+def _computed_on_sqlite(element, compiler, **kw):
+    # our generated columns (the search tsvector) are postgres expressions,
+    # on SQLite they're left as plain nullable columns
+    return ""
\ No newline at end of file
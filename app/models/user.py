@@ -1,5 +1,5 @@
 from sqlalchemy import Column, String, DateTime, Boolean
-from sqlalchemy.dialects.postgresql import UUID
+from app.models.types import GUID
 from datetime import datetime, timezone
 import uuid
 from app.database import Base
@@ -8,7 +8,7 @@ class User(Base):
     __tablename__ = "users"
 
     # Primary key
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
 
     #user fields
     email = Column(String, unique=True, nullable=False, index=True)
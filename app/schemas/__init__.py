@@ -1,3 +1,5 @@
 from app.schemas.user import UserCreate, UserLogin, UserResponse, Token, TokenData
-from app.schemas.course import CourseCreate, CourseUpdate, CourseResponse
-from app.schemas.note import NoteCreate, NoteUpdate, NoteResponse, NoteWithUploader
\ No newline at end of file
+from app.schemas.course import CourseCreate, CourseUpdate, CourseResponse, FacetCount, CourseFacets
+from app.schemas.note import NoteCreate, NoteUpdate, NoteResponse, NoteWithUploader, DuplicateNote, NoteUploadResponse, NoteSearchResult, SimilarNote
+from app.schemas.analytics import NoteActivityResponse, IngestionStats
+from app.schemas.sync import SyncChange, SyncResponse
\ No newline at end of file
@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from datetime import date
+from uuid import UUID
+
+# Schema for one day of activity on a note
+class NoteActivityResponse(BaseModel):
+    note_id: UUID
+    course_id: UUID
+    day: date
+    views: int
+    downloads: int
+    votes: int
+
+    class Config:
+        from_attributes = True
+
+# Schema for the request-path ingestion stats of this worker
+class IngestionStats(BaseModel):
+    recorded: int
+    buffered: int
+    dropped: int
+    flushed: int
+    failed: int
+    avg_record_us: float
+    max_record_us: float
+    last_flush_ms: float
\ No newline at end of file
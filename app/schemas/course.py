@@ -1,7 +1,7 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
 from uuid import UUID
-from typing import Optional
+from typing import Optional, List
 
 # Base schema - shared fields
 class CourseBase(BaseModel):
@@ -19,14 +19,31 @@ class CourseUpdate(BaseModel):
     course_code: Optional[str] = Field(None, min_length=3, max_length=20)
     course_name: Optional[str] = Field(None, min_length=3, max_length=200)
     department: Optional[str] = Field(None, min_length=2, max_length=100)
+    is_active: Optional[bool] = None  # reactivating restores archived notes
 
 
 # Schema for returning course data
 class CourseResponse(CourseBase):
     id: UUID
     created_by: UUID
+    is_active: bool
     created_at: datetime
     updated_at: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Schema for one facet bucket (a department or university)
+class FacetCount(BaseModel):
+    value: str   # normalized key, pass this back as the department filter
+    label: str
+    course_count: int
+    note_count: int
+
+    class Config:
+        from_attributes = True
+
+# Schema for the course browsing facets
+class CourseFacets(BaseModel):
+    departments: List[FacetCount]
+    universities: Optional[List[FacetCount]] = None
\ No newline at end of file
@@ -1,13 +1,13 @@
 from pydantic import BaseModel, Field, HttpUrl
 from datetime import datetime
 from uuid import UUID
-from typing import Optional
+from typing import Optional, List
 
 # Base schema - shared fields
 class NoteBase(BaseModel):
     title: str = Field(..., min_length=3, max_length=200)
     description: Optional[str] = Field(None, max_length=1000)
-    file_url: str  # URL to uploaded file (Cloudinary/S3)
+    file_url: str = Field(..., max_length=2048, pattern="^[Hh][Tt][Tt][Pp][Ss]?://")  # URL to uploaded file (Cloudinary/S3)
     file_type: str = Field(..., pattern="^(pdf|image|png|jpg|jpeg)$")
     course_id: UUID
 
@@ -19,7 +19,7 @@ class NoteCreate(NoteBase):
 class NoteUpdate(BaseModel):
     title: Optional[str] = Field(None, min_length=3, max_length=200)
     description: Optional[str] = Field(None, max_length=1000)
-    file_url: Optional[str] = None
+    file_url: Optional[str] = Field(None, max_length=2048, pattern="^[Hh][Tt][Tt][Pp][Ss]?://")
     file_type: Optional[str] = Field(None, pattern="^(pdf|image|png|jpg|jpeg)$")
 
 # Schema for returning note data
@@ -36,4 +36,58 @@ class NoteResponse(NoteBase):
 # Schema for note with uploader info
 class NoteWithUploader(NoteResponse):
     uploader_name: str  # First + Last name of uploader
-    uploader_email: str
\ No newline at end of file
+    uploader_email: str
+
+# Schema for an existing note that looks like the one being uploaded
+class DuplicateNote(BaseModel):
+    id: UUID
+    title: str
+    file_url: str
+    created_at: datetime
+    match: str  # "url" (same link) or "title" (near-identical title)
+    similarity: float
+
+# Schema for the upload response, with any likely duplicates in the course
+class NoteUploadResponse(NoteResponse):
+    possible_duplicates: List[DuplicateNote] = []
+
+# Schema for a full-text search hit
+class NoteSearchResult(BaseModel):
+    id: UUID
+    title: str
+    course_id: UUID
+    file_url: str
+    file_type: str
+    created_at: datetime
+    rank: float
+    snippet: str  # HTML-escaped text with matches wrapped in <mark>
+
+# Schema for a related note in another course
+class SimilarNote(BaseModel):
+    id: UUID
+    title: str
+    file_type: str
+    course_id: UUID
+    course_code: str
+    course_name: str
+    score: float
+
+# Schema for one of the current user's uploads on their dashboard
+class MyNote(BaseModel):
+    id: UUID
+    title: str
+    file_type: str
+    created_at: datetime
+
+# Schema for a course on the dashboard, note_count covers all of the user's notes in it
+class MyCourseNotes(BaseModel):
+    course_id: UUID
+    course_code: str
+    course_name: str
+    note_count: int
+    notes: List[MyNote]
+
+# Schema for a page of the dashboard, newest notes first
+class MyNotesResponse(BaseModel):
+    courses: List[MyCourseNotes]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next page
\ No newline at end of file
@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from uuid import UUID
+from typing import List, Optional
+
+from app.schemas.course import CourseResponse
+from app.schemas.note import NoteResponse
+
+# Schema for one change, in the order it was committed
+class SyncChange(BaseModel):
+    seq: int  # change_seq of the write, changes to the same row come back in seq order
+    op: str  # "upsert" or "delete" (soft-deleted courses are deletes)
+    type: str  # "note" or "course"
+    id: UUID
+    course_id: UUID
+    course: Optional[CourseResponse] = None  # set for course upserts
+    note: Optional[NoteResponse] = None  # set for note upserts
+
+# Schema for one page of changes
+class SyncResponse(BaseModel):
+    token: str  # pass back as ?since= next time
+    has_more: bool  # call again straight away with the new token
+    changes: List[SyncChange]  # apply in order
\ No newline at end of file
@@ -0,0 +1,153 @@
+from starlette.responses import JSONResponse
+import anyio
+import asyncio
+import os
+import time
+
+# Concurrency limits per route class (requests allowed in the handler at once)
+ADMISSION_AUTH_LIMIT = int(os.getenv("ADMISSION_AUTH_LIMIT", 4))      # argon2 is CPU bound
+ADMISSION_READ_LIMIT = int(os.getenv("ADMISSION_READ_LIMIT", 24))
+ADMISSION_WRITE_LIMIT = int(os.getenv("ADMISSION_WRITE_LIMIT", 8))
+# How long a request may wait for a slot before we give up on it
+ADMISSION_QUEUE_TIMEOUT_MS = int(os.getenv("ADMISSION_QUEUE_TIMEOUT_MS", 2000))
+ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", 2))
+
+# Worker threads shared by every sync handler and dependency (starlette default is 40)
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", 40))
+
+AUTH_PATHS = {"/api/auth/login", "/api/auth/register"}
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def classify(method: str, path: str):
+    """Which limit applies to a request, or None for pages/static/health that are never queued."""
+    if path in AUTH_PATHS:
+        return "auth"
+    if not path.startswith("/api/"):
+        return None
+    return "read" if method in READ_METHODS else "write"
+
+
+class RouteClass:
+    """A concurrency limit with a bounded wait, plus the numbers behind it."""
+
+    def __init__(self, name: str, limit: int, queue_timeout_ms: int = ADMISSION_QUEUE_TIMEOUT_MS):
+        self.name = name
+        self.limit = limit
+        self.queue_timeout = queue_timeout_ms / 1000
+        self.semaphore = asyncio.Semaphore(limit)
+
+        self.waiting = 0
+        self.in_flight = 0
+        self.max_waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.queued = 0
+        self.queue_ms_total = 0.0
+
+    async def acquire(self) -> bool:
+        # fast path: a free slot means no timer and no queueing
+        if not self.semaphore.locked():
+            await self.semaphore.acquire()
+            self.admitted += 1
+            return True
+
+        self.waiting += 1
+        self.queued += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            return False
+        finally:
+            self.waiting -= 1
+            self.queue_ms_total += (time.perf_counter() - started) * 1000
+
+        self.admitted += 1
+        return True
+
+    def release(self):
+        self.semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "max_queue_depth": self.max_waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_queue_ms": round(self.queue_ms_total / self.queued, 2) if self.queued else 0.0,
+        }
+
+
+route_classes = {
+    "auth": RouteClass("auth", ADMISSION_AUTH_LIMIT),
+    "read": RouteClass("read", ADMISSION_READ_LIMIT),
+    "write": RouteClass("write", ADMISSION_WRITE_LIMIT),
+}
+
+
+class AdmissionControlMiddleware:
+    """Caps concurrent requests per route class and sheds load with a 503 instead of queueing forever."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        route_class = route_classes.get(classify(scope["method"], scope["path"]))
+        if route_class is None:
+            return await self.app(scope, receive, send)
+
+        if not await route_class.acquire():
+            response = JSONResponse(
+                {"detail": "Server is busy, please retry shortly"},
+                status_code=503,
+                headers={"Retry-After": str(ADMISSION_RETRY_AFTER_SECONDS)}
+            )
+            return await response(scope, receive, send)
+
+        route_class.in_flight += 1
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                route_class.in_flight -= 1
+                route_class.release()
+
+        # background tasks (course purges, restores) run inside self.app after the response
+        # is sent, so the slot goes back with the last body message rather than when it returns
+        async def releasing_send(message):
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                release()
+
+        try:
+            await self.app(scope, receive, releasing_send)
+        finally:
+            release()
+
+
+def configure_threadpool(size: int = THREADPOOL_SIZE):
+    """Resize the worker thread pool sync handlers run in. Must run inside the event loop."""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = size
+
+
+def admission_stats() -> dict:
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    pool = limiter.statistics()
+    return {
+        "classes": {name: route_class.stats() for name, route_class in route_classes.items()},
+        "threadpool": {
+            "size": pool.total_tokens,
+            "busy": pool.borrowed_tokens,
+            "queue_depth": pool.tasks_waiting,
+        },
+    }
\ No newline at end of file
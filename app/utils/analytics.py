@@ -0,0 +1,203 @@
+from collections import Counter, deque
+from datetime import datetime, timezone
+from sqlalchemy import insert, select
+import io
+import logging
+import os
+import threading
+import time
+
+from app.database import engine, upsert
+from app.models.activity import NoteActivityDaily
+from app.models.event import NoteEvent
+from app.models.location import NoteLocation
+
+logger = logging.getLogger("uvicorn.error")
+
+# Analytics configuration
+ANALYTICS_BUFFER_SIZE = int(os.getenv("ANALYTICS_BUFFER_SIZE", 50000))
+ANALYTICS_FLUSH_SIZE = int(os.getenv("ANALYTICS_FLUSH_SIZE", 1000))
+ANALYTICS_FLUSH_SECONDS = float(os.getenv("ANALYTICS_FLUSH_SECONDS", 5))
+
+# Stored as a smallint in note_events
+EVENT_KINDS = {"view": 1, "download": 2, "vote": 3}
+KIND_COLUMNS = {1: "views", 2: "downloads", 3: "votes"}
+
+
+class EventBuffer:
+    """Fixed-size in-memory ring of events waiting to be written.
+
+    record() is all the request path pays for: a deque append and a counter bump.
+    When the ring is full the oldest events are overwritten rather than blocking.
+    """
+
+    def __init__(self, capacity: int = ANALYTICS_BUFFER_SIZE, flush_size: int = ANALYTICS_FLUSH_SIZE):
+        self.flush_size = flush_size
+        self._events = deque(maxlen=capacity)
+        self.wakeup = threading.Event()
+
+        # ingestion stats
+        self.recorded = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.failed = 0
+        self.record_ns_total = 0
+        self.record_ns_max = 0
+        self.last_flush_ms = 0.0
+
+    def record(self, note_id, kind: str):
+        started = time.perf_counter_ns()
+
+        if len(self._events) == self._events.maxlen:
+            self.dropped += 1
+        self._events.append((note_id, EVENT_KINDS[kind], datetime.now(timezone.utc)))
+        if len(self._events) >= self.flush_size:
+            self.wakeup.set()
+
+        elapsed = time.perf_counter_ns() - started
+        self.recorded += 1
+        self.record_ns_total += elapsed
+        if elapsed > self.record_ns_max:
+            self.record_ns_max = elapsed
+
+    def drain(self):
+        """Take everything currently buffered."""
+        events = []
+        try:
+            while True:
+                events.append(self._events.popleft())
+        except IndexError:
+            return events
+
+    def requeue(self, events) -> int:
+        """Put a failed batch back in front of newer events, as much as fits. Returns how many fit."""
+        room = self._events.maxlen - len(self._events)
+        kept = events[len(events) - room:] if room < len(events) else events
+        # appendleft in reverse keeps the batch in its original order; the oldest are the ones left out
+        self._events.extendleft(reversed(kept))
+        return len(kept)
+
+    def stats(self) -> dict:
+        return {
+            "recorded": self.recorded,
+            "buffered": len(self._events),
+            "dropped": self.dropped,
+            "flushed": self.flushed,
+            "failed": self.failed,
+            "avg_record_us": round(self.record_ns_total / self.recorded / 1000, 3) if self.recorded else 0.0,
+            "max_record_us": round(self.record_ns_max / 1000, 3),
+            "last_flush_ms": round(self.last_flush_ms, 2),
+        }
+
+
+def _copy_events(conn, events):
+    """Bulk-load events with COPY on postgres, a multi-row INSERT elsewhere."""
+    if conn.dialect.name == "postgresql":
+        data = io.StringIO("".join(
+            f"{note_id}\t{kind}\t{occurred_at.isoformat()}\n" for note_id, kind, occurred_at in events
+        ))
+        cursor = conn.connection.driver_connection.cursor()
+        cursor.copy_expert("COPY note_events (note_id, kind, occurred_at) FROM STDIN", data)
+        return
+
+    conn.execute(insert(NoteEvent), [
+        {"note_id": note_id, "kind": kind, "occurred_at": occurred_at}
+        for note_id, kind, occurred_at in events
+    ])
+
+
+def _rollup(conn, events):
+    """Add the batch to the daily per-note counters in one upsert."""
+    counts = Counter((note_id, occurred_at.date(), kind) for note_id, kind, occurred_at in events)
+
+    # notes deleted since the event was recorded would break the FK
+    note_ids = {note_id for note_id, _, _ in counts}
+    existing = dict(conn.execute(select(NoteLocation.note_id, NoteLocation.course_id).where(NoteLocation.note_id.in_(note_ids))).all())
+
+    rows = {}
+    for (note_id, day, kind), count in counts.items():
+        if note_id not in existing:
+            continue
+        row = rows.setdefault((note_id, day), {
+            "note_id": note_id, "course_id": existing[note_id], "day": day, "views": 0, "downloads": 0, "votes": 0
+        })
+        row[KIND_COLUMNS[kind]] += count
+
+    if not rows:
+        return
+
+    # every flusher locks rows in the same order, so two workers with overlapping keys can't deadlock
+    ordered = [rows[key] for key in sorted(rows, key=lambda key: (key[0], existing[key[0]], key[1]))]
+    stmt = upsert(NoteActivityDaily).values(ordered)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["note_id", "day"],
+        set_={
+            "views": NoteActivityDaily.views + stmt.excluded.views,
+            "downloads": NoteActivityDaily.downloads + stmt.excluded.downloads,
+            "votes": NoteActivityDaily.votes + stmt.excluded.votes,
+            "updated_at": datetime.now(timezone.utc),
+        }
+    )
+    conn.execute(stmt)
+
+
+def flush(buffer: "EventBuffer") -> int:
+    """Write out everything buffered. Returns how many events were written."""
+    events = buffer.drain()
+    if not events:
+        return 0
+
+    started = time.perf_counter()
+    try:
+        with engine.begin() as conn:
+            _copy_events(conn, events)
+            _rollup(conn, events)
+    except Exception as exc:
+        # the transaction rolled back, so nothing was written and the batch can be retried next flush
+        requeued = buffer.requeue(events)
+        buffer.failed += len(events) - requeued
+        logger.warning(
+            "Analytics flush of %d events failed, %d kept for the next flush, %d lost: %s",
+            len(events), requeued, len(events) - requeued, exc
+        )
+        return 0
+
+    buffer.flushed += len(events)
+    buffer.last_flush_ms = (time.perf_counter() - started) * 1000
+    return len(events)
+
+
+class AnalyticsFlusher:
+    """Flushes the buffer when it reaches ANALYTICS_FLUSH_SIZE or every ANALYTICS_FLUSH_SECONDS."""
+
+    def __init__(self, buffer: "EventBuffer", interval: float = ANALYTICS_FLUSH_SECONDS):
+        self.buffer = buffer
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="analytics-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.buffer.wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        # whatever came in after the last tick
+        flush(self.buffer)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.buffer.wakeup.wait(self.interval)
+            self.buffer.wakeup.clear()
+            flush(self.buffer)
+
+
+# Shared by the whole worker
+event_buffer = EventBuffer()
+
+
+def record_event(note_id, kind: str):
+    event_buffer.record(note_id, kind)
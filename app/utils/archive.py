@@ -0,0 +1,154 @@
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import delete, insert, select, text, union_all
+from sqlalchemy.orm import aliased
+from uuid import UUID
+import os
+import sys
+import time
+
+from app.database import SessionLocal
+from app.models.activity import NoteActivityDaily
+from app.models.archive import NoteArchive
+from app.models.note import Note
+from app.utils.cache import invalidate
+from app.utils.fingerprint import note_fingerprints, save_fingerprints
+from app.utils.trending import rescore_notes
+
+# Notes of inactive courses older than this move to notes_archive
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", 365))
+# How many notes move per transaction, and the pause between batches
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", 500))
+ARCHIVE_BATCH_PAUSE_MS = int(os.getenv("ARCHIVE_BATCH_PAUSE_MS", 50))
+
+# Shared by notes and notes_archive
+NOTE_COLUMNS = ["id", "title", "description", "file_url", "file_type", "course_id", "uploaded_by", "created_at", "updated_at"]
+
+# One statement per batch: the delete's cascade to activity/trending/fingerprints runs at
+# the end of it, so the activity subquery still sees the rows it is about to lose.
+ARCHIVE_BATCH_SQL = f"""
+WITH batch AS (
+    SELECT n.id, n.course_id
+    FROM notes n JOIN courses c ON c.id = n.course_id
+    WHERE NOT c.is_active AND c.deleted_at IS NULL AND n.created_at < :cutoff
+    LIMIT :batch_size
+    FOR UPDATE OF n SKIP LOCKED
+),
+moved AS (
+    DELETE FROM notes n USING batch b
+    WHERE n.id = b.id AND n.course_id = b.course_id
+    RETURNING n.*
+)
+INSERT INTO notes_archive ({", ".join(NOTE_COLUMNS)}, archived_at, activity)
+SELECT {", ".join("m." + column for column in NOTE_COLUMNS)}, :now, (
+    SELECT jsonb_agg(jsonb_build_object('day', a.day, 'views', a.views, 'downloads', a.downloads, 'votes', a.votes))
+    FROM note_activity_daily a
+    WHERE a.note_id = m.id AND a.course_id = m.course_id
+)
+FROM moved m
+"""
+
+
+def archive_notes(older_than_days: int = ARCHIVE_AFTER_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Move old notes of inactive courses to notes_archive. Returns how many moved."""
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=older_than_days)
+    moved = 0
+
+    db = SessionLocal()
+    try:
+        while True:
+            # short transactions, and SKIP LOCKED so a note being edited is just left for next time
+            result = db.execute(text(ARCHIVE_BATCH_SQL), {"cutoff": cutoff, "batch_size": batch_size, "now": now})
+            db.commit()
+            moved += result.rowcount
+
+            if result.rowcount < batch_size:
+                break
+
+            time.sleep(ARCHIVE_BATCH_PAUSE_MS / 1000)
+    finally:
+        db.close()
+
+    if moved:
+        invalidate("note")
+    return moved
+
+
+def _restore(db, rows):
+    """Put archive rows back into notes with their activity, fingerprints and trending score (caller commits)."""
+    if not rows:
+        return
+
+    db.execute(insert(Note), [{column: getattr(row, column) for column in NOTE_COLUMNS} for row in rows])
+
+    now = datetime.now(timezone.utc)
+    activity = [{
+        "note_id": row.id,
+        "course_id": row.course_id,
+        "day": date.fromisoformat(day["day"]),
+        "views": day["views"],
+        "downloads": day["downloads"],
+        "votes": day["votes"],
+        "updated_at": now,
+    } for row in rows for day in row.activity or []]
+    if activity:
+        db.execute(insert(NoteActivityDaily), activity)
+
+    for row in rows:
+        save_fingerprints(db, row.id, row.course_id, note_fingerprints(row.title, row.file_url))
+    rescore_notes(db, [row.id for row in rows])
+
+
+def restore_note(db, note_id: UUID):
+    """Move one note back out of the archive. Returns the archived row, or None (caller commits)."""
+    row = db.execute(
+        delete(NoteArchive).where(NoteArchive.id == note_id).returning(*NoteArchive.__table__.c)
+    ).first()
+    if row is not None:
+        _restore(db, [row])
+    return row
+
+
+def restore_course(course_id: UUID, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Move all of a course's archived notes back, in batches (e.g. after it is reactivated)."""
+    restored = 0
+    db = SessionLocal()
+    try:
+        while True:
+            rows = db.execute(
+                delete(NoteArchive)
+                .where(NoteArchive.id.in_(
+                    select(NoteArchive.id).where(NoteArchive.course_id == course_id).limit(batch_size)
+                ))
+                .returning(*NoteArchive.__table__.c)
+            ).all()
+            _restore(db, rows)
+            db.commit()
+            restored += len(rows)
+
+            if len(rows) < batch_size:
+                break
+
+            time.sleep(ARCHIVE_BATCH_PAUSE_MS / 1000)
+    finally:
+        db.close()
+
+    if restored:
+        invalidate("note")
+    return restored
+
+
+def notes_with_archive():
+    """notes UNION ALL notes_archive, mapped like Note so listings can filter and sort it the same way."""
+    combined = union_all(
+        select(*(getattr(Note, column) for column in NOTE_COLUMNS)),
+        select(*(getattr(NoteArchive, column) for column in NOTE_COLUMNS)),
+    ).subquery("all_notes")
+    return aliased(Note, combined)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "restore":
+        print(f"Restored {restore_course(UUID(sys.argv[2]))} note(s)")
+    else:
+        print(f"Archived {archive_notes()} note(s)")
\ No newline at end of file
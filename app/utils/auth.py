@@ -12,6 +12,7 @@ from dotenv import load_dotenv
 from app.database import get_db
 from app.models.user import User
 from app.schemas.user import TokenData
+from app.utils.tracing import span
 
 load_dotenv()
 
@@ -79,9 +80,9 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    token_data = verify_token(token, credentials_exception)
-    
-    user = db.query(User).filter(User.id == token_data.user_id).first()
+    with span("get_current_user"):
+        token_data = verify_token(token, credentials_exception)
+        user = db.query(User).filter(User.id == token_data.user_id).first()
     
     if user is None:
         raise credentials_exception
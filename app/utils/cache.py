@@ -0,0 +1,241 @@
+from collections import OrderedDict
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+import functools
+import logging
+import os
+import select
+import threading
+import time
+import uuid
+
+from app.database import engine
+
+logger = logging.getLogger("uvicorn.error")
+
+# Cache configuration
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", 60))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 1024))
+
+# Postgres channel the workers use to tell each other what to drop
+INVALIDATION_CHANNEL = "cache_invalidate"
+
+# Lets a worker ignore its own broadcasts (it already cleared locally)
+PROCESS_ID = uuid.uuid4().hex[:12]
+
+
+class LocalCache:
+    """Thread-safe LRU cache where every entry also expires after a TTL."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: int = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (hit, value)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return False, None
+
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class CacheNamespace:
+    """A named cache plus its hit/miss counters."""
+
+    def __init__(self, name: str, backend):
+        self.name = name
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # bumped on every invalidation so a read that started before it can't store stale data
+        self.generation = 0
+
+    def clear(self):
+        self.generation += 1
+        self.invalidations += 1
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "size": len(self.backend),
+        }
+
+
+_namespaces = {}
+_broadcaster = None
+
+
+def get_namespace(name: str, backend_factory=LocalCache) -> CacheNamespace:
+    """Get (or create) a cache namespace."""
+    namespace = _namespaces.get(name)
+    if namespace is None:
+        namespace = _namespaces.setdefault(name, CacheNamespace(name, backend_factory()))
+    return namespace
+
+
+def _make_key(func, args, kwargs):
+    # db sessions differ on every request and say nothing about the result
+    key_args = tuple(arg for arg in args if not isinstance(arg, Session))
+    key_kwargs = tuple(sorted(
+        (name, value) for name, value in kwargs.items() if not isinstance(value, Session)
+    ))
+    return (func.__qualname__, key_args, key_kwargs)
+
+
+def cached(namespace: str):
+    """Cache a function's return value in `namespace`, keyed on its non-session arguments.
+
+    Keeps the wrapped signature so it can sit directly under a FastAPI route decorator.
+    """
+    def decorator(func):
+        ns = get_namespace(namespace)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not CACHE_ENABLED:
+                return func(*args, **kwargs)
+
+            key = _make_key(func, args, kwargs)
+            hit, value = ns.backend.get(key)
+            if hit:
+                ns.hits += 1
+                return value
+
+            ns.misses += 1
+            generation = ns.generation
+            value = func(*args, **kwargs)
+            if ns.generation == generation:
+                ns.backend.set(key, value)
+            return value
+
+        return wrapper
+    return decorator
+
+
+def invalidate(*namespaces: str):
+    """Drop the given namespaces here and in every other worker. Call after commit."""
+    for name in namespaces:
+        get_namespace(name).clear()
+
+    if _broadcaster is not None:
+        for name in namespaces:
+            _broadcaster.publish(name)
+
+
+def cache_stats() -> dict:
+    return {name: namespace.stats() for name, namespace in _namespaces.items()}
+
+
+class PostgresBroadcaster:
+    """Sends and receives invalidations through postgres LISTEN/NOTIFY."""
+
+    def __init__(self, engine, channel: str = INVALIDATION_CHANNEL):
+        self.engine = engine
+        self.channel = channel
+        self._stop = threading.Event()
+        self._thread = None
+
+    def publish(self, namespace: str):
+        try:
+            with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                conn.execute(
+                    text("SELECT pg_notify(:channel, :payload)"),
+                    {"channel": self.channel, "payload": f"{PROCESS_ID}:{namespace}"}
+                )
+        except Exception as exc:
+            # other workers fall back to the TTL
+            logger.warning("Cache invalidation broadcast failed: %s", exc)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._listen_forever, name="cache-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _listen_forever(self):
+        while not self._stop.is_set():
+            try:
+                self._listen()
+            except Exception as exc:
+                logger.warning("Cache listener lost its connection: %s", exc)
+                # we may have missed messages while disconnected
+                for namespace in _namespaces.values():
+                    namespace.clear()
+                self._stop.wait(5)
+
+    def _listen(self):
+        import psycopg2
+
+        # own connection, outside the pool, since it stays open for the life of the worker
+        dsn = self.engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        conn = psycopg2.connect(dsn)
+        try:
+            conn.autocommit = True
+            conn.cursor().execute(f"LISTEN {self.channel}")
+
+            while not self._stop.is_set():
+                if select.select([conn], [], [], 1.0) == ([], [], []):
+                    continue
+
+                conn.poll()
+                while conn.notifies:
+                    origin, _, name = conn.notifies.pop(0).payload.partition(":")
+                    if origin != PROCESS_ID:
+                        get_namespace(name).clear()
+        finally:
+            conn.close()
+
+
+def start_broadcaster():
+    """Start cross-worker invalidation if the database supports it."""
+    global _broadcaster
+    if not CACHE_ENABLED or engine.dialect.name != "postgresql":
+        return
+
+    _broadcaster = PostgresBroadcaster(engine)
+    _broadcaster.start()
+
+
+def stop_broadcaster():
+    global _broadcaster
+    if _broadcaster is not None:
+        _broadcaster.stop()
+        _broadcaster = None
@@ -0,0 +1,164 @@
+from collections import deque
+from jose import JWTError, jwt
+from starlette.datastructures import Headers
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from app.utils.auth import SECRET_KEY, ALGORITHM
+
+logger = logging.getLogger("uvicorn.error")
+
+# NDJSON file captured requests are appended to, unset leaves the middleware out entirely.
+# With several workers use "{pid}" in the name so each writes its own file
+CAPTURE_FILE = os.getenv("CAPTURE_FILE", "")
+# Share of clients whose traffic is captured
+CAPTURE_SAMPLE_RATE = float(os.getenv("CAPTURE_SAMPLE_RATE", 0.1))
+CAPTURE_FLUSH_SECONDS = float(os.getenv("CAPTURE_FLUSH_SECONDS", 2))
+CAPTURE_BUFFER_SIZE = 10000
+
+_SAMPLE_BUCKETS = 10000
+
+
+def _client_key(scope, headers: Headers) -> bytes:
+    """Who sent the request: the first X-Forwarded-For hop behind Render's proxy, else the peer address."""
+    forwarded = headers.get("x-forwarded-for")
+    if forwarded:
+        return forwarded.split(",")[0].strip().encode()
+    client = scope.get("client")
+    return (client[0] if client else "").encode()
+
+
+def sampled(client_key: bytes, rate: float = CAPTURE_SAMPLE_RATE) -> bool:
+    """Sample by client rather than by request, so a page load keeps all the API calls it fans out to."""
+    bucket = int.from_bytes(hashlib.blake2b(client_key, digest_size=4).digest(), "big") % _SAMPLE_BUCKETS
+    return bucket < rate * _SAMPLE_BUCKETS
+
+
+def anonymize(authorization):
+    """Stable pseudonym for the user behind a bearer token, None for anonymous requests.
+
+    Keyed with SECRET_KEY so the user id can't be recovered from a capture file.
+    """
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        subject = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+    except JWTError:
+        return "invalid"
+    if subject is None:
+        return "invalid"
+    return hashlib.blake2b(subject.encode(), key=SECRET_KEY.encode()[:64], digest_size=8).hexdigest()
+
+
+class CaptureBuffer:
+    """Captured requests waiting to be written. Full means the oldest are dropped."""
+
+    def __init__(self, capacity: int = CAPTURE_BUFFER_SIZE):
+        self._records = deque(maxlen=capacity)
+        self.written = 0
+        self.dropped = 0
+
+    def add(self, record: dict):
+        if len(self._records) == self._records.maxlen:
+            self.dropped += 1
+        self._records.append(record)
+
+    def drain(self) -> list:
+        records = []
+        while self._records:
+            records.append(self._records.popleft())
+        return records
+
+
+capture_buffer = CaptureBuffer()
+
+
+class TrafficCaptureMiddleware:
+    """Records method, path, query, pseudonymous user and timing of sampled requests for scripts/replay_traffic.py.
+
+    Bodies are never captured. One compact JSON object per line:
+    t (start, unix seconds), m, p, q, r (route template), u (user pseudonym), s (status), ms.
+    Only added to the app when CAPTURE_FILE is set.
+    """
+
+    def __init__(self, app, sample_rate: float = CAPTURE_SAMPLE_RATE):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith("/static/"):
+            return await self.app(scope, receive, send)
+
+        headers = Headers(scope=scope)
+        if not sampled(_client_key(scope, headers), self.sample_rate):
+            return await self.app(scope, receive, send)
+
+        response = {"status": 500, "ended": None}
+
+        async def timed_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                response["ended"] = time.perf_counter()
+
+        wall = time.time()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            ended = response["ended"] or time.perf_counter()
+            route = scope.get("route")
+            record = {
+                "t": round(wall, 3),
+                "m": scope["method"],
+                "p": scope["path"],
+                "r": getattr(route, "path", None),
+                "u": anonymize(headers.get("authorization")),
+                "s": response["status"],
+                "ms": round((ended - started) * 1000, 2),
+            }
+            if scope["query_string"]:
+                record["q"] = scope["query_string"].decode("latin-1")
+            capture_buffer.add(record)
+
+
+class CaptureWriter:
+    """Background thread that appends buffered requests to CAPTURE_FILE every CAPTURE_FLUSH_SECONDS."""
+
+    def __init__(self, path: str = CAPTURE_FILE, buffer: CaptureBuffer = capture_buffer, interval: float = CAPTURE_FLUSH_SECONDS):
+        self.path = path.format(pid=os.getpid())
+        self.buffer = buffer
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="capture-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        self._flush()
+
+    def _flush(self):
+        records = self.buffer.drain()
+        if not records:
+            return
+        try:
+            with open(self.path, "a") as f:
+                f.write("".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records))
+            self.buffer.written += len(records)
+        except OSError as exc:
+            logger.warning("Writing captured traffic failed: %s", exc)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._flush()
\ No newline at end of file
@@ -0,0 +1,82 @@
+from sqlalchemy import func, select, text
+
+from app.database import SessionLocal, engine
+from app.models.course import Course
+from app.models.facet import CourseFacet
+from app.models.note import Note
+from app.models.user import User
+
+
+def normalize_department(department: str) -> str:
+    """'  Computer   Science ' -> 'computer science'. Must match the SQL used in the migration."""
+    return " ".join(department.split()).lower()
+
+
+def clean_department(department: str) -> str:
+    """Tidy the display value without changing its case."""
+    return " ".join(department.split())
+
+
+def live_facets(db, facet: str):
+    """The same buckets counted from courses and notes, for databases without the triggers (SQLite)."""
+    notes = select(Note.course_id, func.count().label("note_count")).group_by(Note.course_id).subquery()
+    if facet == "department":
+        value, label = Course.department_key, func.min(Course.department)
+    else:
+        value, label = func.lower(func.trim(User.university)), func.min(func.trim(User.university))
+
+    query = db.query(
+        value.label("value"), label.label("label"), func.count().label("course_count"),
+        func.coalesce(func.sum(notes.c.note_count), 0).label("note_count")
+    ).select_from(Course).outerjoin(notes, notes.c.course_id == Course.id).filter(Course.deleted_at.is_(None))
+    if facet != "department":
+        query = query.join(User, User.id == Course.created_by).filter(func.trim(User.university) != "")
+    return query.group_by(value).order_by(func.count().desc(), label).all()
+
+
+def get_facets(db, facet: str):
+    """All non-empty buckets for one facet, biggest first."""
+    if engine.dialect.name != "postgresql":
+        return live_facets(db, facet)
+    return db.query(CourseFacet).filter(
+        CourseFacet.facet == facet,
+        CourseFacet.course_count > 0
+    ).order_by(CourseFacet.course_count.desc(), CourseFacet.label).all()
+
+
+# Recomputes everything from scratch, only needed if the triggers were ever bypassed
+REBUILD_SQL = """
+LOCK TABLE courses, notes IN SHARE MODE;
+
+UPDATE courses c SET note_count = (SELECT count(*) FROM notes n WHERE n.course_id = c.id);
+
+DELETE FROM course_facets;
+
+INSERT INTO course_facets (facet, value, label, course_count, note_count)
+SELECT 'department', department_key, min(department), count(*), sum(note_count)
+FROM courses
+WHERE deleted_at IS NULL
+GROUP BY department_key;
+
+INSERT INTO course_facets (facet, value, label, course_count, note_count)
+SELECT 'university', lower(btrim(u.university)), min(btrim(u.university)), count(*), sum(c.note_count)
+FROM courses c JOIN users u ON u.id = c.created_by
+WHERE c.deleted_at IS NULL AND u.university IS NOT NULL AND btrim(u.university) <> ''
+GROUP BY lower(btrim(u.university));
+"""
+
+
+def rebuild_facets():
+    db = SessionLocal()
+    try:
+        for statement in REBUILD_SQL.split(";"):
+            if statement.strip():
+                db.execute(text(statement))
+        db.commit()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    rebuild_facets()
+    print("Rebuilt course facets")
@@ -0,0 +1,54 @@
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from typing import Optional, Tuple
+
+from app.models.user import User
+from app.schemas.course import CourseResponse
+from app.schemas.note import NoteWithUploader
+
+# What ?fields= may ask for - exactly the keys of the full response
+NOTE_FIELDS = tuple(NoteWithUploader.model_fields)
+COURSE_FIELDS = tuple(CourseResponse.model_fields)
+
+# These come from the uploader, everything else is a column of the note itself
+UPLOADER_FIELDS = {"uploader_name", "uploader_email"}
+
+
+def parse_fields(fields: Optional[str], allowed) -> Optional[Tuple[str, ...]]:
+    """Turn ?fields=a,b into ("a", "b"), or None when the full response was asked for."""
+    if fields is None:
+        return None
+
+    requested = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in requested if name not in allowed]
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown field(s): {', '.join(unknown) or '(none given)'}. Allowed: {', '.join(allowed)}"
+        )
+    return requested
+
+
+def needs_uploader(fields) -> bool:
+    return fields is None or not UPLOADER_FIELDS.isdisjoint(fields)
+
+
+def field_columns(model, fields):
+    """Labelled column expressions for just the requested fields."""
+    columns = []
+    for name in fields:
+        if name == "uploader_name":
+            columns.append((User.first_name + " " + User.last_name).label(name))
+        elif name == "uploader_email":
+            columns.append(User.email.label(name))
+        else:
+            columns.append(getattr(model, name).label(name))
+    return columns
+
+
+def sparse_response(rows) -> JSONResponse:
+    """Serialize only the selected keys, bypassing the route's full response model."""
+    if isinstance(rows, list):
+        return JSONResponse(jsonable_encoder([dict(row._mapping) for row in rows]))
+    return JSONResponse(jsonable_encoder(dict(rows._mapping)))
\ No newline at end of file
@@ -0,0 +1,159 @@
+from sqlalchemy import insert, select
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import hashlib
+import os
+import random
+import re
+
+from app.database import SessionLocal
+from app.models.fingerprint import NoteFingerprint
+from app.models.note import Note
+
+# Titles at least this similar (Jaccard over 3-grams) are reported as likely duplicates
+DUPLICATE_TITLE_THRESHOLD = float(os.getenv("DUPLICATE_TITLE_THRESHOLD", 0.6))
+
+# MinHash/LSH settings: 4 bands of 4 rows catches titles above roughly 0.7 similarity
+MINHASH_BANDS = 4
+MINHASH_ROWS = 4
+
+# query params that never change what the link points to
+TRACKING_PARAMS = {"usp", "fbclid", "gclid", "ref", "si"}
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(1236)  # fixed seed, signatures must be stable across deploys
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(MINHASH_BANDS * MINHASH_ROWS)
+]
+
+_GOOGLE_DRIVE_ID = re.compile(r"/(?:file/)?d/([\w-]+)")
+
+
+def canonical_url(url: str) -> str:
+    """Normalize a link so trivially different copies of it compare equal."""
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "https").lower()
+    if scheme == "http":
+        scheme = "https"
+
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    ]
+
+    # the same Drive file shows up as /file/d/<id>/view, /open?id=<id>, /uc?id=<id>...
+    if host in ("drive.google.com", "docs.google.com"):
+        match = _GOOGLE_DRIVE_ID.search(parts.path)
+        file_id = match.group(1) if match else dict(query).get("id")
+        if file_id:
+            return f"gdrive:{file_id}"
+
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((scheme, host, path, urlencode(sorted(query)), ""))
+
+
+def _title_shingles(title: str):
+    normalized = " ".join(re.sub(r"[^\w\s]", " ", title.lower()).split())
+    if len(normalized) < 3:
+        return {normalized}
+    return {normalized[i:i + 3] for i in range(len(normalized) - 2)}
+
+
+def title_similarity(a: str, b: str) -> float:
+    """Exact Jaccard similarity of two titles' character 3-grams."""
+    shingles_a, shingles_b = _title_shingles(a), _title_shingles(b)
+    return len(shingles_a & shingles_b) / len(shingles_a | shingles_b)
+
+
+def _minhash(title: str):
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big")
+        for shingle in _title_shingles(title)
+    ]
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def note_fingerprints(title: str, file_url: str):
+    """Index keys for a note: one for its link, one per MinHash band of its title."""
+    values = ["url:" + hashlib.sha256(canonical_url(file_url).encode()).hexdigest()[:32]]
+
+    signature = _minhash(title)
+    for band in range(MINHASH_BANDS):
+        rows = signature[band * MINHASH_ROWS:(band + 1) * MINHASH_ROWS]
+        digest = hashlib.sha1(",".join(map(str, rows)).encode()).hexdigest()[:16]
+        values.append(f"t{band}:{digest}")
+
+    return values
+
+
+def find_duplicates(db, course_id, title: str, fingerprints, exclude_note_id=None):
+    """Notes in the same course sharing the link or (probably) the title - one indexed lookup."""
+    rows = db.execute(
+        select(NoteFingerprint.value, Note.id, Note.title, Note.file_url, Note.created_at)
+        .join(Note, (Note.id == NoteFingerprint.note_id) & (Note.course_id == NoteFingerprint.course_id))
+        .where(NoteFingerprint.course_id == course_id, NoteFingerprint.value.in_(fingerprints))
+    ).all()
+
+    candidates = {}
+    for row in rows:
+        if row.id == exclude_note_id:
+            continue
+        candidate = candidates.setdefault(row.id, {
+            "id": row.id,
+            "title": row.title,
+            "file_url": row.file_url,
+            "created_at": row.created_at,
+            "match": "title",
+        })
+        if row.value.startswith("url:"):
+            candidate["match"] = "url"
+
+    duplicates = []
+    for candidate in candidates.values():
+        # LSH only says "maybe", check the real similarity before bothering the uploader
+        candidate["similarity"] = 1.0 if candidate["match"] == "url" else round(title_similarity(title, candidate["title"]), 3)
+        if candidate["match"] == "url" or candidate["similarity"] >= DUPLICATE_TITLE_THRESHOLD:
+            duplicates.append(candidate)
+
+    return sorted(duplicates, key=lambda d: d["similarity"], reverse=True)
+
+
+def save_fingerprints(db, note_id, course_id, fingerprints, replace: bool = False):
+    """Store a note's fingerprints (caller commits)."""
+    if replace:
+        db.query(NoteFingerprint).filter(NoteFingerprint.note_id == note_id).delete(synchronize_session=False)
+
+    db.execute(insert(NoteFingerprint), [
+        {"note_id": note_id, "course_id": course_id, "value": value}
+        for value in dict.fromkeys(fingerprints)
+    ])
+
+
+def backfill_fingerprints(batch_size: int = 1000) -> int:
+    """Fingerprint every note that doesn't have any yet."""
+    db = SessionLocal()
+    done = 0
+    try:
+        while True:
+            notes = db.query(Note.id, Note.course_id, Note.title, Note.file_url).filter(
+                ~Note.id.in_(select(NoteFingerprint.note_id))
+            ).limit(batch_size).all()
+            if not notes:
+                return done
+
+            for note in notes:
+                save_fingerprints(db, note.id, note.course_id, note_fingerprints(note.title, note.file_url))
+            db.commit()
+            done += len(notes)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print(f"Fingerprinted {backfill_fingerprints()} note(s)")
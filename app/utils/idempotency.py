@@ -0,0 +1,269 @@
+from datetime import datetime, timedelta, timezone
+from jose import JWTError, jwt
+from sqlalchemy import delete, select, update
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+import anyio
+import hashlib
+import logging
+import os
+import threading
+import zlib
+
+from app.database import SessionLocal, upsert
+from app.models.idempotency import IdempotencyKey
+from app.utils.auth import SECRET_KEY, ALGORITHM
+from app.utils.cache import LocalCache
+
+logger = logging.getLogger("uvicorn.error")
+
+# How long a key (and the response it saved) is remembered
+IDEMPOTENCY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_TTL_HOURS", 24))
+# A key still "in progress" after this long belongs to a request that died, let a retry take it over
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", 60))
+IDEMPOTENCY_PRUNE_SECONDS = int(os.getenv("IDEMPOTENCY_PRUNE_SECONDS", 3600))
+IDEMPOTENCY_PRUNE_BATCH_SIZE = 1000
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+MAX_KEY_LENGTH = 255
+
+# Finished responses never change, so retries hitting the same worker skip the database
+_snapshots = LocalCache(max_entries=2048, ttl=min(300, IDEMPOTENCY_TTL_HOURS * 3600))
+
+
+class Snapshot:
+    """A finished response, as stored for replay."""
+
+    def __init__(self, request_hash: bytes, status_code: int, content_type, body: bytes):
+        self.request_hash = request_hash
+        self.status_code = status_code
+        self.content_type = content_type
+        self.body = body
+
+    def response(self) -> Response:
+        headers = {"Idempotent-Replayed": "true"}
+        if self.content_type:
+            headers["Content-Type"] = self.content_type
+        return Response(self.body, status_code=self.status_code, headers=headers)
+
+
+def _token_subject(authorization):
+    """User id from a valid bearer token, None otherwise (the route answers 401 itself)."""
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+    except JWTError:
+        return None
+
+
+def claim_key(key: bytes, request_hash: bytes):
+    """Take a key for this request. Returns (True, None) if we own it, else (False, existing row or None)."""
+    now = datetime.now(timezone.utc)
+    db = SessionLocal()
+    try:
+        stmt = upsert(IdempotencyKey).values(
+            key=key,
+            request_hash=request_hash,
+            created_at=now,
+            expires_at=now + timedelta(hours=IDEMPOTENCY_TTL_HOURS)
+        )
+        # expired keys and abandoned in-progress ones are up for grabs
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["key"],
+            set_={
+                "request_hash": stmt.excluded.request_hash,
+                "status_code": None,
+                "content_type": None,
+                "body": None,
+                "created_at": stmt.excluded.created_at,
+                "expires_at": stmt.excluded.expires_at,
+            },
+            where=(IdempotencyKey.expires_at < now) | (
+                IdempotencyKey.status_code.is_(None)
+                & (IdempotencyKey.created_at < now - timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS))
+            )
+        ).returning(IdempotencyKey.key)
+
+        claimed = db.execute(stmt).scalar() is not None
+        db.commit()
+        if claimed:
+            return True, None
+
+        existing = db.execute(
+            select(IdempotencyKey.request_hash, IdempotencyKey.status_code, IdempotencyKey.content_type, IdempotencyKey.body)
+            .where(IdempotencyKey.key == key)
+        ).first()
+        return False, existing
+    finally:
+        db.close()
+
+
+def complete_key(key: bytes, snapshot: Snapshot):
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(IdempotencyKey).where(IdempotencyKey.key == key).values(
+                status_code=snapshot.status_code,
+                content_type=snapshot.content_type,
+                body=zlib.compress(snapshot.body)
+            )
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def release_key(key: bytes):
+    """Forget a key whose request failed, so the client's retry runs for real."""
+    db = SessionLocal()
+    try:
+        db.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key, IdempotencyKey.status_code.is_(None)))
+        db.commit()
+    finally:
+        db.close()
+
+
+def prune_idempotency_keys(batch_size: int = IDEMPOTENCY_PRUNE_BATCH_SIZE) -> int:
+    """Delete expired keys in small batches. Returns how many were removed."""
+    db = SessionLocal()
+    pruned = 0
+    try:
+        while True:
+            expired = select(IdempotencyKey.key).where(IdempotencyKey.expires_at < datetime.now(timezone.utc)).limit(batch_size)
+            deleted = db.execute(delete(IdempotencyKey).where(IdempotencyKey.key.in_(expired))).rowcount
+            db.commit()
+            pruned += deleted
+            if deleted < batch_size:
+                return pruned
+    finally:
+        db.close()
+
+
+def _error(status_code: int, detail: str) -> Response:
+    return JSONResponse({"detail": detail}, status_code=status_code)
+
+
+class IdempotencyMiddleware:
+    """Replays the saved response when a write is retried with the same Idempotency-Key.
+
+    Keys are scoped to the signed-in user, method and path. Requests without the header,
+    or without a valid token, go straight through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in WRITE_METHODS or not scope["path"].startswith("/api/"):
+            return await self.app(scope, receive, send)
+
+        headers = Headers(scope=scope)
+        idempotency_key = headers.get("idempotency-key")
+        if idempotency_key is None:
+            return await self.app(scope, receive, send)
+
+        if not 0 < len(idempotency_key) <= MAX_KEY_LENGTH:
+            return await _error(400, f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters")(scope, receive, send)
+
+        user_id = _token_subject(headers.get("authorization"))
+        if user_id is None:
+            return await self.app(scope, receive, send)
+
+        # the body has to be read up front to tell a retry from a different request
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        body = b"".join(chunks)
+
+        key = hashlib.sha256(f"{user_id}\n{scope['method']}\n{scope['path']}\n{idempotency_key}".encode()).digest()
+        request_hash = hashlib.sha256(scope["query_string"] + b"\n" + body).digest()
+
+        hit, snapshot = _snapshots.get(key)
+        if not hit:
+            claimed, existing = await anyio.to_thread.run_sync(claim_key, key, request_hash)
+            if claimed:
+                return await self._run_and_record(scope, receive, send, body, key, request_hash)
+
+            if existing is None or existing.status_code is None:
+                return await _error(409, "A request with this Idempotency-Key is still being processed")(scope, receive, send)
+            snapshot = Snapshot(existing.request_hash, existing.status_code, existing.content_type, zlib.decompress(existing.body))
+            _snapshots.set(key, snapshot)
+
+        if snapshot.request_hash != request_hash:
+            return await _error(422, "Idempotency-Key was already used with a different request")(scope, receive, send)
+        await snapshot.response()(scope, receive, send)
+
+    async def _run_and_record(self, scope, receive, send, body, key, request_hash):
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        response = {"status": 500, "content_type": None, "chunks": [], "saved": False}
+
+        async def recording_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["content_type"] = Headers(raw=message["headers"]).get("content-type")
+            elif message["type"] == "http.response.body":
+                response["chunks"].append(message.get("body", b""))
+
+            await send(message)
+
+            # save as soon as the client has its answer, background tasks may still run for a while
+            finished = message["type"] == "http.response.body" and not message.get("more_body", False)
+            if finished and response["status"] < 500:
+                snapshot = Snapshot(request_hash, response["status"], response["content_type"], b"".join(response["chunks"]))
+                await anyio.to_thread.run_sync(complete_key, key, snapshot)
+                _snapshots.set(key, snapshot)
+                response["saved"] = True
+
+        try:
+            await self.app(scope, replay_receive, recording_send)
+        finally:
+            if not response["saved"]:
+                try:
+                    await anyio.to_thread.run_sync(release_key, key)
+                except Exception as exc:
+                    # the key frees itself after IDEMPOTENCY_LOCK_SECONDS
+                    logger.warning("Could not release idempotency key: %s", exc)
+
+
+class IdempotencyPruner:
+    """Background thread that deletes expired keys every IDEMPOTENCY_PRUNE_SECONDS."""
+
+    def __init__(self, interval: int = IDEMPOTENCY_PRUNE_SECONDS):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="idempotency-pruner", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                prune_idempotency_keys()
+            except Exception as exc:
+                logger.warning("Idempotency key pruning failed: %s", exc)
+
+
+if __name__ == "__main__":
+    print(f"Pruned {prune_idempotency_keys()} idempotency key(s)")
\ No newline at end of file
@@ -0,0 +1,225 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import and_, func, or_
+from urllib.parse import urljoin, urlsplit
+import argparse
+import ipaddress
+import logging
+import os
+import re
+import socket
+import tempfile
+
+import requests
+
+from app.database import SessionLocal, upsert
+from app.models.content import NoteContent
+from app.models.note import Note
+from app.utils.cache import invalidate
+
+logger = logging.getLogger("uvicorn.error")
+
+# Indexer configuration
+INDEXER_WORKERS = int(os.getenv("INDEXER_WORKERS", 2))
+INDEXER_BATCH_SIZE = int(os.getenv("INDEXER_BATCH_SIZE", 50))
+# Files bigger than this are not downloaded at all
+INDEXER_MAX_BYTES = int(os.getenv("INDEXER_MAX_BYTES", 50 * 1024 * 1024))
+# Text kept per note - extraction stops once a document reaches it
+INDEXER_MAX_CHARS = int(os.getenv("INDEXER_MAX_CHARS", 200_000))
+# Worker processes are replaced after this many files so fragmented memory is given back
+INDEXER_TASKS_PER_WORKER = int(os.getenv("INDEXER_TASKS_PER_WORKER", 20))
+INDEXER_DOWNLOAD_TIMEOUT = float(os.getenv("INDEXER_DOWNLOAD_TIMEOUT", 30))
+# Failed downloads/extractions are tried again once they are this old
+INDEXER_RETRY_MINUTES = int(os.getenv("INDEXER_RETRY_MINUTES", 60))
+# Only files on our storage hosts are fetched ("example.com" matches itself, ".example.com" any subdomain)
+INDEXER_ALLOWED_HOSTS = [
+    host.strip().lower() for host in os.getenv("INDEXER_ALLOWED_HOSTS", "res.cloudinary.com,.amazonaws.com").split(",")
+    if host.strip()
+]
+INDEXER_MAX_REDIRECTS = 3
+
+IMAGE_TYPES = {"image", "png", "jpg", "jpeg"}
+DOWNLOAD_CHUNK = 64 * 1024
+
+# NUL can't be stored in postgres text, and search snippets use \x02/\x03 as match markers
+_CONTROL_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _host_allowed(host: str) -> bool:
+    return any(
+        host.endswith(allowed) if allowed.startswith(".") else host == allowed
+        for allowed in INDEXER_ALLOWED_HOSTS
+    )
+
+
+def check_url(url: str):
+    """Raise ValueError unless url is http(s) on an allowed storage host that resolves to public addresses.
+
+    file_url comes straight from users, and whatever we fetch ends up in public search snippets.
+    """
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if parts.scheme not in ("http", "https") or not host:
+        raise ValueError("only http(s) URLs are indexed")
+    if not _host_allowed(host):
+        raise ValueError(f"{host} is not an allowed storage host")
+
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, parts.port or 443, proto=socket.IPPROTO_TCP)}
+    except socket.gaierror as exc:
+        raise ValueError(f"cannot resolve {host}: {exc}")
+    for address in addresses:
+        # private, loopback, link-local (cloud metadata), reserved ...
+        if not ipaddress.ip_address(address.split("%")[0]).is_global:
+            raise ValueError(f"{host} resolves to non-public address {address}")
+
+
+def _download(url: str, path: str):
+    """Stream a file to disk so a big PDF never sits in memory whole."""
+    # redirects are followed by hand so every hop goes through check_url
+    for _ in range(INDEXER_MAX_REDIRECTS + 1):
+        check_url(url)
+        response = requests.get(url, stream=True, timeout=INDEXER_DOWNLOAD_TIMEOUT, allow_redirects=False)
+        if not response.is_redirect:
+            break
+        response.close()
+        url = urljoin(url, response.headers["location"])
+    else:
+        raise ValueError(f"more than {INDEXER_MAX_REDIRECTS} redirects")
+
+    size = 0
+    with response:
+        response.raise_for_status()
+        with open(path, "wb") as f:
+            for chunk in response.iter_content(DOWNLOAD_CHUNK):
+                size += len(chunk)
+                if size > INDEXER_MAX_BYTES:
+                    raise ValueError(f"file is larger than {INDEXER_MAX_BYTES} bytes")
+                f.write(chunk)
+
+
+def _pdf_text(path: str):
+    from pypdf import PdfReader  # optional, only needed by the indexer
+
+    reader = PdfReader(path)
+    parts, length, pages = [], 0, 0
+    # one page at a time, stopping at the cap instead of extracting the whole document
+    for page in reader.pages:
+        text = page.extract_text() or ""
+        pages += 1
+        parts.append(text)
+        length += len(text)
+        if length >= INDEXER_MAX_CHARS:
+            break
+    return "\n".join(parts), pages
+
+
+def _image_text(path: str):
+    from PIL import Image  # optional, OCR also needs the tesseract binary
+    import pytesseract
+
+    with Image.open(path) as image:
+        # OCR time and memory grow with pixels; this is plenty for lecture notes
+        image.thumbnail((3000, 3000))
+        return pytesseract.image_to_string(image), 1
+
+
+def extract_text(file_url: str, file_type: str):
+    """Runs in a worker process. Returns (text, pages, error)."""
+    if file_type != "pdf" and file_type not in IMAGE_TYPES:
+        return "", 0, f"unsupported file type {file_type}"
+
+    fd, path = tempfile.mkstemp(prefix="note-", suffix="." + file_type)
+    os.close(fd)
+    try:
+        _download(file_url, path)
+        text, pages = _pdf_text(path) if file_type == "pdf" else _image_text(path)
+    except Exception as exc:
+        return "", 0, f"{exc.__class__.__name__}: {exc}"[:500]
+    finally:
+        os.remove(path)
+
+    return _CONTROL_CHARS.sub(" ", text)[:INDEXER_MAX_CHARS], pages, None
+
+
+def _stale_notes(db, started: datetime, full: bool, limit: int):
+    """Notes never indexed, changed since they were, or failed a while ago (any not yet done in this run with full)."""
+    source_updated = func.coalesce(Note.updated_at, Note.created_at)
+    stale = [
+        NoteContent.note_id.is_(None),
+        NoteContent.source_updated_at < source_updated,
+        # a failure saved in this run is never older than started, so a run doesn't loop on it
+        and_(NoteContent.error.isnot(None), NoteContent.indexed_at < started - timedelta(minutes=INDEXER_RETRY_MINUTES)),
+    ]
+    if full:
+        stale.append(NoteContent.indexed_at < started)
+
+    return db.query(Note.id, Note.course_id, Note.title, Note.file_url, Note.file_type, source_updated.label("source_updated_at")).outerjoin(
+        NoteContent, NoteContent.note_id == Note.id
+    ).filter(or_(*stale)).order_by(Note.created_at).limit(limit).all()
+
+
+def reindex(full: bool = False, workers: int = INDEXER_WORKERS, batch_size: int = INDEXER_BATCH_SIZE) -> int:
+    """Extract and index every note whose file changed since it was last indexed."""
+    started = datetime.now(timezone.utc)
+    indexed = 0
+
+    db = SessionLocal()
+    pool = None
+    try:
+        submitted = 0
+        while True:
+            notes = _stale_notes(db, started, full, batch_size)
+            if not notes:
+                break
+
+            # workers are replaced after INDEXER_TASKS_PER_WORKER files each, so fragmented memory
+            # is given back (by hand, max_tasks_per_child is 3.11+)
+            if pool is None or submitted >= workers * INDEXER_TASKS_PER_WORKER:
+                if pool is not None:
+                    pool.shutdown()
+                pool = ProcessPoolExecutor(max_workers=workers)
+                submitted = 0
+            submitted += len(notes)
+
+            results = pool.map(extract_text, [note.file_url for note in notes], [note.file_type for note in notes])
+
+            rows = []
+            for note, (text, pages, error) in zip(notes, results):
+                if error:
+                    logger.warning("Indexing note %s: %s", note.id, error)
+                rows.append({
+                    "note_id": note.id,
+                    "course_id": note.course_id,
+                    "title": note.title,
+                    "content": text,
+                    "source_updated_at": note.source_updated_at,
+                    "indexed_at": datetime.now(timezone.utc),
+                    "pages": pages,
+                    "error": error,
+                })
+
+            stmt = upsert(NoteContent).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["note_id"],
+                set_={column: stmt.excluded[column] for column in rows[0] if column != "note_id"}
+            )
+            db.execute(stmt)
+            db.commit()
+            indexed += len(rows)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        db.close()
+
+    if indexed:
+        invalidate("note")
+    return indexed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract text from note files into the search index.")
+    parser.add_argument("--full", action="store_true", help="reindex every note, not just changed ones")
+    parser.add_argument("--workers", type=int, default=INDEXER_WORKERS)
+    args = parser.parse_args()
+    print(f"Indexed {reindex(full=args.full, workers=args.workers)} note(s)")
\ No newline at end of file
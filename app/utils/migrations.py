@@ -0,0 +1,281 @@
+from alembic import context, op
+from sqlalchemy import text
+import argparse
+import io
+import os
+import re
+import time
+
+# Batched backfills: rows per UPDATE (each its own transaction) and the pause between them
+MIGRATION_BACKFILL_BATCH_SIZE = int(os.getenv("MIGRATION_BACKFILL_BATCH_SIZE", 1000))
+MIGRATION_BACKFILL_PAUSE_MS = int(os.getenv("MIGRATION_BACKFILL_PAUSE_MS", 50))
+# Rough scan speed used by the dry run to turn table size into seconds
+MIGRATION_SCAN_MB_PER_SECOND = float(os.getenv("MIGRATION_SCAN_MB_PER_SECOND", 100))
+
+
+# --- helpers for use inside alembic migrations ---
+
+def _partitions(bind, table: str):
+    return bind.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:table) ORDER BY c.relname"
+    ), {"table": table}).scalars().all()
+
+
+def _drop_invalid_index(bind, name: str):
+    """A failed CONCURRENTLY build leaves an INVALID index behind that would block a retry."""
+    valid = bind.execute(text(
+        "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"
+    ), {"name": name}).scalar()
+    if valid is False:
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def create_index_concurrently(name: str, table: str, columns, unique: bool = False, where: str = None, include=None):
+    """CREATE INDEX CONCURRENTLY: reads and writes carry on while it builds.
+
+    Partitioned tables (notes) can't build an index concurrently, so the parent gets an empty
+    index ON ONLY itself and each partition is built concurrently and attached to it.
+    """
+    columns_sql = ", ".join(columns)
+    suffix = ""
+    if include:
+        suffix += f" INCLUDE ({', '.join(include)})"
+    if where:
+        suffix += f" WHERE {where}"
+    unique_sql = "UNIQUE " if unique else ""
+
+    with context.get_context().autocommit_block():
+        if context.is_offline_mode():
+            op.execute(f"CREATE {unique_sql}INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns_sql}){suffix}")
+            return
+
+        bind = op.get_bind()
+        partitions = _partitions(bind, table)
+        if not partitions:
+            _drop_invalid_index(bind, name)
+            op.execute(f"CREATE {unique_sql}INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns_sql}){suffix}")
+            return
+
+        op.execute(f"CREATE {unique_sql}INDEX IF NOT EXISTS {name} ON ONLY {table} ({columns_sql}){suffix}")
+        for partition in partitions:
+            partition_index = f"{name}_{partition}"[:63]
+            _drop_invalid_index(bind, partition_index)
+            op.execute(f"CREATE {unique_sql}INDEX CONCURRENTLY IF NOT EXISTS {partition_index} ON {partition} ({columns_sql}){suffix}")
+            # attaching an index that is already attached is an error, so check first
+            attached = bind.execute(text(
+                "SELECT 1 FROM pg_inherits WHERE inhrelid = to_regclass(:child) AND inhparent = to_regclass(:parent)"
+            ), {"child": partition_index, "parent": name}).scalar()
+            if not attached:
+                op.execute(f"ALTER INDEX {name} ATTACH PARTITION {partition_index}")
+
+
+def drop_index_concurrently(name: str):
+    """DROP INDEX CONCURRENTLY. Postgres can't do that for an index on a partitioned table, so that
+    one is dropped normally: a brief lock and no scan, bounded by the lock_timeout from env.py.
+    """
+    with context.get_context().autocommit_block():
+        if not context.is_offline_mode():
+            relkind = op.get_bind().execute(
+                text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"), {"name": name}
+            ).scalar()
+            if relkind == "I":
+                op.execute(f"DROP INDEX IF EXISTS {name}")
+                return
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def backfill(table: str, set_sql: str, where_sql: str, key: str = "id",
+             batch_size: int = MIGRATION_BACKFILL_BATCH_SIZE, pause_ms: int = MIGRATION_BACKFILL_PAUSE_MS) -> int:
+    """UPDATE table SET set_sql WHERE where_sql in short transactions of batch_size rows.
+
+    where_sql must stop matching a row once it's been updated (e.g. "col IS NULL"),
+    otherwise this never finishes. Returns the number of rows updated.
+    """
+    statement = (
+        f"UPDATE {table} SET {set_sql} WHERE {key} IN "
+        f"(SELECT {key} FROM {table} WHERE {where_sql} LIMIT {int(batch_size)} FOR UPDATE SKIP LOCKED)"
+    )
+    remaining = f"SELECT 1 FROM {table} WHERE {where_sql} LIMIT 1"
+
+    with context.get_context().autocommit_block():
+        if context.is_offline_mode():
+            op.execute(f"{statement} -- repeat until {remaining} returns nothing")
+            return 0
+
+        bind = op.get_bind()
+        updated = 0
+        while True:
+            rowcount = bind.execute(text(statement)).rowcount
+            updated += rowcount
+            # 0 rows can just mean every pending row is locked by a live transaction (SKIP LOCKED),
+            # so only stop once nothing matches at all, and wait for the locks otherwise
+            if rowcount == 0 and bind.execute(text(remaining)).first() is None:
+                return updated
+            time.sleep(pause_ms / 1000 if rowcount else max(pause_ms, 500) / 1000)
+
+
+def add_foreign_key_not_valid(name: str, source: str, referent: str, local_cols, remote_cols, ondelete: str = None):
+    """Add a FK without checking existing rows (only a brief lock). Follow with validate_constraint()."""
+    on_delete = f" ON DELETE {ondelete}" if ondelete else ""
+    op.execute(
+        f"ALTER TABLE {source} ADD CONSTRAINT {name} FOREIGN KEY ({', '.join(local_cols)}) "
+        f"REFERENCES {referent} ({', '.join(remote_cols)}){on_delete} NOT VALID"
+    )
+
+
+def add_check_not_valid(name: str, table: str, condition: str):
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} CHECK ({condition}) NOT VALID")
+
+
+def validate_constraint(name: str, table: str):
+    """Check existing rows under SHARE UPDATE EXCLUSIVE, which doesn't block reads or writes."""
+    with context.get_context().autocommit_block():
+        op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {name}")
+
+
+def set_not_null(table: str, column: str):
+    """SET NOT NULL without a long ACCESS EXCLUSIVE scan: postgres skips the scan when a
+    validated CHECK (column IS NOT NULL) already proves it."""
+    check = f"{table}_{column}_not_null"[:63]
+    add_check_not_valid(check, table, f"{column} IS NOT NULL")
+    validate_constraint(check, table)
+    op.alter_column(table, column, nullable=False)
+    op.drop_constraint(check, table, type_="check")
+
+
+# --- dry run: what would `alembic upgrade` lock, and for how long? ---
+
+# (pattern, lock taken, what it blocks while held, whether it reads the whole table)
+# first match wins, so the more specific patterns come first
+LOCK_RULES = [
+    (r"^CREATE (UNIQUE )?INDEX CONCURRENTLY", "SHARE UPDATE EXCLUSIVE", "other DDL only", True),
+    (r"^CREATE (UNIQUE )?INDEX .* ON ONLY ", "SHARE", "writes (brief, builds nothing)", False),
+    (r"^CREATE (UNIQUE )?INDEX", "SHARE", "writes", True),
+    (r"^DROP INDEX CONCURRENTLY", "SHARE UPDATE EXCLUSIVE", "other DDL only", False),
+    (r"^DROP INDEX", "ACCESS EXCLUSIVE", "reads and writes (brief)", False),
+    (r"^ALTER INDEX .* ATTACH PARTITION", "SHARE UPDATE EXCLUSIVE", "other DDL only", False),
+    (r"^ALTER TABLE .* VALIDATE CONSTRAINT", "SHARE UPDATE EXCLUSIVE", "other DDL only", True),
+    (r"^ALTER TABLE .* ADD CONSTRAINT .* NOT VALID", "SHARE ROW EXCLUSIVE", "writes (brief)", False),
+    (r"^ALTER TABLE .* ADD CONSTRAINT .* FOREIGN KEY", "SHARE ROW EXCLUSIVE", "writes", True),
+    (r"^ALTER TABLE .* ADD (CONSTRAINT .* )?(CHECK|UNIQUE|PRIMARY KEY)", "ACCESS EXCLUSIVE", "reads and writes", True),
+    (r"^ALTER TABLE .* ALTER COLUMN .* TYPE", "ACCESS EXCLUSIVE", "reads and writes (rewrites the table)", True),
+    (r"^ALTER TABLE .* ALTER COLUMN .* SET NOT NULL", "ACCESS EXCLUSIVE", "reads and writes", True),
+    (r"^ALTER TABLE .* ADD COLUMN .* DEFAULT .*(random|uuid|clock_timestamp)\(", "ACCESS EXCLUSIVE", "reads and writes (rewrites the table)", True),
+    (r"^ALTER TABLE .* (ATTACH|DETACH) PARTITION", "ACCESS EXCLUSIVE", "reads and writes", True),
+    (r"^ALTER TABLE", "ACCESS EXCLUSIVE", "reads and writes (brief)", False),
+    (r"^LOCK TABLE", None, "depends on the mode", False),
+    (r"^(UPDATE|DELETE) .* LIMIT ", "ROW EXCLUSIVE", "writes to the same rows (one batch at a time)", False),
+    (r"^(UPDATE|DELETE)", "ROW EXCLUSIVE", "writes to every matched row until commit", True),
+    (r"^INSERT INTO \w+ .*SELECT", "ROW EXCLUSIVE", "nothing, but reads the source table", True),
+    (r"^CREATE TABLE \w+ PARTITION OF", "ACCESS EXCLUSIVE", "reads and writes on the parent (brief)", False),
+    (r"^(CREATE|DROP) TRIGGER", "SHARE ROW EXCLUSIVE", "writes (brief)", False),
+    (r"^DROP TABLE", "ACCESS EXCLUSIVE", "reads and writes (brief)", False),
+]
+
+# the catch-all " ON <table>" (indexes, triggers) goes last so "ON DELETE" in a FK isn't taken for a table
+_TABLE_PATTERNS = [
+    r"^ALTER TABLE (?:ONLY )?(?:IF EXISTS )?(\w+)",
+    r"^LOCK TABLE (\w+)",
+    r"^UPDATE (\w+)",
+    r"^DELETE FROM (\w+)",
+    r"^DROP TABLE (?:IF EXISTS )?(\w+)",
+    r"^CREATE TABLE \w+ PARTITION OF (\w+)",
+    r"^INSERT INTO \w+ .*?FROM (\w+)",
+    r"^ALTER INDEX (\w+)",
+    r" ON (?:ONLY )?(\w+)",
+]
+
+
+def classify_statement(statement: str):
+    """(lock, blocks, table, scans) for one SQL statement, or None if it's harmless."""
+    flat = " ".join(statement.split())
+    for pattern, lock, blocks, scans in LOCK_RULES:
+        if re.search(pattern, flat, re.IGNORECASE):
+            break
+    else:
+        return None
+
+    if lock is None:
+        mode = re.search(r" IN ([\w ]+) MODE", flat, re.IGNORECASE)
+        lock = mode.group(1).upper() if mode else "ACCESS EXCLUSIVE"
+
+    table = None
+    for pattern in _TABLE_PATTERNS:
+        match = re.search(pattern, flat, re.IGNORECASE)
+        if match:
+            table = match.group(1)
+            break
+
+    return lock, blocks, table, scans
+
+
+def pending_sql(config, start: str, end: str = "head") -> str:
+    """The SQL `alembic upgrade start:end` would run, rendered offline (nothing is executed)."""
+    from alembic import command
+
+    buffer = io.StringIO()
+    config.output_buffer = buffer
+    command.upgrade(config, f"{start}:{end}" if start else end, sql=True)
+    return buffer.getvalue()
+
+
+def plan(config, engine, start: str = None, end: str = "head"):
+    """Rows of (statement, lock, blocks, table, rows, size_mb, est_seconds) for pending migrations."""
+    with engine.connect() as conn:
+        # a fresh database has no alembic_version yet and gets everything
+        if start is None and conn.execute(text("SELECT to_regclass('alembic_version')")).scalar():
+            start = conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+
+        sql = pending_sql(config, start, end)
+
+        report = []
+        for statement in sql.split(";\n"):
+            statement = "\n".join(
+                line for line in statement.strip().splitlines() if not line.startswith("--")
+            ).strip()
+            if not statement:
+                continue
+            classified = classify_statement(statement)
+            if classified is None:
+                continue
+
+            lock, blocks, table, scans = classified
+            if table == "alembic_version":
+                continue
+            # partitions count towards their parent
+            rows, size = conn.execute(text(
+                "SELECT coalesce(sum(c.reltuples), 0)::bigint, coalesce(sum(pg_total_relation_size(c.oid)), 0) "
+                "FROM pg_class c WHERE c.oid = to_regclass(:table) "
+                "OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = to_regclass(:table))"
+            ), {"table": table or ""}).one()
+            size_mb = size / 1024 / 1024
+            seconds = size_mb / MIGRATION_SCAN_MB_PER_SECOND if scans else 0.0
+            report.append((" ".join(statement.split())[:90], lock, blocks, table, max(rows, 0), round(size_mb, 1), round(seconds, 1)))
+
+    return start, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estimate the locks pending migrations would take (runs nothing).")
+    parser.add_argument("command", choices=["plan"])
+    parser.add_argument("--from", dest="start", help="start revision (default: what the database is at)")
+    parser.add_argument("--to", dest="end", default="head")
+    parser.add_argument("--config", default="alembic.ini")
+    args = parser.parse_args()
+
+    from alembic.config import Config
+    from app.database import engine
+
+    start, report = plan(Config(args.config), engine, args.start, args.end)
+    print(f"Upgrading {start or '<base>'} -> {args.end}: {len(report)} statement(s) take locks worth checking\n")
+
+    for statement, lock, blocks, table, rows, size_mb, seconds in report:
+        risky = seconds >= 1 and "writes" in blocks and "brief" not in blocks
+        print(f"{'!!' if risky else '  '} {lock:<24} {table or '?':<22} rows={rows:<10} {size_mb:>8} MB  ~{seconds}s")
+        print(f"   blocks: {blocks}")
+        print(f"   {statement}\n")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
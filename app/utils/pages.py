@@ -0,0 +1,74 @@
+from fastapi import Request, Response
+import gzip
+import hashlib
+
+from app.utils.cache import LocalCache
+from app.utils.tracing import span
+
+# Pages whose HTML never changes between requests
+STATIC_PAGES = ["index.html", "courses.html", "upload.html", "auth.html"]
+
+# Browsers revalidate every time, which is a cheap 304 once they have the ETag
+CACHE_CONTROL = "no-cache"
+
+
+class Page:
+    """Rendered HTML kept in memory, plus a gzipped copy and ETags for both."""
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.gzip_body = gzip.compress(body, compresslevel=9, mtime=0)
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        # a different representation needs its own strong ETag
+        self.gzip_etag = f'"{digest}-gz"'
+
+
+_static_pages = {}
+# course_detail only differs by course_id, keep the last few hundred around
+_course_pages = LocalCache(max_entries=512, ttl=24 * 3600)
+
+
+def render_page(templates, name: str, **context) -> Page:
+    with span("render_template", template=name):
+        return Page(templates.env.get_template(name).render(**context).encode())
+
+
+def prerender_pages(templates):
+    """Render every static page once (called at startup)."""
+    for name in STATIC_PAGES:
+        _static_pages[name] = render_page(templates, name)
+
+
+def static_page(templates, name: str) -> Page:
+    page = _static_pages.get(name)
+    if page is None:
+        page = _static_pages[name] = render_page(templates, name)
+    return page
+
+
+def course_page(templates, course_id: str) -> Page:
+    hit, page = _course_pages.get(course_id)
+    if not hit:
+        page = render_page(templates, "course_detail.html", course_id=course_id)
+        _course_pages.set(course_id, page)
+    return page
+
+
+def page_response(request: Request, page: Page) -> Response:
+    """Serve a Page with gzip when accepted and 304 when the client already has it."""
+    use_gzip = "gzip" in request.headers.get("accept-encoding", "")
+    etag = page.gzip_etag if use_gzip else page.etag
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        client_etags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if etag in client_etags or "*" in client_etags:
+            return Response(status_code=304, headers=headers)
+
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(page.gzip_body, media_type="text/html", headers=headers)
+
+    return Response(page.body, media_type="text/html", headers=headers)
@@ -0,0 +1,147 @@
+from collections import Counter
+from starlette.datastructures import Headers
+import anyio
+import hmac
+import logging
+import os
+import sys
+import threading
+import uuid
+
+from app.utils.cache import LocalCache
+
+logger = logging.getLogger("uvicorn.error")
+
+# How often the sampler looks at every thread's stack
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", 5))
+PROFILE_MAX_SECONDS = int(os.getenv("PROFILE_MAX_SECONDS", 60))
+# Requests sending "X-Profile: <token>" get profiled, unset turns the header off entirely
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+
+# Threads parked in one of these files are idle (pool workers waiting for work, the event loop in select)
+IDLE_FILES = ("threading.py", "selectors.py", "queue.py")
+
+# Per-request profiles, fetched afterwards from /api/admin/profile/requests/{id}
+request_profiles = LocalCache(max_entries=64, ttl=600)
+
+# One sampler per worker, two at once would just profile each other
+_running = threading.Lock()
+
+# "module:function:line" per code object, so a sample doesn't format the same strings again
+_labels = {}
+
+
+def _label(frame) -> str:
+    code = frame.f_code
+    label = _labels.get(code)
+    if label is None:
+        # co_qualname would be nicer but is 3.11+, the first line tells same-named methods apart
+        label = _labels[code] = f"{frame.f_globals.get('__name__', '?')}:{code.co_name}:{code.co_firstlineno}"
+    return label
+
+
+def collapse(frame):
+    """Root-first "a;b;c" stack for a frame, None when the thread is idle."""
+    if frame.f_code.co_filename.endswith(IDLE_FILES):
+        return None
+
+    labels = []
+    while frame is not None:
+        labels.append(_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return ";".join(labels)
+
+
+class SamplingProfiler:
+    """Samples the stack of every thread in this worker and counts them in collapsed-stack form.
+
+    Nothing is hooked into the interpreter, the cost is one thread waking up every
+    interval while a profile runs and nothing at all otherwise.
+    """
+
+    def __init__(self, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> bool:
+        """Start sampling, False if another profile is already running in this worker."""
+        if not _running.acquire(blocking=False):
+            return False
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+            _running.release()
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        try:
+            while not self._stop.wait(self.interval):
+                for ident, frame in sys._current_frames().items():
+                    if ident == own:
+                        continue
+                    stack = collapse(frame)
+                    if stack is None:
+                        continue
+                    name = names.get(ident)
+                    if name is None:
+                        names = {thread.ident: thread.name for thread in threading.enumerate()}
+                        name = names.get(ident, str(ident))
+                    self.stacks[f"{name};{stack}"] += 1
+                self.samples += 1
+        except Exception:
+            # otherwise the thread dies quietly and the profile just comes back empty
+            logger.exception("Profiler stopped sampling after %d samples", self.samples)
+
+    def collapsed(self) -> str:
+        """One "stack count" line per distinct stack, the input flamegraph.pl and speedscope expect."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileRequestMiddleware:
+    """Profiles requests that send "X-Profile: <PROFILE_TOKEN>".
+
+    The response carries an X-Profile-Id to fetch the stacks with from
+    /api/admin/profile/requests/{id}. Every thread is sampled, so concurrent
+    requests in the same worker show up too - reproduce on a quiet worker.
+    Only added to the app when PROFILE_TOKEN is set.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        token = Headers(scope=scope).get("x-profile")
+        if token is None or not hmac.compare_digest(token.encode(), PROFILE_TOKEN.encode()):
+            return await self.app(scope, receive, send)
+
+        profiler = SamplingProfiler(interval_ms=1)
+        if not profiler.start():
+            return await self.app(scope, receive, send)
+
+        profile_id = uuid.uuid4().hex
+
+        async def tagged_send(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, tagged_send)
+        finally:
+            # stop() joins the sampler thread, keep that off the event loop
+            await anyio.to_thread.run_sync(profiler.stop)
+            request_profiles.set(profile_id, profiler.collapsed())
\ No newline at end of file
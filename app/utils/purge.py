@@ -0,0 +1,71 @@
+from datetime import datetime, timezone
+from sqlalchemy import delete, select
+from uuid import UUID
+import os
+import time
+
+from app.database import SessionLocal
+from app.models.course import Course
+from app.models.note import Note
+from app.utils.cache import invalidate
+
+# How many notes get deleted per transaction while purging a course
+PURGE_CHUNK_SIZE = int(os.getenv("PURGE_CHUNK_SIZE", 500))
+# Pause between chunks so the purge doesn't starve normal traffic
+PURGE_CHUNK_PAUSE_MS = int(os.getenv("PURGE_CHUNK_PAUSE_MS", 50))
+
+
+def soft_delete_course(db, course_id: UUID) -> bool:
+    """Hide a course right away. Returns False if it doesn't exist."""
+    updated = db.query(Course).filter(
+        Course.id == course_id,
+        Course.deleted_at.is_(None)
+    ).update({"deleted_at": datetime.now(timezone.utc)}, synchronize_session=False)
+    db.commit()
+    return updated > 0
+
+
+def purge_course(course_id: UUID, chunk_size: int = PURGE_CHUNK_SIZE):
+    """Delete a soft-deleted course's notes in small chunks, then the course itself."""
+    db = SessionLocal()
+    try:
+        while True:
+            # each chunk is its own short transaction so row locks are released quickly
+            chunk = select(Note.id).where(Note.course_id == course_id).limit(chunk_size)
+            result = db.execute(
+                delete(Note).where(Note.course_id == course_id, Note.id.in_(chunk)),
+                execution_options={"synchronize_session": False}
+            )
+            db.commit()
+
+            if result.rowcount < chunk_size:
+                break
+
+            time.sleep(PURGE_CHUNK_PAUSE_MS / 1000)
+
+        db.query(Course).filter(
+            Course.id == course_id,
+            Course.deleted_at.isnot(None)
+        ).delete(synchronize_session=False)
+        db.commit()
+        invalidate("note")
+    finally:
+        db.close()
+
+
+def purge_pending_courses():
+    """Finish purges that were interrupted (e.g. by a restart)."""
+    db = SessionLocal()
+    try:
+        course_ids = [row.id for row in db.query(Course.id).filter(Course.deleted_at.isnot(None)).all()]
+    finally:
+        db.close()
+
+    for course_id in course_ids:
+        purge_course(course_id)
+
+    return len(course_ids)
+
+
+if __name__ == "__main__":
+    print(f"Purged {purge_pending_courses()} soft-deleted course(s)")
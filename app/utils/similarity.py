@@ -0,0 +1,270 @@
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, insert, select, text, union
+import argparse
+import logging
+import os
+import re
+import threading
+
+from app.database import SessionLocal, upsert
+from app.models.content import NoteContent
+from app.models.note import Note
+from app.models.similarity import NoteSimilarity
+from app.models.sync_state import SyncState
+from app.utils.cache import invalidate
+
+logger = logging.getLogger("uvicorn.error")
+
+# Similarity configuration
+SIMILAR_TOP_K = int(os.getenv("SIMILAR_TOP_K", 10))
+SIMILARITY_MIN_SCORE = float(os.getenv("SIMILARITY_MIN_SCORE", 0.05))
+# Rows per sparse matrix product - bounds the size of each score matrix
+SIMILARITY_BATCH_SIZE = int(os.getenv("SIMILARITY_BATCH_SIZE", 512))
+# Extracted text used per note; the start of a document says most of what it is about
+SIMILARITY_MAX_CHARS = int(os.getenv("SIMILARITY_MAX_CHARS", 20000))
+# In-process refresher, off by default: a pass re-vectorizes the whole corpus, so production runs
+# `python -m app.utils.similarity` as a cron job (render.yaml) instead of in every web worker
+SIMILARITY_REFRESH_SECONDS = int(os.getenv("SIMILARITY_REFRESH_SECONDS", 0))
+
+# A changed note is also offered to this many of its own best matches' lists
+REVERSE_CANDIDATES = SIMILAR_TOP_K * 4
+
+# Re-read a little before the last pass in case a write committed late
+WATERMARK_OVERLAP = timedelta(minutes=1)
+
+# Arbitrary constant so only one worker runs a pass at a time
+ADVISORY_LOCK_KEY = 731002
+
+# sync_state key holding when the last pass started (unix microseconds)
+LAST_PASS_KEY = "similarity_last_pass"
+
+# numpy/scipy are imported inside the functions that need them, so main.py can import
+# this module without every worker paying for them at startup
+
+_TOKEN = re.compile(r"[a-z][a-z0-9]+")
+STOP_WORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the this to was were will with
+lecture lectures note notes week chapter page pdf
+""".split())
+
+
+def tokenize(title: str, description, content) -> list:
+    # the title goes in twice, it says more about the note than any other sentence
+    text = " ".join((title, title, description or "", content or "")).lower()
+    return [token for token in _TOKEN.findall(text) if token not in STOP_WORDS]
+
+
+def tfidf_matrix(documents):
+    """L2-normalized TF-IDF rows (sublinear tf, smoothed idf) for tokenized documents."""
+    import numpy as np
+    from scipy import sparse
+
+    vocabulary = {}
+    indptr, indices, counts = [0], [], []
+    for tokens in documents:
+        for term, count in Counter(tokens).items():
+            indices.append(vocabulary.setdefault(term, len(vocabulary)))
+            counts.append(count)
+        indptr.append(len(indices))
+
+    tf = sparse.csr_matrix(
+        (np.asarray(counts, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+        shape=(len(documents), len(vocabulary))
+    )
+    tf.data = 1 + np.log(tf.data)
+
+    document_frequency = np.bincount(tf.indices, minlength=len(vocabulary))
+    idf = (np.log((1 + len(documents)) / (1 + document_frequency)) + 1).astype(np.float32)
+    weighted = tf @ sparse.diags(idf)
+
+    norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return (sparse.diags(1 / norms) @ weighted).tocsr()
+
+
+def top_neighbours(matrix, transposed, rows, courses, k: int):
+    """Best cosine matches in other courses for each of `rows`, from one sparse product."""
+    import numpy as np
+
+    scores = (matrix[rows] @ transposed).tocsr()
+    neighbours = {}
+    for i, row in enumerate(rows):
+        start, end = scores.indptr[i], scores.indptr[i + 1]
+        columns, values = scores.indices[start:end], scores.data[start:end]
+
+        keep = (courses[columns] != courses[row]) & (values >= SIMILARITY_MIN_SCORE)
+        columns, values = columns[keep], values[keep]
+        if len(values) > k:
+            best = np.argpartition(-values, k)[:k]
+            columns, values = columns[best], values[best]
+
+        order = np.argsort(-values, kind="stable")
+        neighbours[row] = list(zip(columns[order].tolist(), values[order].tolist()))
+    return neighbours
+
+
+def _load_corpus(db):
+    return db.query(
+        Note.id, Note.course_id, Note.title, Note.description,
+        func.left(NoteContent.content, SIMILARITY_MAX_CHARS).label("content")
+    ).outerjoin(NoteContent, NoteContent.note_id == Note.id).order_by(Note.id).all()
+
+
+def _changed_since(db, since):
+    """Notes created, edited or (re)indexed since the last pass."""
+    return set(db.execute(union(
+        select(Note.id).where(func.coalesce(Note.updated_at, Note.created_at) > since),
+        select(NoteContent.note_id).where(NoteContent.indexed_at > since),
+    )).scalars())
+
+
+def _last_pass(db):
+    value = db.query(SyncState.value).filter(SyncState.key == LAST_PASS_KEY).scalar()
+    if value is None:
+        # lists written before the watermark was kept
+        return db.query(func.max(NoteSimilarity.computed_at)).scalar()
+    return datetime.fromtimestamp(value / 1_000_000, timezone.utc)
+
+
+def _save_last_pass(db, started: datetime):
+    stmt = upsert(SyncState).values(key=LAST_PASS_KEY, value=int(started.timestamp() * 1_000_000))
+    db.execute(stmt.on_conflict_do_update(index_elements=["key"], set_={"value": stmt.excluded.value}))
+
+
+def refresh_similarities(db, full: bool = False) -> int:
+    """Recompute neighbour lists. Returns how many notes got a new list, -1 if another worker is on it."""
+    import numpy as np
+
+    if not db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": ADVISORY_LOCK_KEY}).scalar():
+        db.rollback()
+        return -1
+
+    now = datetime.now(timezone.utc)
+    last_pass = _last_pass(db)
+    # IDF drifts as the corpus grows, so a periodic --full keeps old scores honest
+    full = full or last_pass is None
+
+    # checked before the corpus is loaded, so a pass with nothing to do costs two index scans
+    changed = None if full else _changed_since(db, last_pass - WATERMARK_OVERLAP)
+    if changed is not None and not changed:
+        _save_last_pass(db, now)
+        db.commit()
+        return 0
+
+    corpus = _load_corpus(db)
+    if not corpus:
+        _save_last_pass(db, now)
+        db.commit()
+        return 0
+
+    note_ids = [row.id for row in corpus]
+    course_ids = [row.course_id for row in corpus]
+    course_index = {course_id: i for i, course_id in enumerate(dict.fromkeys(course_ids))}
+    courses = np.asarray([course_index[course_id] for course_id in course_ids], dtype=np.int32)
+
+    matrix = tfidf_matrix([tokenize(row.title, row.description, row.content) for row in corpus])
+    transposed = matrix.T.tocsr()
+
+    if full:
+        dirty = list(range(len(corpus)))
+    else:
+        dirty = [i for i, note_id in enumerate(note_ids) if note_id in changed]
+
+    lists = {}
+    offers = {}  # unchanged note -> [(changed note, score)] that might now make its list
+    for start in range(0, len(dirty), SIMILARITY_BATCH_SIZE):
+        batch = dirty[start:start + SIMILARITY_BATCH_SIZE]
+        k = SIMILAR_TOP_K if full else REVERSE_CANDIDATES
+        for row, neighbours in top_neighbours(matrix, transposed, batch, courses, k).items():
+            lists[row] = neighbours[:SIMILAR_TOP_K]
+            if not full:
+                for other, score in neighbours:
+                    offers.setdefault(other, []).append((row, score))
+
+    # cosine is symmetric: merge changed notes into the stored lists of the notes they match
+    offers = {other: candidates for other, candidates in offers.items() if other not in lists}
+    if offers:
+        row_of = {note_id: i for i, note_id in enumerate(note_ids)}
+        stored = {}
+        for existing in db.query(NoteSimilarity).filter(
+            NoteSimilarity.note_id.in_([note_ids[other] for other in offers])
+        ).order_by(NoteSimilarity.note_id, NoteSimilarity.rank):
+            if existing.similar_note_id in row_of:
+                stored.setdefault(row_of[existing.note_id], []).append((row_of[existing.similar_note_id], existing.score))
+
+        for other, candidates in offers.items():
+            merged = dict(stored.get(other, []))
+            merged.update(candidates)  # fresh scores win over stale ones for the same note
+            best = sorted(merged.items(), key=lambda item: item[1], reverse=True)[:SIMILAR_TOP_K]
+            if best != stored.get(other, []):
+                lists[other] = best
+
+    if full:
+        db.query(NoteSimilarity).delete(synchronize_session=False)
+    else:
+        changed_ids = [note_ids[row] for row in lists]
+        for start in range(0, len(changed_ids), 1000):
+            db.query(NoteSimilarity).filter(
+                NoteSimilarity.note_id.in_(changed_ids[start:start + 1000])
+            ).delete(synchronize_session=False)
+
+    rows = [{
+        "note_id": note_ids[row],
+        "course_id": course_ids[row],
+        "rank": rank,
+        "similar_note_id": note_ids[other],
+        "similar_course_id": course_ids[other],
+        "score": round(score, 6),
+        "computed_at": now,
+    } for row, neighbours in lists.items() for rank, (other, score) in enumerate(neighbours, start=1)]
+    for start in range(0, len(rows), 5000):
+        db.execute(insert(NoteSimilarity), rows[start:start + 5000])
+
+    # advanced even when no list changed, so the same notes aren't picked up again next time
+    _save_last_pass(db, now)
+    db.commit()
+    if lists:
+        invalidate("note")
+    return len(lists)
+
+
+class SimilarityRefresher:
+    """Background thread that runs an incremental pass every SIMILARITY_REFRESH_SECONDS."""
+
+    def __init__(self, interval: int = SIMILARITY_REFRESH_SECONDS):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="similarity-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            db = SessionLocal()
+            try:
+                refresh_similarities(db)
+            except Exception as exc:
+                logger.warning("Similarity refresh failed: %s", exc)
+            finally:
+                db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute similar notes from TF-IDF vectors.")
+    parser.add_argument("--full", action="store_true", help="rebuild every list (refreshes IDF weights)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        updated = refresh_similarities(db, full=args.full)
+        print("Another worker holds the similarity lock" if updated < 0 else f"Updated {updated} note(s)")
+    finally:
+        db.close()
\ No newline at end of file
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, func, text
+import os
+
+from app.database import SessionLocal, engine, upsert
+from app.models.course import Course
+from app.models.note import Note
+from app.models.sync import SyncTombstone
+from app.models.sync_state import SyncState
+
+# How long deletes stay visible to clients that haven't synced
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", 30))
+
+# sync_state key: highest change_seq whose tombstones have been pruned
+HORIZON_KEY = "tombstone_horizon"
+
+
+def sync_upper_bound(db) -> int:
+    """Oldest transaction still running. Everything below it has committed (or never will),
+    so a sync can hand out this value as its token without skipping a late commit."""
+    if engine.dialect.name != "postgresql":
+        # no trigger stamps change_seq here (SQLite), every row keeps its 0, so a sync is always
+        # the full download from since=0 and deletes leave no tombstones
+        return max(db.query(func.coalesce(func.max(model.change_seq), 0)).scalar() for model in (Course, Note, SyncTombstone)) + 1
+    return db.execute(text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")).scalar()
+
+
+def tombstone_horizon(db) -> int:
+    state = db.get(SyncState, HORIZON_KEY)
+    return state.value if state else 0
+
+
+def prune_tombstones(retention_days: int = SYNC_TOMBSTONE_RETENTION_DAYS) -> int:
+    """Drop old tombstones and move the horizon up. Returns how many were removed."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+
+    db = SessionLocal()
+    try:
+        horizon = db.query(func.max(SyncTombstone.change_seq)).filter(SyncTombstone.deleted_at < cutoff).scalar()
+        if horizon is None:
+            return 0
+
+        # record the horizon first so no client ever sees a gap without a 410
+        stmt = upsert(SyncState).values(key=HORIZON_KEY, value=horizon)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["key"],
+            set_={"value": func.greatest(SyncState.value, stmt.excluded.value)}
+        ))
+        pruned = db.execute(delete(SyncTombstone).where(SyncTombstone.change_seq <= horizon)).rowcount
+        db.commit()
+        return pruned
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print(f"Pruned {prune_tombstones()} tombstone(s)")
\ No newline at end of file
@@ -0,0 +1,360 @@
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from starlette.datastructures import Headers
+import json
+import logging
+import os
+import random
+import threading
+import time
+import urllib.request
+
+logger = logging.getLogger("uvicorn.error")
+
+# Share of requests whose full trace gets exported (slow requests always are)
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 0.01))
+# "" (off), "file" or "otlp"
+TRACE_EXPORT = os.getenv("TRACE_EXPORT", "")
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.ndjson")
+# OTLP/HTTP JSON endpoint of a local collector
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACE_FLUSH_SECONDS = float(os.getenv("TRACE_FLUSH_SECONDS", 5))
+TRACE_BUFFER_SIZE = 1000
+# Slow log thresholds, written for every request/statement regardless of sampling
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", 500))
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 100))
+
+# SQL text is kept to this many characters, bound parameters are never recorded
+MAX_STATEMENT_CHARS = 500
+
+SERVICE_NAME = "study-snipps"
+
+_current_trace = ContextVar("trace", default=None)
+_current_span = ContextVar("span", default=None)
+
+
+def _span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+class Trace:
+    """Spans recorded for one request. Times are perf_counter seconds."""
+
+    def __init__(self, method: str, path: str, trace_id: str = None, parent_id: str = None, sampled: bool = False):
+        self.trace_id = trace_id or f"{random.getrandbits(128):032x}"
+        self.root_id = _span_id()
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.method = method
+        self.path = path
+        self.status = 500
+        self.start_ns = time.time_ns()
+        self.started = time.perf_counter()
+        self.ended = None
+        # (span id, parent id, name, started, ended, attrs), appended from the event loop and pool threads
+        self.spans = []
+
+    @property
+    def ms(self) -> float:
+        return ((self.ended or time.perf_counter()) - self.started) * 1000
+
+    def add(self, name: str, started: float, ended: float, parent: str = None, **attrs) -> str:
+        span_id = _span_id()
+        self.spans.append((span_id, parent or self.root_id, name, started, ended, attrs))
+        return span_id
+
+    def breakdown(self) -> dict:
+        """Total ms and count per span name, what the slow log shows."""
+        totals = {}
+        for _, _, name, started, ended, _ in self.spans:
+            entry = totals.setdefault(name, {"ms": 0.0, "count": 0})
+            entry["ms"] += (ended - started) * 1000
+            entry["count"] += 1
+        return {name: {"ms": round(entry["ms"], 2), "count": entry["count"]} for name, entry in totals.items()}
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "start_ns": self.start_ns,
+            "ms": round(self.ms, 3),
+            "spans": [
+                {
+                    "id": span_id,
+                    "parent": parent,
+                    "name": name,
+                    "start_ms": round((started - self.started) * 1000, 3),
+                    "ms": round((ended - started) * 1000, 3),
+                    **({"attrs": attrs} if attrs else {}),
+                }
+                for span_id, parent, name, started, ended, attrs in self.spans
+            ],
+        }
+
+
+def current_trace_id():
+    trace = _current_trace.get()
+    return trace.trace_id if trace is not None else None
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Time a block as a child of the current span. Does nothing outside a traced request."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+
+    parent = _current_span.get() or trace.root_id
+    span_id = _span_id()
+    token = _current_span.set(span_id)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        ended = time.perf_counter()
+        _current_span.reset(token)
+        trace.spans.append((span_id, parent, name, started, ended, attrs))
+
+
+def _traced_async(name: str, func):
+    async def wrapper(*args, **kwargs):
+        with span(name):
+            return await func(*args, **kwargs)
+    wrapper.traced = True
+    return wrapper
+
+
+def instrument_fastapi():
+    """Spans for dependency resolution, the endpoint and response serialization.
+
+    FastAPI has no hooks around these, so the functions its request handler
+    looks up on fastapi.routing are wrapped instead.
+    """
+    from fastapi import routing
+    if getattr(routing.solve_dependencies, "traced", False):
+        return
+    routing.solve_dependencies = _traced_async("dependencies", routing.solve_dependencies)
+    routing.run_endpoint_function = _traced_async("endpoint", routing.run_endpoint_function)
+    routing.serialize_response = _traced_async("serialize", routing.serialize_response)
+
+
+def _log_slow(kind: str, **fields):
+    logger.warning(json.dumps({"event": kind, **fields}, default=str))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._trace_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_trace_started", None)
+    if started is None:
+        return
+    ended = time.perf_counter()
+    ms = (ended - started) * 1000
+
+    # only the statement text, which is parameterized, so no user data ends up in traces or logs
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add("sql", started, ended, _current_span.get(), statement=statement[:MAX_STATEMENT_CHARS], rows=cursor.rowcount)
+    if ms >= SLOW_QUERY_MS:
+        _log_slow("slow_query", ms=round(ms, 2), statement=statement[:MAX_STATEMENT_CHARS], trace_id=current_trace_id())
+
+
+def instrument_engine(engine):
+    """SQL spans for every statement plus the slow query log."""
+    from sqlalchemy import event
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _parse_traceparent(value):
+    """(trace id, parent span id, sampled) from a W3C traceparent header, None if malformed."""
+    parts = (value or "").split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        return parts[1], parts[2], bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+
+
+class TraceBuffer:
+    """Finished traces waiting for the exporter. Full means the oldest are dropped."""
+
+    def __init__(self, capacity: int = TRACE_BUFFER_SIZE):
+        self._traces = deque(maxlen=capacity)
+        self.exported = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def add(self, trace: Trace):
+        if len(self._traces) == self._traces.maxlen:
+            self.dropped += 1
+        self._traces.append(trace)
+
+    def drain(self) -> list:
+        traces = []
+        while self._traces:
+            traces.append(self._traces.popleft())
+        return traces
+
+
+trace_buffer = TraceBuffer()
+
+
+class TracingMiddleware:
+    """Gives every request a trace (id in X-Trace-Id), writes the slow request log and queues sampled traces."""
+
+    def __init__(self, app, sample_rate: float = TRACE_SAMPLE_RATE):
+        self.app = app
+        # nothing to export to means nothing is sampled
+        self.sample_rate = sample_rate if TRACE_EXPORT else 0.0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        incoming = _parse_traceparent(Headers(scope=scope).get("traceparent"))
+        if incoming is not None:
+            trace_id, parent_id, sampled = incoming
+            trace = Trace(scope["method"], scope["path"], trace_id, parent_id, sampled and self.sample_rate > 0)
+        else:
+            trace = Trace(scope["method"], scope["path"], sampled=random.random() < self.sample_rate)
+
+        async def traced_send(message):
+            if message["type"] == "http.response.start":
+                trace.status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-trace-id", trace.trace_id.encode())]
+            await send(message)
+
+        token = _current_trace.set(trace)
+        try:
+            await self.app(scope, receive, traced_send)
+        finally:
+            _current_trace.reset(token)
+            trace.ended = time.perf_counter()
+            self._finish(trace)
+
+    def _finish(self, trace: Trace):
+        ms = trace.ms
+        slow = ms >= SLOW_REQUEST_MS
+        if slow:
+            _log_slow(
+                "slow_request", trace_id=trace.trace_id, method=trace.method, path=trace.path,
+                status=trace.status, ms=round(ms, 2), spans=trace.breakdown()
+            )
+        # slow requests are exported too, so the trace id in the slow log can be looked up
+        if TRACE_EXPORT and (trace.sampled or slow):
+            trace_buffer.add(trace)
+
+
+def _otlp_attributes(attrs: dict) -> list:
+    values = []
+    for key, value in attrs.items():
+        if isinstance(value, bool):
+            values.append({"key": key, "value": {"boolValue": value}})
+        elif isinstance(value, int):
+            values.append({"key": key, "value": {"intValue": str(value)}})
+        else:
+            values.append({"key": key, "value": {"stringValue": str(value)}})
+    return values
+
+
+def to_otlp(traces: list) -> dict:
+    """OTLP/HTTP JSON body for a batch of traces."""
+    spans = []
+    for trace in traces:
+        def unix_ns(perf: float) -> str:
+            return str(trace.start_ns + int((perf - trace.started) * 1e9))
+
+        root = {
+            "traceId": trace.trace_id,
+            "spanId": trace.root_id,
+            "name": f"{trace.method} {trace.path}",
+            "kind": 2,  # SERVER
+            "startTimeUnixNano": unix_ns(trace.started),
+            "endTimeUnixNano": unix_ns(trace.ended),
+            "attributes": _otlp_attributes({
+                "http.request.method": trace.method,
+                "url.path": trace.path,
+                "http.response.status_code": trace.status,
+            }),
+        }
+        if trace.parent_id:
+            root["parentSpanId"] = trace.parent_id
+        spans.append(root)
+
+        for span_id, parent, name, started, ended, attrs in trace.spans:
+            spans.append({
+                "traceId": trace.trace_id,
+                "spanId": span_id,
+                "parentSpanId": parent,
+                "name": name,
+                "kind": 3 if name == "sql" else 1,  # CLIENT / INTERNAL
+                "startTimeUnixNano": unix_ns(started),
+                "endTimeUnixNano": unix_ns(ended),
+                "attributes": _otlp_attributes(attrs),
+            })
+
+    return {"resourceSpans": [{
+        "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME})},
+        "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+    }]}
+
+
+def export(traces: list, target: str = TRACE_EXPORT):
+    if target == "file":
+        with open(TRACE_FILE, "a") as f:
+            f.write("".join(json.dumps(trace.to_dict(), default=str) + "\n" for trace in traces))
+    elif target == "otlp":
+        request = urllib.request.Request(
+            TRACE_OTLP_ENDPOINT,
+            data=json.dumps(to_otlp(traces), default=str).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=5):
+            pass
+
+
+class TraceExporter:
+    """Background thread that ships buffered traces every TRACE_FLUSH_SECONDS."""
+
+    def __init__(self, buffer: TraceBuffer = trace_buffer, interval: float = TRACE_FLUSH_SECONDS):
+        self.buffer = buffer
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        self._flush()
+
+    def _flush(self):
+        traces = self.buffer.drain()
+        if not traces:
+            return
+        try:
+            export(traces)
+            self.buffer.exported += len(traces)
+        except Exception as exc:
+            self.buffer.failed += len(traces)
+            logger.warning("Trace export failed: %s", exc)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._flush()
\ No newline at end of file
@@ -0,0 +1,143 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import text
+import logging
+import math
+import os
+import threading
+
+from app.database import SessionLocal, engine
+
+logger = logging.getLogger("uvicorn.error")
+
+# Trending configuration
+TRENDING_HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", 72))
+TRENDING_VIEW_WEIGHT = float(os.getenv("TRENDING_VIEW_WEIGHT", 1))
+TRENDING_DOWNLOAD_WEIGHT = float(os.getenv("TRENDING_DOWNLOAD_WEIGHT", 3))
+TRENDING_VOTE_WEIGHT = float(os.getenv("TRENDING_VOTE_WEIGHT", 5))
+# a fresh upload counts as a bit of activity so new notes can show up at all
+TRENDING_NEW_NOTE_WEIGHT = float(os.getenv("TRENDING_NEW_NOTE_WEIGHT", 4))
+TRENDING_REFRESH_SECONDS = int(os.getenv("TRENDING_REFRESH_SECONDS", 300))
+
+# Scores are ln(sum(weight * exp(decay * (t - EPOCH)))). Dividing every score by the
+# same exp(decay * now) doesn't change the order, so notes without new activity
+# keep a valid score and only notes that changed have to be rescored.
+EPOCH = datetime(2025, 1, 1)
+DECAY_PER_HOUR = math.log(2) / TRENDING_HALF_LIFE_HOURS
+
+# Re-read a little before the last pass in case a write committed late
+WATERMARK_OVERLAP = timedelta(minutes=1)
+
+# Arbitrary constant so only one worker runs a pass at a time
+ADVISORY_LOCK_KEY = 731001
+
+SCORE_SQL = """
+WITH touched AS ({touched}),
+terms AS (
+    SELECT n.id AS note_id, n.course_id, :new_note_weight AS weight,
+           extract(epoch FROM n.created_at - :epoch) / 3600 * :decay AS exponent
+    FROM notes n JOIN touched t ON t.note_id = n.id
+    UNION ALL
+    SELECT a.note_id, n.course_id,
+           a.views * :view_weight + a.downloads * :download_weight + a.votes * :vote_weight,
+           extract(epoch FROM (a.day + interval '12 hours') - :epoch) / 3600 * :decay
+    FROM note_activity_daily a
+    JOIN touched t ON t.note_id = a.note_id
+    JOIN notes n ON n.id = a.note_id AND n.course_id = a.course_id
+),
+peaks AS (
+    SELECT note_id, course_id, max(exponent) AS peak
+    FROM terms WHERE weight > 0
+    GROUP BY note_id, course_id
+)
+INSERT INTO note_trending (note_id, course_id, score, scored_at)
+SELECT p.note_id, p.course_id, p.peak + ln(sum(t.weight * exp(greatest(t.exponent - p.peak, -700)))), :now
+FROM peaks p JOIN terms t ON t.note_id = p.note_id AND t.weight > 0
+GROUP BY p.note_id, p.course_id, p.peak
+ON CONFLICT (note_id) DO UPDATE
+SET score = EXCLUDED.score, course_id = EXCLUDED.course_id, scored_at = EXCLUDED.scored_at
+"""
+
+# Notes created or with activity since the last pass
+CHANGED_SINCE = """
+    SELECT id AS note_id FROM notes WHERE created_at > :since
+    UNION
+    SELECT note_id FROM note_activity_daily WHERE updated_at > :since
+"""
+
+
+def _score_params(now):
+    return {
+        "epoch": EPOCH,
+        "decay": DECAY_PER_HOUR,
+        "view_weight": TRENDING_VIEW_WEIGHT,
+        "download_weight": TRENDING_DOWNLOAD_WEIGHT,
+        "vote_weight": TRENDING_VOTE_WEIGHT,
+        "new_note_weight": TRENDING_NEW_NOTE_WEIGHT,
+        "now": now,
+    }
+
+
+def rescore_notes(db, note_ids):
+    """Recompute the trending score of specific notes (caller commits)."""
+    # SCORE_SQL is postgres only, and trending isn't refreshed anywhere else either
+    if not note_ids or engine.dialect.name != "postgresql":
+        return
+    db.execute(
+        text(SCORE_SQL.format(touched="SELECT unnest(CAST(:note_ids AS uuid[])) AS note_id")),
+        {**_score_params(datetime.now(timezone.utc)), "note_ids": [str(note_id) for note_id in note_ids]}
+    )
+
+
+def refresh_trending(db) -> bool:
+    """One incremental pass. Returns False if another worker is already running one."""
+    if not db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": ADVISORY_LOCK_KEY}).scalar():
+        db.rollback()
+        return False
+
+    now = datetime.now(timezone.utc)
+    last_pass = db.execute(text("SELECT max(scored_at) FROM note_trending")).scalar()
+    # empty table means first run, score everything
+    since = last_pass - WATERMARK_OVERLAP if last_pass else datetime.min
+
+    db.execute(
+        text(SCORE_SQL.format(touched=CHANGED_SINCE)),
+        {**_score_params(now), "since": since}
+    )
+    db.commit()
+    return True
+
+
+class TrendingRefresher:
+    """Background thread that runs a pass every TRENDING_REFRESH_SECONDS."""
+
+    def __init__(self, interval: int = TRENDING_REFRESH_SECONDS):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="trending-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            db = SessionLocal()
+            try:
+                refresh_trending(db)
+            except Exception as exc:
+                logger.warning("Trending refresh failed: %s", exc)
+            finally:
+                db.close()
+
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        print("Trending refreshed" if refresh_trending(db) else "Another worker holds the trending lock")
+    finally:
+        db.close()
@@ -0,0 +1,141 @@
+"""Benchmark the course-filtered note listing (GET /api/note/?course_id=).
+
+Meant to be run against the same data before and after the notes table is
+partitioned, so the two runs can be compared:
+
+    python scripts/bench_course_listing.py --seed --save before.json
+    alembic upgrade head
+    python scripts/bench_course_listing.py --save after.json --compare before.json
+
+Reports wall-clock latency of the route itself plus, from EXPLAIN (ANALYZE,
+BUFFERS), the server execution time, buffers touched and how many notes
+partitions the plan actually scanned.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+# Add parent directory to path so we can import our app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import text
+
+from app.database import engine, SessionLocal
+from app.models import Course
+from app.api import note
+from app.utils import cache
+from explain_routes import seed, call_route, capture_statements, explain, walk
+
+
+def is_partitioned(db) -> bool:
+    return db.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'notes'::regclass)"
+    )).scalar()
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def run(db, course_ids, repeat: int) -> dict:
+    latencies = []
+    for _ in range(repeat):
+        for course_id in course_ids:
+            started = time.perf_counter()
+            call_route(note.get_all_notes, db=db, course_id=course_id)
+            latencies.append((time.perf_counter() - started) * 1000)
+            db.rollback()
+
+    execution_ms, buffers, partitions = [], [], []
+    for course_id in course_ids:
+        for statement, parameters in capture_statements(lambda: call_route(note.get_all_notes, db=db, course_id=course_id)):
+            if "notes" not in statement:
+                continue
+            result = explain(statement, parameters)
+            execution_ms.append(result["Execution Time"])
+            buffers.append(sum(
+                node.get("Shared Hit Blocks", 0) + node.get("Shared Read Blocks", 0)
+                for node, parent in walk(result["Plan"]) if parent is None
+            ))
+            partitions.append(len({
+                node["Relation Name"] for node, _ in walk(result["Plan"])
+                if node.get("Relation Name", "").startswith("notes")
+            }))
+
+    return {
+        "partitioned": is_partitioned(db),
+        "courses": len(course_ids),
+        "requests": len(latencies),
+        "route_p50_ms": round(percentile(latencies, 0.50), 3),
+        "route_p95_ms": round(percentile(latencies, 0.95), 3),
+        "route_mean_ms": round(statistics.mean(latencies), 3),
+        "execution_mean_ms": round(statistics.mean(execution_ms), 3),
+        "buffers_mean": round(statistics.mean(buffers), 1),
+        "notes_tables_scanned": max(partitions),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", action="store_true", help="insert fake data before benchmarking")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--courses", type=int, default=2000)
+    parser.add_argument("--notes-per-course", type=int, default=100)
+    parser.add_argument("--sample", type=int, default=50, help="how many courses to list")
+    parser.add_argument("--repeat", type=int, default=5, help="passes over the sampled courses")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file from an earlier run to compare against")
+    parser.add_argument("--force", action="store_true", help="allow seeding a non-local database")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        sys.exit("Partitioning is postgres only")
+
+    if args.seed:
+        if engine.url.host not in ("localhost", "127.0.0.1", None) and not args.force:
+            sys.exit(f"Refusing to seed {engine.url.host} - point DATABASE_URL at a local db or pass --force")
+        print(f"Seeding {args.users} users, {args.courses} courses, {args.courses * args.notes_per_course} notes...")
+        seed(args.users, args.courses, args.notes_per_course)
+
+    # we want the queries, not cached results
+    cache.CACHE_ENABLED = False
+
+    db = SessionLocal()
+    try:
+        # same sample on every run so before/after are comparable
+        course_ids = [row.id for row in db.query(Course.id).order_by(Course.course_code).all()]
+        if not course_ids:
+            sys.exit("Database is empty - run with --seed first")
+        course_ids = random.Random(1236).sample(course_ids, min(args.sample, len(course_ids)))
+
+        results = run(db, course_ids, args.repeat)
+    finally:
+        db.close()
+
+    for key, value in results.items():
+        print(f"{key:>22}: {value}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nvs {args.compare} (partitioned={baseline['partitioned']}):")
+        for key, value in results.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and baseline.get(key):
+                print(f"{key:>22}: {baseline[key]} -> {value} ({(value - baseline[key]) / baseline[key] * 100:+.1f}%)")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,197 @@
+"""Benchmark the write routes (course/note create, update, delete).
+
+Counts the round trips each route makes to the database (statements plus
+COMMIT/ROLLBACK) and times it. Run it on the commit before and after a change
+to the write path and compare:
+
+    git checkout <before>
+    python scripts/bench_writes.py --save before.json
+    git checkout <after>
+    python scripts/bench_writes.py --save after.json --compare before.json
+
+Against a local database every round trip costs almost nothing, so
+--rtt-ms adds that much sleep per round trip to mimic a hosted database.
+Everything the benchmark creates is deleted again at the end.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+
+# Add parent directory to path so we can import our app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from fastapi import BackgroundTasks
+from sqlalchemy import event
+
+from app.database import engine, SessionLocal
+from app.models import Course, User
+from app.api import course, note
+from app.schemas.course import CourseCreate, CourseUpdate
+from app.schemas.note import NoteCreate, NoteUpdate
+from explain_routes import call_route
+
+BENCH_CODE_PREFIX = "BW"
+
+
+class RoundTrips:
+    """Counts (and optionally delays) every statement, commit and rollback sent to the db."""
+
+    def __init__(self, rtt_ms: float = 0):
+        self.rtt = rtt_ms / 1000
+        self.count = 0
+
+    def _hit(self, *args, **kwargs):
+        self.count += 1
+        if self.rtt:
+            time.sleep(self.rtt)
+
+    def __enter__(self):
+        for name in ("before_cursor_execute", "commit", "rollback"):
+            event.listen(engine, name, self._hit)
+        return self
+
+    def __exit__(self, *exc):
+        for name in ("before_cursor_execute", "commit", "rollback"):
+            event.remove(engine, name, self._hit)
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def measure(counter, func) -> tuple:
+    """(result, ms, round trips) for one route call."""
+    before = counter.count
+    started = time.perf_counter()
+    result = func()
+    elapsed = (time.perf_counter() - started) * 1000
+    return result, elapsed, counter.count - before
+
+
+def run(db, user, iterations: int, rtt_ms: float) -> dict:
+    run_id = uuid.uuid4().hex[:6].upper()
+    timings = {}
+
+    def record(name, elapsed, round_trips):
+        entry = timings.setdefault(name, {"ms": [], "round_trips": []})
+        entry["ms"].append(elapsed)
+        entry["round_trips"].append(round_trips)
+
+    course_ids = []
+    with RoundTrips(rtt_ms) as counter:
+        for i in range(iterations):
+            code = f"{BENCH_CODE_PREFIX}{run_id}{i}"[:20]
+
+            created, *cost = measure(counter, lambda: call_route(
+                course.create_course,
+                course_data=CourseCreate(course_code=code, course_name=f"Benchmark course {i}", department="Benchmarking"),
+                db=db, current_admin=user
+            ))
+            record("POST /api/course/", *cost)
+            course_ids.append(created.id)
+
+            _, *cost = measure(counter, lambda: call_route(
+                course.update_course,
+                course_id=created.id,
+                course_data=CourseUpdate(course_name=f"Benchmark course {i} (renamed)"),
+                background_tasks=BackgroundTasks(), db=db, current_admin=user
+            ))
+            record("PUT /api/course/{id}", *cost)
+
+            uploaded, *cost = measure(counter, lambda: call_route(
+                note.upload_note,
+                note_data=NoteCreate(
+                    title=f"Benchmark note {run_id} {i}",
+                    description="Created by scripts/bench_writes.py",
+                    file_url=f"https://example.com/bench/{run_id}/{i}.pdf",
+                    file_type="pdf",
+                    course_id=created.id
+                ),
+                db=db, current_user=user
+            ))
+            record("POST /api/note/", *cost)
+
+            _, *cost = measure(counter, lambda: call_route(
+                note.update_note,
+                note_id=uploaded.id,
+                note_data=NoteUpdate(description="Updated by scripts/bench_writes.py"),
+                db=db, current_user=user
+            ))
+            record("PUT /api/note/{id}", *cost)
+
+            _, *cost = measure(counter, lambda: call_route(
+                note.delete_note, note_id=uploaded.id, db=db, current_user=user
+            ))
+            record("DELETE /api/note/{id}", *cost)
+
+    # clean up outside the counter
+    db.query(Course).filter(Course.id.in_(course_ids)).delete(synchronize_session=False)
+    db.commit()
+
+    return {
+        name: {
+            "round_trips": max(entry["round_trips"]),
+            "p50_ms": round(percentile(entry["ms"], 0.50), 3),
+            "p95_ms": round(percentile(entry["ms"], 0.95), 3),
+            "mean_ms": round(statistics.mean(entry["ms"]), 3),
+        }
+        for name, entry in timings.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--rtt-ms", type=float, default=0, help="simulated network round trip per statement")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file from an earlier run to compare against")
+    parser.add_argument("--force", action="store_true", help="allow running against a non-local database")
+    args = parser.parse_args()
+
+    if engine.url.host not in ("localhost", "127.0.0.1", None) and not args.force:
+        sys.exit(f"Refusing to write to {engine.url.host} - point DATABASE_URL at a local db or pass --force")
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).order_by(User.created_at).first()
+        if user is None:
+            sys.exit("Database is empty - seed it with scripts/explain_routes.py --seed first")
+
+        results = run(db, user, args.iterations, args.rtt_ms)
+    finally:
+        db.close()
+
+    print(f"{'route':<24}{'round trips':>12}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}")
+    for name, result in results.items():
+        print(f"{name:<24}{result['round_trips']:>12}{result['p50_ms']:>10}{result['p95_ms']:>10}{result['mean_ms']:>10}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nvs {args.compare}:")
+        for name, result in results.items():
+            if name not in baseline:
+                continue
+            before = baseline[name]
+            change = (result["mean_ms"] - before["mean_ms"]) / before["mean_ms"] * 100 if before["mean_ms"] else 0.0
+            print(
+                f"{name:<24}round trips {before['round_trips']} -> {result['round_trips']}, "
+                f"mean {before['mean_ms']} -> {result['mean_ms']} ms ({change:+.1f}%)"
+            )
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,262 @@
+"""Query-plan regression check for the API routes.
+
+Runs every read route against a local database, captures the SQL it sends,
+and re-runs each statement under EXPLAIN (ANALYZE, BUFFERS). Seq scans, big
+sorts and large row estimates over the thresholds are reported together with
+a suggested index. Exits with status 1 when anything is flagged so it can gate CI.
+
+    python scripts/explain_routes.py --seed           # seed a scratch db first
+    python scripts/explain_routes.py --min-rows 500   # stricter thresholds
+"""
+import argparse
+import inspect
+import json
+import os
+import random
+import re
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path so we can import our app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import event, insert, text
+
+from app.database import engine, SessionLocal
+from app.models import User, Course, Note
+from app.api import auth, course, note
+from app.utils import cache
+from app.utils.auth import hash_password, create_access_token, get_current_user
+from app.utils.facets import normalize_department
+
+SEED_PASSWORD = "explain-password"
+DEPARTMENTS = ["Computer Science", "Mathematics", "Physics", "Biology", "History", "Economics"]
+
+
+def seed(users: int, courses: int, notes_per_course: int):
+    """Fill the database with fake users, courses and notes."""
+    hashed = hash_password(SEED_PASSWORD)  # one hash for everyone, argon2 is slow on purpose
+    now = datetime.now(timezone.utc)
+
+    user_rows = [{
+        "id": uuid.uuid4(),
+        "email": f"seed{i}@example.com",
+        "hashed_password": hashed,
+        "first_name": "Seed",
+        "last_name": f"User{i}",
+        "university": "Seed University",
+        "is_admin": i == 0,
+        "created_at": now,
+        "updated_at": now,
+    } for i in range(users)]
+
+    course_rows = []
+    for i in range(courses):
+        department = random.choice(DEPARTMENTS)
+        course_rows.append({
+            "id": uuid.uuid4(),
+            "course_code": f"SEED{i:05d}",
+            "course_name": f"Seeded course {i}",
+            "department": department,
+            "department_key": normalize_department(department),
+            "created_by": user_rows[0]["id"],
+            "created_at": now,
+            "updated_at": now,
+        })
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), user_rows)
+        conn.execute(insert(Course), course_rows)
+
+        for course_row in course_rows:
+            note_rows = []
+            for i in range(notes_per_course):
+                created = now - timedelta(minutes=random.randint(0, 60 * 24 * 365))
+                note_rows.append({
+                    "id": uuid.uuid4(),
+                    "title": f"Lecture {i} notes for {course_row['course_code']}",
+                    "description": "Seeded note",
+                    "file_url": f"https://example.com/{uuid.uuid4().hex}.pdf",
+                    "file_type": "pdf",
+                    "course_id": course_row["id"],
+                    "uploaded_by": random.choice(user_rows)["id"],
+                    "created_at": created,
+                    "updated_at": created,
+                })
+            conn.execute(insert(Note), note_rows)
+
+        # fresh statistics, otherwise the planner estimates are meaningless
+        conn.execute(text("ANALYZE"))
+
+
+def call_route(func, **overrides):
+    """Call a route handler directly, filling in the defaults of its Query() params."""
+    kwargs = {}
+    for name, param in inspect.signature(func).parameters.items():
+        if name in overrides:
+            kwargs[name] = overrides[name]
+        elif param.default is not inspect.Parameter.empty:
+            kwargs[name] = getattr(param.default, "default", param.default)
+    return func(**kwargs)
+
+
+def build_scenarios(db):
+    """(name, callable) for every read route, using ids picked from the seeded data."""
+    some_user = db.query(User).order_by(User.created_at).first()
+    some_course = db.query(Course).first()
+    some_note = db.query(Note).first()
+    if not (some_user and some_course and some_note):
+        sys.exit("Database is empty - run with --seed first")
+
+    token = create_access_token({"sub": str(some_user.id)})
+    uploader = db.get(User, some_note.uploaded_by)
+    login_form = OAuth2PasswordRequestForm(username=some_user.email, password=SEED_PASSWORD)
+
+    return [
+        ("POST /api/auth/login", lambda: call_route(auth.login, form_data=login_form, db=db)),
+        ("GET /api/auth/me", lambda: call_route(get_current_user, token=token, db=db)),
+        ("GET /api/auth/me/notes", lambda: call_route(auth.get_my_notes, db=db, current_user=uploader)),
+        ("GET /api/course/", lambda: call_route(course.get_all_courses, db=db)),
+        ("GET /api/course/?department=", lambda: call_route(course.get_all_courses, db=db, department=some_course.department)),
+        ("GET /api/course/?search=", lambda: call_route(course.get_all_courses, db=db, search="course 1")),
+        ("GET /api/course/facets", lambda: call_route(course.get_course_facets, db=db, include_universities=True)),
+        ("GET /api/course/{id}", lambda: call_route(course.get_course_by_id, db=db, course_id=some_course.id)),
+        ("GET /api/note/", lambda: call_route(note.get_all_notes, db=db)),
+        ("GET /api/note/?course_id=", lambda: call_route(note.get_all_notes, db=db, course_id=some_course.id)),
+        ("GET /api/note/?search=", lambda: call_route(note.get_all_notes, db=db, search="Lecture 1")),
+        ("GET /api/note/{id}", lambda: call_route(note.get_note_by_id, db=db, note_id=some_note.id)),
+    ]
+
+
+def capture_statements(func):
+    """Run func and return the SELECT statements (with params) it sent."""
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        try:
+            func()
+        except Exception as exc:
+            # a 401/404 still ran its queries, which is all we need
+            print(f"    (route raised {exc.__class__.__name__})")
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return captured
+
+
+def explain(statement, parameters):
+    with engine.connect() as conn:
+        row = conn.exec_driver_sql(
+            "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement, parameters
+        ).scalar()
+        conn.rollback()
+    return row[0] if isinstance(row, list) else json.loads(row)[0]
+
+
+def walk(plan, parent=None):
+    yield plan, parent
+    for child in plan.get("Plans", []):
+        yield from walk(child, plan)
+
+
+def filter_columns(condition: str):
+    """Pull column names out of a plan Filter / Sort Key string."""
+    return list(dict.fromkeys(re.findall(r"(?:\w+\.)?(\w+)\)?(?:::\w+)?\s*(?:=|~~\*?|<|>)", condition)))
+
+
+def check_plan(result, args):
+    """Return a list of (problem, suggestion) for one EXPLAIN result."""
+    findings = []
+    for node, parent in walk(result["Plan"]):
+        node_type = node["Node Type"]
+        relation = node.get("Relation Name")
+        rows_scanned = node.get("Actual Rows", 0) + node.get("Rows Removed by Filter", 0)
+
+        if node_type == "Seq Scan" and rows_scanned >= args.min_rows:
+            condition = node.get("Filter", "")
+            columns = filter_columns(condition)
+            if "~~*" in condition:
+                suggestion = f"ILIKE '%...%' can't use a btree - consider a pg_trgm GIN index on {relation} ({', '.join(columns)})"
+            elif columns:
+                suggestion = f"CREATE INDEX ON {relation} ({', '.join(columns)})"
+            else:
+                suggestion = "full table read with no filter - add a LIMIT-friendly ordered index"
+            findings.append((f"Seq Scan on {relation} read {rows_scanned} rows ({condition or 'no filter'})", suggestion))
+
+        if node_type in ("Sort", "Incremental Sort"):
+            sort_keys = node.get("Sort Key", [])
+            sorted_rows = node.get("Actual Rows", 0)
+            if node.get("Sort Space Type") == "Disk" or sorted_rows >= args.min_rows:
+                child = node.get("Plans", [{}])[0]
+                table = child.get("Relation Name", "<table>")
+                columns = [key.split(".")[-1].split(" ")[0] for key in sort_keys]
+                findings.append((
+                    f"Sort of {sorted_rows} rows on {', '.join(sort_keys)} ({node.get('Sort Method', '?')})",
+                    f"CREATE INDEX ON {table} ({', '.join(columns)}) so rows come out pre-sorted"
+                ))
+
+        if node.get("Plan Rows", 0) >= args.max_estimate:
+            findings.append((
+                f"{node_type} estimated at {node['Plan Rows']} rows",
+                "check the filter is selective and statistics are fresh (ANALYZE)"
+            ))
+
+    return findings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", action="store_true", help="insert fake data before checking")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--courses", type=int, default=500)
+    parser.add_argument("--notes-per-course", type=int, default=40)
+    parser.add_argument("--min-rows", type=int, default=1000, help="flag seq scans / sorts touching at least this many rows")
+    parser.add_argument("--max-estimate", type=int, default=10000, help="flag plan nodes estimated above this many rows")
+    parser.add_argument("--force", action="store_true", help="allow seeding a non-local database")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        sys.exit("EXPLAIN (ANALYZE, BUFFERS) needs postgres")
+
+    if args.seed:
+        if engine.url.host not in ("localhost", "127.0.0.1", None) and not args.force:
+            sys.exit(f"Refusing to seed {engine.url.host} - point DATABASE_URL at a local db or pass --force")
+        print(f"Seeding {args.users} users, {args.courses} courses, {args.courses * args.notes_per_course} notes...")
+        seed(args.users, args.courses, args.notes_per_course)
+
+    # we want the queries, not cached results
+    cache.CACHE_ENABLED = False
+
+    flagged = 0
+    db = SessionLocal()
+    try:
+        for name, func in build_scenarios(db):
+            print(f"\n{name}")
+            for statement, parameters in capture_statements(func):
+                result = explain(statement, parameters)
+                summary = " ".join(statement.split())[:100]
+                print(f"  {result['Execution Time']:.2f}ms  {summary}")
+
+                for problem, suggestion in check_plan(result, args):
+                    flagged += 1
+                    print(f"    ! {problem}")
+                    print(f"      -> {suggestion}")
+    finally:
+        db.close()
+
+    print(f"\n{flagged} issue(s) found")
+    sys.exit(1 if flagged else 0)
+
+
+if __name__ == "__main__":
+    main()
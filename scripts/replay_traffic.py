@@ -0,0 +1,189 @@
+"""Replay captured production traffic against a local instance.
+
+Reads the NDJSON written by the capture middleware (CAPTURE_FILE) and re-issues
+every request at its original offset, divided by --speed, so bursts and
+overlapping requests come back as they happened. Then it prints latency per
+route next to what was captured:
+
+    CAPTURE_FILE=capture-{pid}.ndjson uvicorn app.main:app     # in production
+    python scripts/replay_traffic.py capture-*.ndjson --speed 2 --login me@example.com:secret
+
+Request bodies are never captured. POST /api/auth/login is replayed with the
+--login credentials, and other writes are skipped. Each captured user
+pseudonym is mapped, round robin, to one of the --login accounts. Run the
+replay on the commit before and after a change, with --save/--compare, to
+see the difference.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import statistics
+import sys
+import time
+from urllib.parse import urlsplit
+
+import httpx
+
+LOGIN_PATH = "/api/auth/login"
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def load(patterns) -> list:
+    records = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            with open(path) as f:
+                records.extend(json.loads(line) for line in f if line.strip())
+    records.sort(key=lambda record: record["t"])
+    return records
+
+
+def max_concurrency(intervals) -> int:
+    """Most requests in flight at once, from (start, end) pairs."""
+    edges = sorted([(start, 1) for start, _ in intervals] + [(end, -1) for _, end in intervals])
+    current = peak = 0
+    for _, step in edges:
+        current += step
+        peak = max(peak, current)
+    return peak
+
+
+async def login(client, email: str, password: str):
+    response = await client.post(LOGIN_PATH, data={"username": email, "password": password})
+    if response.status_code != 200:
+        sys.exit(f"Logging in as {email} failed with {response.status_code}")
+    return response.json()["access_token"]
+
+
+async def replay(records, base_url: str, speed: float, accounts: list, timeout: float) -> list:
+    results = []
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout) as client:
+        tokens = [await login(client, email, password) for email, password in accounts]
+        users = {}
+
+        async def send(record, due):
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            headers = {}
+            if record.get("u") and tokens:
+                user = users.setdefault(record["u"], tokens[len(users) % len(tokens)])
+                headers["Authorization"] = f"Bearer {user}"
+
+            data = None
+            if record["p"] == LOGIN_PATH:
+                email, password = accounts[0]
+                data = {"username": email, "password": password}
+
+            url = record["p"] + (f"?{record['q']}" if record.get("q") else "")
+            started = time.perf_counter()
+            try:
+                response = await client.request(record["m"], url, headers=headers, data=data)
+                status = response.status_code
+            except httpx.HTTPError:
+                status = None
+            ended = time.perf_counter()
+            results.append({**record, "replay_status": status, "replay_start": started, "replay_end": ended})
+
+        first = records[0]["t"]
+        begin = time.perf_counter() + 0.5
+        await asyncio.gather(*(
+            send(record, begin + (record["t"] - first) / speed) for record in records
+        ))
+
+    return results
+
+
+def summarize(results) -> dict:
+    groups = {}
+    for result in results:
+        name = f"{result['m']} {result.get('r') or result['p']}"
+        groups.setdefault(name, []).append(result)
+
+    summary = {}
+    for name, group in sorted(groups.items(), key=lambda item: -len(item[1])):
+        replayed = [(r["replay_end"] - r["replay_start"]) * 1000 for r in group]
+        summary[name] = {
+            "count": len(group),
+            "errors": sum(1 for r in group if r["replay_status"] is None or r["replay_status"] >= 500),
+            "status_changed": sum(1 for r in group if r["replay_status"] != r["s"]),
+            "captured_p50_ms": round(percentile([r["ms"] for r in group], 0.50), 2),
+            "captured_p95_ms": round(percentile([r["ms"] for r in group], 0.95), 2),
+            "p50_ms": round(percentile(replayed, 0.50), 2),
+            "p95_ms": round(percentile(replayed, 0.95), 2),
+            "mean_ms": round(statistics.mean(replayed), 2),
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("captures", nargs="+", help="capture files (globs allowed)")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--speed", type=float, default=1.0, help="2 replays twice as fast as captured")
+    parser.add_argument("--login", action="append", default=[], metavar="EMAIL:PASSWORD",
+                        help="account used for authenticated requests and logins (repeat for more users)")
+    parser.add_argument("--limit", type=int, help="only replay the first N requests")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file from an earlier replay to compare against")
+    parser.add_argument("--force", action="store_true", help="allow replaying against a non-local instance")
+    args = parser.parse_args()
+
+    if urlsplit(args.base_url).hostname not in ("localhost", "127.0.0.1") and not args.force:
+        sys.exit(f"Refusing to replay against {args.base_url} - use a local instance or pass --force")
+
+    accounts = [tuple(account.split(":", 1)) for account in args.login]
+    records = load(args.captures)
+    skipped_writes = sum(1 for r in records if r["m"] not in READ_METHODS and r["p"] != LOGIN_PATH)
+    records = [
+        r for r in records
+        if (r["m"] in READ_METHODS or r["p"] == LOGIN_PATH)
+        and (accounts or (not r.get("u") and r["p"] != LOGIN_PATH))
+    ]
+    if args.limit:
+        records = records[:args.limit]
+    if not records:
+        sys.exit("Nothing to replay (authenticated requests and logins need --login)")
+
+    span = records[-1]["t"] - records[0]["t"]
+    print(f"Replaying {len(records)} requests spanning {span:.1f}s at {args.speed}x "
+          f"(skipped {skipped_writes} writes without bodies)")
+
+    results = asyncio.run(replay(records, args.base_url, args.speed, accounts, args.timeout))
+    summary = summarize(results)
+
+    captured_peak = max_concurrency([(r["t"], r["t"] + r["ms"] / 1000) for r in results])
+    replay_peak = max_concurrency([(r["replay_start"], r["replay_end"]) for r in results])
+    print(f"Peak concurrency: captured {captured_peak}, replayed {replay_peak}\n")
+
+    print(f"{'route':<44}{'count':>7}{'errors':>8}{'captured p50/p95':>20}{'replay p50/p95':>20}")
+    for name, row in summary.items():
+        captured = f"{row['captured_p50_ms']}/{row['captured_p95_ms']}"
+        replayed = f"{row['p50_ms']}/{row['p95_ms']}"
+        print(f"{name[:43]:<44}{row['count']:>7}{row['errors']:>8}{captured:>20}{replayed:>20}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nvs {args.compare}:")
+        for name, row in summary.items():
+            if name not in baseline:
+                continue
+            before = baseline[name]
+            change = (row["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0.0
+            print(f"{name[:43]:<44}p50 {before['p50_ms']} -> {row['p50_ms']} ms, "
+                  f"p95 {before['p95_ms']} -> {row['p95_ms']} ms ({change:+.1f}%)")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,114 @@
+import os
+
+# Set before anything imports app.database. Never falls back to DATABASE_URL so a test
+# run can't drop the tables of a real database; point TEST_DATABASE_URL at postgres to opt in.
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("ALGORITHM", "HS256")
+# cached reads would leak from one test into the next
+os.environ.setdefault("CACHE_ENABLED", "false")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import Base, engine, SessionLocal
+from app.main import app
+from app.models import Course, User
+from app.utils.auth import create_access_token, hash_password
+from app.utils.facets import normalize_department
+
+TEST_PASSWORD = "correct-horse-battery"
+# argon2 is slow on purpose, hash once per run
+TEST_PASSWORD_HASH = hash_password(TEST_PASSWORD)
+
+
+@pytest.fixture
+def db():
+    """A session on a freshly created schema (a few milliseconds on in-memory SQLite)."""
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def client(db):
+    """The whole app, minus the startup warm-up and background threads."""
+    return TestClient(app)
+
+
+def make_user(db, email: str, is_admin: bool = False) -> User:
+    user = User(
+        email=email,
+        hashed_password=TEST_PASSWORD_HASH,
+        first_name="Test",
+        last_name="Admin" if is_admin else "Student",
+        is_admin=is_admin
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+
+def auth_headers(user: User) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+
+
+def upload_note(client, headers: dict, course, title: str = "Week 1 lecture slides",
+                file_url: str = "https://res.cloudinary.com/demo/raw/upload/week1.pdf", **extra) -> dict:
+    response = client.post("/api/note/", headers=headers, json={
+        "title": title, "file_url": file_url, "file_type": "pdf", "course_id": str(course.id), **extra
+    })
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+@pytest.fixture
+def user(db):
+    return make_user(db, "student@example.com")
+
+
+@pytest.fixture
+def admin(db):
+    return make_user(db, "admin@example.com", is_admin=True)
+
+
+@pytest.fixture
+def user_headers(user):
+    return auth_headers(user)
+
+
+@pytest.fixture
+def admin_headers(admin):
+    return auth_headers(admin)
+
+
+@pytest.fixture
+def course(db, admin):
+    course = Course(
+        course_code="CS101",
+        course_name="Introduction to Computing",
+        department="Computer Science",
+        department_key=normalize_department("Computer Science"),
+        created_by=admin.id
+    )
+    db.add(course)
+    db.commit()
+    return course
+
+
+@pytest.fixture
+def other_course(db, admin):
+    course = Course(
+        course_code="MA102",
+        course_name="Linear Algebra",
+        department="Mathematics",
+        department_key=normalize_department("Mathematics"),
+        created_by=admin.id
+    )
+    db.add(course)
+    db.commit()
+    return course
\ No newline at end of file
@@ -0,0 +1,21 @@
+from app.utils import purge
+from app.utils.admission import classify, route_classes
+
+
+def test_classify():
+    assert classify("GET", "/api/note/") == "read"
+    assert classify("POST", "/api/note/") == "write"
+    assert classify("GET", "/") is None
+
+
+def test_background_tasks_do_not_hold_a_slot(client, admin_headers, course, monkeypatch):
+    write = route_classes["write"]
+    during = []
+    monkeypatch.setattr(purge, "purge_course", lambda course_id: during.append((write.in_flight, write.semaphore._value)))
+
+    response = client.delete(f"/api/course/{course.id}", params={"mode": "background"}, headers=admin_headers)
+    assert response.status_code == 204
+
+    assert during == [(0, write.limit)]
+    assert write.in_flight == 0
+    assert write.semaphore._value == write.limit
\ No newline at end of file
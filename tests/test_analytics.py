@@ -0,0 +1,47 @@
+import uuid
+
+from app.models import NoteActivityDaily
+from app.utils import analytics
+from app.utils.analytics import EventBuffer, flush
+from conftest import upload_note
+
+
+def test_requeue_keeps_order_and_fits_the_buffer():
+    buffer = EventBuffer(capacity=4)
+    buffer.record(uuid.uuid4(), "view")
+    failed = [(uuid.uuid4(), 1, None) for _ in range(5)]
+
+    assert buffer.requeue(failed) == 3
+    assert buffer.drain()[:3] == failed[2:]
+
+
+def test_flush_rolls_up_per_note_and_day(client, db, user_headers, course):
+    notes = [upload_note(client, user_headers, course, title=f"Set {i}", file_url=f"https://res.cloudinary.com/s{i}.pdf") for i in range(3)]
+    buffer = EventBuffer()
+    for note in reversed(notes):
+        buffer.record(uuid.UUID(note["id"]), "view")
+        buffer.record(uuid.UUID(note["id"]), "download")
+    buffer.record(uuid.UUID(notes[0]["id"]), "view")
+
+    assert flush(buffer) == 7
+    views = {str(row.note_id): (row.views, row.downloads) for row in db.query(NoteActivityDaily)}
+    assert views == {notes[0]["id"]: (2, 1), notes[1]["id"]: (1, 1), notes[2]["id"]: (1, 1)}
+
+
+def test_failed_flush_is_retried(client, db, user_headers, course, monkeypatch):
+    note_id = uuid.UUID(upload_note(client, user_headers, course)["id"])
+    buffer = EventBuffer()
+    buffer.record(note_id, "view")
+
+    def broken(conn, events):
+        raise RuntimeError("database went away")
+
+    rollup = analytics._rollup
+    monkeypatch.setattr(analytics, "_rollup", broken)
+    assert flush(buffer) == 0
+    assert buffer.stats()["buffered"] == 1
+    assert buffer.failed == 0
+
+    monkeypatch.setattr(analytics, "_rollup", rollup)
+    assert flush(buffer) == 1
+    assert db.query(NoteActivityDaily).one().views == 1
\ No newline at end of file
@@ -0,0 +1,77 @@
+from datetime import datetime, timezone
+import uuid
+
+from app.models import Note, NoteArchive
+from conftest import upload_note
+
+COURSE = {"course_code": "PH201", "course_name": "Classical Mechanics", "department": "  Physics "}
+
+
+def test_admin_creates_course(client, admin_headers):
+    response = client.post("/api/course/", headers=admin_headers, json=COURSE)
+    assert response.status_code == 201
+    assert response.json()["department"] == "Physics"
+
+    duplicate = client.post("/api/course/", headers=admin_headers, json=COURSE)
+    assert duplicate.status_code == 400
+
+
+def test_students_cannot_create_courses(client, user_headers):
+    assert client.post("/api/course/", headers=user_headers, json=COURSE).status_code == 403
+    assert client.post("/api/course/", json=COURSE).status_code == 401
+
+
+def test_get_update_and_delete_course(client, admin_headers, course):
+    assert client.get(f"/api/course/{course.id}").json()["course_code"] == "CS101"
+
+    response = client.put(f"/api/course/{course.id}", headers=admin_headers, json={"course_name": "Computing I"})
+    assert response.status_code == 200
+    assert response.json()["course_name"] == "Computing I"
+
+    assert client.delete(f"/api/course/{course.id}", headers=admin_headers).status_code == 204
+    assert client.get(f"/api/course/{course.id}").status_code == 404
+    assert client.delete(f"/api/course/{course.id}", headers=admin_headers).status_code == 404
+
+
+def test_list_courses_filters_by_department(client, course, other_course):
+    assert len(client.get("/api/course/").json()) == 2
+
+    response = client.get("/api/course/", params={"department": "computer SCIENCE"})
+    assert [c["course_code"] for c in response.json()] == ["CS101"]
+
+
+def test_list_courses_with_fields(client, course):
+    response = client.get("/api/course/", params={"fields": "id,course_code"})
+    assert response.json() == [{"id": str(course.id), "course_code": "CS101"}]
+
+    assert client.get("/api/course/", params={"fields": "id,secret"}).status_code == 422
+
+
+def test_facets_count_courses_and_notes(client, user_headers, course, other_course):
+    upload_note(client, user_headers, course)
+    upload_note(client, user_headers, course, title="Week 2 lecture slides", file_url="https://res.cloudinary.com/demo/raw/upload/week2.pdf")
+
+    departments = {f["value"]: f for f in client.get("/api/course/facets").json()["departments"]}
+    assert departments["computer science"]["course_count"] == 1
+    assert departments["computer science"]["note_count"] == 2
+    assert departments["mathematics"]["note_count"] == 0
+
+
+def test_reactivating_a_course_restores_archived_notes(client, db, user, admin_headers, course):
+    assert client.put(f"/api/course/{course.id}", headers=admin_headers, json={"is_active": False}).status_code == 200
+    old = datetime(2020, 1, 1)
+    db.add(NoteArchive(
+        id=uuid.uuid4(), title="Old exam", file_url="https://res.cloudinary.com/demo/raw/upload/exam.pdf",
+        file_type="pdf", course_id=course.id, uploaded_by=user.id, created_at=old, updated_at=old,
+        archived_at=datetime.now(timezone.utc)
+    ))
+    db.commit()
+
+    response = client.put(f"/api/course/{course.id}", headers=admin_headers, json={"is_active": True})
+    assert response.status_code == 200
+    assert response.json()["is_active"] is True
+
+    # TestClient runs the restore before returning
+    assert db.query(NoteArchive).count() == 0
+    assert [note.title for note in db.query(Note)] == ["Old exam"]
+    assert [note["title"] for note in client.get("/api/note/").json()] == ["Old exam"]
\ No newline at end of file
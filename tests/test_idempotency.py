@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta, timezone
+import hashlib
+
+from app.models import IdempotencyKey, Note
+
+
+def note_payload(course, **changes) -> dict:
+    return {"title": "Week 3 tutorial", "file_url": "https://res.cloudinary.com/demo/raw/upload/t3.pdf",
+            "file_type": "pdf", "course_id": str(course.id), **changes}
+
+
+def test_retry_replays_the_first_response(client, db, user_headers, course):
+    headers = {**user_headers, "Idempotency-Key": "upload-1"}
+    first = client.post("/api/note/", headers=headers, json=note_payload(course))
+    retry = client.post("/api/note/", headers=headers, json=note_payload(course))
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert retry.json() == first.json()
+    assert db.query(Note).count() == 1
+
+
+def test_same_key_with_a_different_body_is_rejected(client, db, user_headers, course):
+    headers = {**user_headers, "Idempotency-Key": "upload-2"}
+    assert client.post("/api/note/", headers=headers, json=note_payload(course)).status_code == 201
+
+    response = client.post("/api/note/", headers=headers, json=note_payload(course, title="Week 4 tutorial"))
+    assert response.status_code == 422
+    assert db.query(Note).count() == 1
+
+
+def test_key_still_in_progress_is_a_conflict(client, db, user, user_headers, course):
+    # what a request that is still running has left behind: a claimed key without a response
+    key = hashlib.sha256(f"{user.id}\nPOST\n/api/note/\nupload-3".encode()).digest()
+    now = datetime.now(timezone.utc)
+    db.add(IdempotencyKey(key=key, request_hash=b"\0" * 32, created_at=now, expires_at=now + timedelta(hours=1)))
+    db.commit()
+
+    response = client.post("/api/note/", headers={**user_headers, "Idempotency-Key": "upload-3"}, json=note_payload(course))
+    assert response.status_code == 409
+    assert db.query(Note).count() == 0
+
+
+def test_keys_are_scoped_to_the_user(client, db, user_headers, admin_headers, course):
+    payload = note_payload(course)
+    client.post("/api/note/", headers={**user_headers, "Idempotency-Key": "shared"}, json=payload)
+    response = client.post("/api/note/", headers={**admin_headers, "Idempotency-Key": "shared"}, json=payload)
+
+    assert "Idempotent-Replayed" not in response.headers
+    assert db.query(Note).count() == 2
\ No newline at end of file
@@ -0,0 +1,61 @@
+from datetime import datetime, timezone
+
+from conftest import upload_note
+
+
+def upload_many(client, headers, course, count: int, prefix: str) -> list:
+    return [
+        upload_note(client, headers, course, title=f"{prefix} part {i}", file_url=f"https://res.cloudinary.com/demo/raw/upload/{prefix}{i}.pdf")
+        for i in range(count)
+    ]
+
+
+def page_ids(page: dict) -> list:
+    return [note["id"] for course in page["courses"] for note in course["notes"]]
+
+
+def test_cursor_walks_all_notes_newest_first(client, user_headers, course, other_course):
+    uploaded = upload_many(client, user_headers, course, 3, "algorithms") + upload_many(client, user_headers, other_course, 2, "matrices")
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/auth/me/notes", headers=user_headers, params=params)
+        assert response.status_code == 200
+        page = response.json()
+        seen += page_ids(page)
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+        assert len(page_ids(page)) == 2
+
+    assert seen == [note["id"] for note in reversed(uploaded)]
+
+
+def test_groups_by_course_with_total_counts(client, user_headers, course, other_course):
+    upload_many(client, user_headers, course, 3, "algorithms")
+    upload_many(client, user_headers, other_course, 1, "matrices")
+
+    page = client.get("/api/auth/me/notes", headers=user_headers, params={"limit": 2}).json()
+    assert [(c["course_code"], len(c["notes"]), c["note_count"]) for c in page["courses"]] == [("MA102", 1, 1), ("CS101", 1, 3)]
+
+
+def test_deleted_courses_do_not_shorten_pages(client, db, user_headers, course, other_course):
+    kept = upload_many(client, user_headers, course, 2, "algorithms")
+    # newer than everything in the live course, so they would fill the first page
+    upload_many(client, user_headers, other_course, 3, "matrices")
+    other_course.deleted_at = datetime.now(timezone.utc)
+    db.commit()
+
+    page = client.get("/api/auth/me/notes", headers=user_headers, params={"limit": 2}).json()
+    assert page_ids(page) == [note["id"] for note in reversed(kept)]
+    assert page["next_cursor"] is None
+
+
+def test_only_own_notes(client, user_headers, admin_headers, course):
+    upload_note(client, admin_headers, course)
+    assert client.get("/api/auth/me/notes", headers=user_headers).json() == {"courses": [], "next_cursor": None}
+
+
+def test_bad_cursor(client, user_headers):
+    assert client.get("/api/auth/me/notes", headers=user_headers, params={"cursor": "yesterday"}).status_code == 400
\ No newline at end of file
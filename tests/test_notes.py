@@ -0,0 +1,111 @@
+from app.models import Course, Note, NoteLocation
+from conftest import make_user, auth_headers, upload_note
+
+
+def test_upload_and_get_note(client, user, user_headers, course):
+    note = upload_note(client, user_headers, course, description="Slides from the first lecture")
+    assert note["uploaded_by"] == str(user.id)
+    assert note["possible_duplicates"] == []
+
+    response = client.get(f"/api/note/{note['id']}")
+    assert response.status_code == 200
+    assert response.json()["uploader_email"] == "student@example.com"
+
+
+def test_upload_needs_login_and_a_live_course(client, user_headers, course, admin_headers):
+    payload = {"title": "Week 1", "file_url": "https://res.cloudinary.com/a.pdf", "file_type": "pdf", "course_id": str(course.id)}
+    assert client.post("/api/note/", json=payload).status_code == 401
+
+    client.delete(f"/api/course/{course.id}", headers=admin_headers)
+    assert client.post("/api/note/", headers=user_headers, json=payload).status_code == 404
+
+
+def test_upload_rejects_non_http_links(client, user_headers, course):
+    for file_url in ("javascript:alert(1)", "file:///etc/passwd", "ftp://example.com/a.pdf"):
+        response = client.post("/api/note/", headers=user_headers, json={
+            "title": "Week 1", "file_url": file_url, "file_type": "pdf", "course_id": str(course.id)
+        })
+        assert response.status_code == 422, file_url
+
+
+def test_only_the_uploader_edits_or_deletes(client, db, user_headers, course):
+    note = upload_note(client, user_headers, course)
+    other_headers = auth_headers(make_user(db, "other@example.com"))
+
+    assert client.put(f"/api/note/{note['id']}", headers=other_headers, json={"title": "Mine now"}).status_code == 403
+    assert client.delete(f"/api/note/{note['id']}", headers=other_headers).status_code == 403
+
+    response = client.put(f"/api/note/{note['id']}", headers=user_headers, json={"title": "Week 1 slides (fixed)"})
+    assert response.status_code == 200
+    assert response.json()["title"] == "Week 1 slides (fixed)"
+
+    assert client.delete(f"/api/note/{note['id']}", headers=user_headers).status_code == 204
+    assert client.get(f"/api/note/{note['id']}").status_code == 404
+    assert client.delete(f"/api/note/{note['id']}", headers=user_headers).status_code == 404
+    assert db.query(NoteLocation).count() == 0
+
+
+def test_admin_deletes_any_note(client, user_headers, admin_headers, course):
+    note = upload_note(client, user_headers, course)
+    assert client.delete(f"/api/note/{note['id']}", headers=admin_headers).status_code == 204
+
+
+def test_list_notes_with_fields(client, user_headers, course, other_course):
+    note = upload_note(client, user_headers, course)
+    upload_note(client, user_headers, other_course, title="Eigenvalues", file_url="https://res.cloudinary.com/demo/raw/upload/eig.pdf")
+
+    assert len(client.get("/api/note/").json()) == 2
+
+    response = client.get("/api/note/", params={"course_id": str(course.id), "fields": "id,title"})
+    assert response.json() == [{"id": note["id"], "title": note["title"]}]
+
+    response = client.get(f"/api/note/{note['id']}", params={"fields": "title,uploader_name"})
+    assert response.json() == {"title": note["title"], "uploader_name": "Test Student"}
+
+    assert client.get("/api/note/", params={"fields": "password"}).status_code == 422
+
+
+def test_upload_reports_possible_duplicates(client, user_headers, course, other_course):
+    first = upload_note(client, user_headers, course)
+
+    # same file behind a tracking parameter and http
+    same_file = upload_note(
+        client, user_headers, course, title="Intro slides",
+        file_url="http://res.cloudinary.com/demo/raw/upload/week1.pdf?utm_source=discord"
+    )
+    assert [(d["id"], d["match"]) for d in same_file["possible_duplicates"]] == [(first["id"], "url")]
+
+    same_title = upload_note(client, user_headers, course, title="Week 1 lecture slides!", file_url="https://res.cloudinary.com/demo/raw/upload/other.pdf")
+    assert first["id"] in [d["id"] for d in same_title["possible_duplicates"] if d["match"] == "title"]
+
+    # only notes in the same course count
+    elsewhere = upload_note(client, user_headers, other_course)
+    assert elsewhere["possible_duplicates"] == []
+
+
+def test_search_matches_titles(client, user_headers, course):
+    upload_note(client, user_headers, course, title="Graph theory basics")
+    upload_note(client, user_headers, course, title="Sorting algorithms", file_url="https://res.cloudinary.com/demo/raw/upload/sort.pdf")
+
+    results = client.get("/api/note/search", params={"q": "graph"}).json()
+    assert [r["title"] for r in results] == ["Graph theory basics"]
+    assert "<mark>" in results[0]["snippet"]
+
+
+def test_background_course_delete_hides_then_purges_notes(client, db, user_headers, admin_headers, course):
+    course_id = course.id
+    notes = [
+        upload_note(client, user_headers, course, title=f"Chapter {i} summary", file_url=f"https://res.cloudinary.com/demo/raw/upload/ch{i}.pdf")
+        for i in range(3)
+    ]
+
+    response = client.delete(f"/api/course/{course_id}", params={"mode": "background"}, headers=admin_headers)
+    assert response.status_code == 204
+
+    assert client.get("/api/note/").json() == []
+    assert client.get(f"/api/note/{notes[0]['id']}").status_code == 404
+    assert client.get(f"/api/course/{course_id}").status_code == 404
+
+    # TestClient runs background tasks before returning, so the purge has finished
+    assert db.query(Note).count() == 0
+    assert db.query(Course).filter(Course.id == course_id).count() == 0
\ No newline at end of file
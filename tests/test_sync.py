@@ -0,0 +1,32 @@
+from conftest import upload_note
+
+
+def test_full_download_in_order(client, user_headers, course):
+    note = upload_note(client, user_headers, course)
+
+    page = client.get("/api/sync").json()
+    assert [(c["op"], c["type"], c["id"]) for c in page["changes"]] == [
+        ("upsert", "course", str(course.id)),
+        ("upsert", "note", note["id"]),
+    ]
+    assert page["changes"][1]["note"]["title"] == note["title"]
+    assert page["has_more"] is False
+
+    assert client.get("/api/sync", params={"since": page["token"]}).json()["changes"] == []
+
+
+def test_pages_and_course_filter(client, user_headers, course, other_course):
+    upload_note(client, user_headers, course)
+    upload_note(client, user_headers, other_course)
+
+    first = client.get("/api/sync", params={"limit": 2}).json()
+    assert first["has_more"] is True
+    rest = client.get("/api/sync", params={"since": first["token"], "limit": 2}).json()
+    assert len(first["changes"] + rest["changes"]) == 4
+
+    only = client.get("/api/sync", params={"course_id": str(course.id)}).json()
+    assert {c["course_id"] for c in only["changes"]} == {str(course.id)}
+
+
+def test_bad_token(client):
+    assert client.get("/api/sync", params={"since": "abc"}).status_code == 400
\ No newline at end of file